@@ -0,0 +1,73 @@
+/**
+ * @file JSMapIterProxy.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSMapIterProxy is a custom C-implemented python type. It acts as a python iterator over the iterators of JS Maps and Sets
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_JSMapIterProxy_
+#define PythonMonkey_JSMapIterProxy_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief The typedef for the backing store that will be used by JSMapIterProxy objects.
+ *
+ */
+typedef struct {
+  PyObject_HEAD
+  JS::PersistentRootedObject *jsIterator; /* the JS Map or Set iterator */
+  bool entries;                           /* true if the JS iterator yields [key, value] arrays, which become (key, value) tuples */
+} JSMapIterProxy;
+
+/**
+ * @brief This struct is a bundle of methods used by the JSMapIterProxy type
+ *
+ */
+struct JSMapIterProxyMethodDefinitions {
+public:
+  /**
+   * @brief Make a new JSMapIterProxy, iterating over the given JS iterator
+   *
+   * @param cx - javascript context pointer
+   * @param jsIterator - the iterator returned by JS::MapKeys, JS::MapValues, JS::MapEntries or JS::SetValues
+   * @param entries - whether the JS iterator yields [key, value] arrays
+   * @return PyObject* - the new JSMapIterProxy, or NULL if an exception has been raised
+   */
+  static PyObject *JSMapIterProxy_fromIterator(JSContext *cx, JS::HandleValue jsIterator, bool entries);
+
+  /**
+   * @brief Deallocation method (.tp_dealloc), removes the reference to the underlying JS iterator before freeing the JSMapIterProxy
+   *
+   * @param self - The JSMapIterProxy to be free'd
+   */
+  static void JSMapIterProxy_dealloc(JSMapIterProxy *self);
+
+  /**
+   * @brief .tp_iter method
+   *
+   * @param self - The JSMapIterProxy
+   * @return PyObject* - an interator over the iterator
+   */
+  static PyObject *JSMapIterProxy_iter(JSMapIterProxy *self);
+
+  /**
+   * @brief .tp_next method
+   *
+   * @param self - The JSMapIterProxy
+   * @return PyObject* - next object in iteration, or NULL when the JS iterator is done
+   */
+  static PyObject *JSMapIterProxy_next(JSMapIterProxy *self);
+};
+
+/**
+ * @brief Struct for the JSMapIterProxyType, used by all JSMapIterProxy objects
+ */
+extern PyTypeObject JSMapIterProxyType;
+
+#endif
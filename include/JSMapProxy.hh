@@ -0,0 +1,281 @@
+/**
+ * @file JSMapProxy.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSMapProxy is a custom C-implemented python type. It acts as a proxy for JS Maps from Spidermonkey, and behaves like a python mapping would.
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_JSMapProxy_
+#define PythonMonkey_JSMapProxy_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief The typedef for the backing store that will be used by JSMapProxy objects. All it contains is a pointer to the JS Map
+ *
+ */
+typedef struct {
+  PyObject_HEAD
+  JS::PersistentRootedObject *jsMap;
+} JSMapProxy;
+
+/**
+ * @brief This struct is a bundle of methods used by the JSMapProxy type.
+ *    Keys are converted to JS values and looked up with the JS::Map* APIs, so they follow the SameValueZero semantics of JS Maps
+ *
+ */
+struct JSMapProxyMethodDefinitions {
+public:
+  /**
+   * @brief Deallocation method (.tp_dealloc), removes the reference to the underlying JS Map before freeing the JSMapProxy
+   *
+   * @param self - The JSMapProxy to be free'd
+   */
+  static void JSMapProxy_dealloc(JSMapProxy *self);
+
+  /**
+   * @brief Length method (.mp_length), returns the number of entries in the JS Map
+   *
+   * @param self - The JSMapProxy
+   * @return Py_ssize_t The length of the JSMapProxy
+   */
+  static Py_ssize_t JSMapProxy_length(JSMapProxy *self);
+
+  /**
+   * @brief Getter method (.mp_subscript), returns the value of the entry with the given key, or raises a KeyError
+   *
+   * @param self - The JSMapProxy
+   * @param key - The key of the entry
+   * @return PyObject* NULL on exception, the corresponding value otherwise
+   */
+  static PyObject *JSMapProxy_get(JSMapProxy *self, PyObject *key);
+
+  /**
+   * @brief Assign method (.mp_ass_subscript), assigns a value to the entry with the given key, or deletes it if value is NULL
+   *
+   * @param self - The JSMapProxy
+   * @param key - The key of the entry
+   * @param value - The value to be assigned, or NULL to delete the entry
+   * @return int -1 on exception, 0 on success
+   */
+  static int JSMapProxy_assign(JSMapProxy *self, PyObject *key, PyObject *value);
+
+  /**
+   * @brief Test method (.sq_contains), returns whether the JS Map has an entry with the given key
+   *
+   * @param self - The JSMapProxy
+   * @param key - The key of the entry
+   * @return int 1 if `key` is in the Map, 0 if not, and -1 on error
+   */
+  static int JSMapProxy_contains(JSMapProxy *self, PyObject *key);
+
+  /**
+   * @brief Return an iterator object to make JSMapProxy iterable, iterating over the keys in insertion order
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* - iterator object
+   */
+  static PyObject *JSMapProxy_iter(JSMapProxy *self);
+
+  /**
+   * @brief Compute a string representation of the JSMapProxy
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* - the string representation
+   */
+  static PyObject *JSMapProxy_repr(JSMapProxy *self);
+
+  /**
+   * @brief Comparison method (.tp_richcompare), a JSMapProxy is equal to any mapping with the same entries
+   *
+   * @param self - The JSMapProxy
+   * @param other - Any other PyObject
+   * @param op - Which boolean operator is being performed (Py_EQ for equality, Py_NE for inequality, etc.)
+   * @return PyObject* - True or False for == and !=, NotImplemented otherwise, or NULL on exception
+   */
+  static PyObject *JSMapProxy_richcompare(JSMapProxy *self, PyObject *other, int op);
+
+  /**
+   * @brief get method
+   *
+   * @param self - The JSMapProxy
+   * @param args - arguments to the method
+   * @param nargs - number of args to the method
+   * @return PyObject* the value for key if present, else default
+   */
+  static PyObject *JSMapProxy_get_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs);
+
+  /**
+   * @brief pop method
+   *
+   * @param self - The JSMapProxy
+   * @param args - arguments to the method
+   * @param nargs - number of args to the method
+   * @return PyObject* the removed value for key if present, else default, raising a KeyError if there is no default
+   */
+  static PyObject *JSMapProxy_pop_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs);
+
+  /**
+   * @brief setdefault method
+   *
+   * @param self - The JSMapProxy
+   * @param args - arguments to the method
+   * @param nargs - number of args to the method
+   * @return PyObject* the value for key if present, else default, which is then inserted
+   */
+  static PyObject *JSMapProxy_setdefault_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs);
+
+  /**
+   * @brief popitem method, removes the first entry in insertion order
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* the removed (key, value) tuple, raising a KeyError if the Map is empty
+   */
+  static PyObject *JSMapProxy_popitem_method(JSMapProxy *self);
+
+  /**
+   * @brief update method, sets the entries of a mapping or of an iterable of (key, value) pairs, then of the keyword arguments
+   *
+   * @param self - The JSMapProxy
+   * @param args - arguments to the method
+   * @param kwds - keyword arguments to the method
+   * @return None
+   */
+  static PyObject *JSMapProxy_update_method(JSMapProxy *self, PyObject *args, PyObject *kwds);
+
+  /**
+   * @brief clear method, removes all entries
+   *
+   * @param self - The JSMapProxy
+   * @return None
+   */
+  static PyObject *JSMapProxy_clear_method(JSMapProxy *self);
+
+  /**
+   * @brief keys method
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* - a set-like view of the keys
+   */
+  static PyObject *JSMapProxy_keys_method(JSMapProxy *self);
+
+  /**
+   * @brief values method
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* - a view of the values
+   */
+  static PyObject *JSMapProxy_values_method(JSMapProxy *self);
+
+  /**
+   * @brief items method
+   *
+   * @param self - The JSMapProxy
+   * @return PyObject* - a set-like view of the (key, value) tuples
+   */
+  static PyObject *JSMapProxy_items_method(JSMapProxy *self);
+
+  /**
+   * @brief Look up and cache the collections.abc classes used by JSMapProxy, called once at module init
+   *
+   * @return bool - false if an exception has been raised
+   */
+  static bool init();
+
+  static inline PyObject *mappingType = nullptr; /**< `collections.abc.Mapping` */
+  static inline PyObject *keysViewType = nullptr; /**< `collections.abc.KeysView` */
+  static inline PyObject *valuesViewType = nullptr; /**< `collections.abc.ValuesView` */
+  static inline PyObject *itemsViewType = nullptr; /**< `collections.abc.ItemsView` */
+};
+
+
+/**
+ * @brief Struct for the methods that define the Mapping protocol
+ *
+ */
+static PyMappingMethods JSMapProxy_mapping_methods = {
+  .mp_length = (lenfunc)JSMapProxyMethodDefinitions::JSMapProxy_length,
+  .mp_subscript = (binaryfunc)JSMapProxyMethodDefinitions::JSMapProxy_get,
+  .mp_ass_subscript = (objobjargproc)JSMapProxyMethodDefinitions::JSMapProxy_assign
+};
+
+/**
+ * @brief Struct for the methods that define the Sequence protocol
+ *
+ */
+static PySequenceMethods JSMapProxy_sequence_methods = {
+  .sq_contains = (objobjproc)JSMapProxyMethodDefinitions::JSMapProxy_contains
+};
+
+PyDoc_STRVAR(map_get__doc__,
+  "get($self, key, default=None, /)\n"
+  "--\n"
+  "\n"
+  "Return the value for key if key is in the Map, else default.");
+
+PyDoc_STRVAR(map_pop__doc__,
+  "pop($self, key, default=<unrepresentable>, /)\n"
+  "--\n"
+  "\n"
+  "M.pop(k[,d]) -> v, remove specified key and return the corresponding value.\n"
+  "\n"
+  "If the key is not found, return the default if given; otherwise,\n"
+  "raise a KeyError.");
+
+PyDoc_STRVAR(map_setdefault__doc__,
+  "setdefault($self, key, default=None, /)\n"
+  "--\n"
+  "\n"
+  "Insert key with a value of default if key is not in the Map.\n"
+  "\n"
+  "Return the value for key if key is in the Map, else default.");
+
+PyDoc_STRVAR(map_popitem__doc__,
+  "M.popitem() -> (k, v), remove and return the first (key, value) pair in insertion order.\n"
+  "\n"
+  "Raise a KeyError if the Map is empty.");
+
+PyDoc_STRVAR(map_update__doc__,
+  "M.update([E, ]**F) -> None.  Update M from mapping/iterable E and F.\n"
+  "If E is present and has a .keys() method, then does:  for k in E: M[k] = E[k]\n"
+  "If E is present and lacks a .keys() method, then does:  for k, v in E: M[k] = v\n"
+  "In either case, this is followed by: for k in F:  M[k] = F[k]");
+
+PyDoc_STRVAR(map_clear__doc__,
+  "M.clear() -> None.  Remove all items from M.");
+
+PyDoc_STRVAR(map_keys__doc__,
+  "M.keys() -> a set-like object providing a view on M's keys, in insertion order");
+PyDoc_STRVAR(map_values__doc__,
+  "M.values() -> an object providing a view on M's values, in insertion order");
+PyDoc_STRVAR(map_items__doc__,
+  "M.items() -> a set-like object providing a view on M's (key, value) pairs, in insertion order");
+
+/**
+ * @brief Struct for the other methods
+ *
+ */
+static PyMethodDef JSMapProxy_methods[] = {
+  {"get", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_get_method, METH_FASTCALL, map_get__doc__},
+  {"pop", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_pop_method, METH_FASTCALL, map_pop__doc__},
+  {"setdefault", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_setdefault_method, METH_FASTCALL, map_setdefault__doc__},
+  {"popitem", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_popitem_method, METH_NOARGS, map_popitem__doc__},
+  {"update", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_update_method, METH_VARARGS | METH_KEYWORDS, map_update__doc__},
+  {"clear", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_clear_method, METH_NOARGS, map_clear__doc__},
+  {"keys", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_keys_method, METH_NOARGS, map_keys__doc__},
+  {"values", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_values_method, METH_NOARGS, map_values__doc__},
+  {"items", (PyCFunction)JSMapProxyMethodDefinitions::JSMapProxy_items_method, METH_NOARGS, map_items__doc__},
+  {NULL, NULL}                  /* sentinel */
+};
+
+/**
+ * @brief Struct for the JSMapProxyType, used by all JSMapProxy objects
+ */
+extern PyTypeObject JSMapProxyType;
+
+#endif
@@ -0,0 +1,275 @@
+/**
+ * @file JSSetProxy.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSSetProxy is a custom C-implemented python type. It acts as a proxy for JS Sets from Spidermonkey, and behaves like a python set would.
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_JSSetProxy_
+#define PythonMonkey_JSSetProxy_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief The typedef for the backing store that will be used by JSSetProxy objects. All it contains is a pointer to the JS Set
+ *
+ */
+typedef struct {
+  PyObject_HEAD
+  JS::PersistentRootedObject *jsSet;
+} JSSetProxy;
+
+/**
+ * @brief This struct is a bundle of methods used by the JSSetProxy type.
+ *    Elements are converted to JS values and looked up with the JS::Set* APIs, so they follow the SameValueZero semantics of JS Sets
+ *
+ */
+struct JSSetProxyMethodDefinitions {
+public:
+  /**
+   * @brief Deallocation method (.tp_dealloc), removes the reference to the underlying JS Set before freeing the JSSetProxy
+   *
+   * @param self - The JSSetProxy to be free'd
+   */
+  static void JSSetProxy_dealloc(JSSetProxy *self);
+
+  /**
+   * @brief Length method (.sq_length), returns the number of elements in the JS Set
+   *
+   * @param self - The JSSetProxy
+   * @return Py_ssize_t The length of the JSSetProxy
+   */
+  static Py_ssize_t JSSetProxy_length(JSSetProxy *self);
+
+  /**
+   * @brief Test method (.sq_contains), returns whether the JS Set has the given element
+   *
+   * @param self - The JSSetProxy
+   * @param element - The element to look for
+   * @return int 1 if `element` is in the Set, 0 if not, and -1 on error
+   */
+  static int JSSetProxy_contains(JSSetProxy *self, PyObject *element);
+
+  /**
+   * @brief Return an iterator object to make JSSetProxy iterable, iterating over the elements in insertion order
+   *
+   * @param self - The JSSetProxy
+   * @return PyObject* - iterator object
+   */
+  static PyObject *JSSetProxy_iter(JSSetProxy *self);
+
+  /**
+   * @brief Compute a string representation of the JSSetProxy
+   *
+   * @param self - The JSSetProxy
+   * @return PyObject* - the string representation
+   */
+  static PyObject *JSSetProxy_repr(JSSetProxy *self);
+
+  /**
+   * @brief Comparison method (.tp_richcompare), compares the elements of the JSSetProxy with those of another set as python sets do
+   *
+   * @param self - The JSSetProxy
+   * @param other - Any other PyObject
+   * @param op - Which boolean operator is being performed (Py_EQ for equality, Py_LE for subset, etc.)
+   * @return PyObject* - True or False, NotImplemented if other is not a set, or NULL on exception
+   */
+  static PyObject *JSSetProxy_richcompare(JSSetProxy *self, PyObject *other, int op);
+
+  /**
+   * @brief Union method (.nb_or), either operand is the JSSetProxy and the other one any iterable
+   *
+   * @param left - The left operand
+   * @param right - The right operand
+   * @return PyObject* - a new python set, NotImplemented if an operand is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_or(PyObject *left, PyObject *right);
+
+  /**
+   * @brief Intersection method (.nb_and), either operand is the JSSetProxy and the other one any iterable
+   *
+   * @param left - The left operand
+   * @param right - The right operand
+   * @return PyObject* - a new python set, NotImplemented if an operand is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_and(PyObject *left, PyObject *right);
+
+  /**
+   * @brief Difference method (.nb_subtract), either operand is the JSSetProxy and the other one any iterable
+   *
+   * @param left - The left operand
+   * @param right - The right operand
+   * @return PyObject* - a new python set, NotImplemented if an operand is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_subtract(PyObject *left, PyObject *right);
+
+  /**
+   * @brief Symmetric difference method (.nb_xor), either operand is the JSSetProxy and the other one any iterable
+   *
+   * @param left - The left operand
+   * @param right - The right operand
+   * @return PyObject* - a new python set, NotImplemented if an operand is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_xor(PyObject *left, PyObject *right);
+
+  /**
+   * @brief In-place union method (.nb_inplace_or), adds the elements of an iterable to the Set
+   *
+   * @param self - The JSSetProxy
+   * @param other - The iterable
+   * @return PyObject* - self, NotImplemented if other is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_ior(JSSetProxy *self, PyObject *other);
+
+  /**
+   * @brief In-place intersection method (.nb_inplace_and), removes the elements of the Set that are not in an iterable
+   *
+   * @param self - The JSSetProxy
+   * @param other - The iterable
+   * @return PyObject* - self, NotImplemented if other is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_iand(JSSetProxy *self, PyObject *other);
+
+  /**
+   * @brief In-place difference method (.nb_inplace_subtract), removes the elements of an iterable from the Set
+   *
+   * @param self - The JSSetProxy
+   * @param other - The iterable
+   * @return PyObject* - self, NotImplemented if other is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_isub(JSSetProxy *self, PyObject *other);
+
+  /**
+   * @brief In-place symmetric difference method (.nb_inplace_xor), toggles the membership of the elements of an iterable in the Set
+   *
+   * @param self - The JSSetProxy
+   * @param other - The iterable
+   * @return PyObject* - self, NotImplemented if other is not iterable, or NULL on exception
+   */
+  static PyObject *JSSetProxy_ixor(JSSetProxy *self, PyObject *other);
+
+  /**
+   * @brief add method, adds an element to the Set
+   *
+   * @param self - The JSSetProxy
+   * @param element - The element to add
+   * @return None
+   */
+  static PyObject *JSSetProxy_add_method(JSSetProxy *self, PyObject *element);
+
+  /**
+   * @brief discard method, removes an element from the Set if it is present
+   *
+   * @param self - The JSSetProxy
+   * @param element - The element to remove
+   * @return None
+   */
+  static PyObject *JSSetProxy_discard_method(JSSetProxy *self, PyObject *element);
+
+  /**
+   * @brief remove method, removes an element from the Set, raising a KeyError if it is not present
+   *
+   * @param self - The JSSetProxy
+   * @param element - The element to remove
+   * @return None
+   */
+  static PyObject *JSSetProxy_remove_method(JSSetProxy *self, PyObject *element);
+
+  /**
+   * @brief clear method, removes all elements
+   *
+   * @param self - The JSSetProxy
+   * @return None
+   */
+  static PyObject *JSSetProxy_clear_method(JSSetProxy *self);
+
+  /**
+   * @brief pop method, removes the first element in insertion order
+   *
+   * @param self - The JSSetProxy
+   * @return PyObject* - the removed element, raising a KeyError if the Set is empty
+   */
+  static PyObject *JSSetProxy_pop_method(JSSetProxy *self);
+
+  /**
+   * @brief isdisjoint method
+   *
+   * @param self - The JSSetProxy
+   * @param other - Any iterable
+   * @return PyObject* - True if the Set has no element in common with other, False otherwise
+   */
+  static PyObject *JSSetProxy_isdisjoint_method(JSSetProxy *self, PyObject *other);
+
+  /**
+   * @brief Look up and cache the collections.abc classes used by JSSetProxy, called once at module init
+   *
+   * @return bool - false if an exception has been raised
+   */
+  static bool init();
+
+  static inline PyObject *setType = nullptr; /**< `collections.abc.Set` */
+};
+
+
+/**
+ * @brief Struct for the methods that define the Sequence protocol
+ *
+ */
+static PySequenceMethods JSSetProxy_sequence_methods = {
+  .sq_length = (lenfunc)JSSetProxyMethodDefinitions::JSSetProxy_length,
+  .sq_contains = (objobjproc)JSSetProxyMethodDefinitions::JSSetProxy_contains
+};
+
+/**
+ * @brief Struct for the methods that define the Number protocol, used for the set operators
+ *
+ */
+static PyNumberMethods JSSetProxy_number_methods = {
+  .nb_subtract = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_subtract,
+  .nb_and = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_and,
+  .nb_xor = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_xor,
+  .nb_or = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_or,
+  .nb_inplace_subtract = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_isub,
+  .nb_inplace_and = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_iand,
+  .nb_inplace_xor = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_ixor,
+  .nb_inplace_or = (binaryfunc)JSSetProxyMethodDefinitions::JSSetProxy_ior
+};
+
+PyDoc_STRVAR(set_add__doc__,
+  "Add an element to a Set.\n\nThis has no effect if the element is already present.");
+PyDoc_STRVAR(set_discard__doc__,
+  "Remove an element from a Set if it is a member.\n\nUnlike remove(), discard() does not raise an exception when an element is missing from the Set.");
+PyDoc_STRVAR(set_remove__doc__,
+  "Remove an element from a Set; it must be a member.\n\nIf the element is not a member, raise a KeyError.");
+PyDoc_STRVAR(set_clear__doc__,
+  "Remove all elements from this Set.");
+PyDoc_STRVAR(set_pop__doc__,
+  "Remove and return the first element of the Set in insertion order.\n\nRaise a KeyError if the Set is empty.");
+PyDoc_STRVAR(set_isdisjoint__doc__,
+  "Return True if the Set and the iterable have a null intersection.");
+
+/**
+ * @brief Struct for the other methods
+ *
+ */
+static PyMethodDef JSSetProxy_methods[] = {
+  {"add", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_add_method, METH_O, set_add__doc__},
+  {"discard", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_discard_method, METH_O, set_discard__doc__},
+  {"remove", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_remove_method, METH_O, set_remove__doc__},
+  {"clear", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_clear_method, METH_NOARGS, set_clear__doc__},
+  {"pop", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_pop_method, METH_NOARGS, set_pop__doc__},
+  {"isdisjoint", (PyCFunction)JSSetProxyMethodDefinitions::JSSetProxy_isdisjoint_method, METH_O, set_isdisjoint__doc__},
+  {NULL, NULL}                  /* sentinel */
+};
+
+/**
+ * @brief Struct for the JSSetProxyType, used by all JSSetProxy objects
+ */
+extern PyTypeObject JSSetProxyType;
+
+#endif
@@ -21,9 +21,40 @@
  */
 typedef struct {
   PyUnicodeObject str;
-  JS::PersistentRootedValue jsString;
+  JS::PersistentRootedValue *jsString;
 } JSStringProxy;
 
+/**
+ * @brief This struct is a bundle of methods used by the JSStringProxy type
+ *
+ */
+struct JSStringProxyMethodDefinitions {
+public:
+  /**
+   * @brief Deallocation method (.tp_dealloc), returns the root of the underlying JSString to the pool before freeing the JSStringProxy.
+   * The character data belongs to the JSString, so only the buffers python allocated on its own are freed
+   *
+   * @param self - The JSStringProxy to be free'd
+   */
+  static void JSStringProxy_dealloc(JSStringProxy *self);
+};
+
+/**
+ * @brief Get a root for the JSString backing a JSStringProxy, reusing a pooled root if one is free
+ *
+ * @param cx - javascript context pointer
+ * @param str - the JSString to root
+ * @return JS::PersistentRootedValue* - the root, to be given back with releaseJSStringRoot
+ */
+JS::PersistentRootedValue *acquireJSStringRoot(JSContext *cx, JSString *str);
+
+/**
+ * @brief Unroot the JSString held by a root obtained from acquireJSStringRoot, keeping the root in the pool for reuse
+ *
+ * @param root - the root to release
+ */
+void releaseJSStringRoot(JS::PersistentRootedValue *root);
+
 /**
  * @brief Struct for the JSStringProxyType, used by all JSStringProxy objects
  */
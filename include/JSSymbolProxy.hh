@@ -0,0 +1,72 @@
+/**
+ * @file JSSymbolProxy.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSSymbolProxy is a custom C-implemented python type. It acts as a proxy for JS Symbols from Spidermonkey, exposed to python as pythonmonkey.JSSymbol
+ * @date 2024-06-04
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_JSSymbolProxy_
+#define PythonMonkey_JSSymbolProxy_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief The typedef for the backing store that will be used by JSSymbolProxy objects. All it contains is a pointer to the JS Symbol
+ *
+ */
+typedef struct {
+  PyObject_HEAD
+  JS::PersistentRootedSymbol *jsSymbol;
+} JSSymbolProxy;
+
+/**
+ * @brief This struct is a bundle of methods used by the JSSymbolProxy type
+ *
+ */
+struct JSSymbolProxyMethodDefinitions {
+public:
+  /**
+   * @brief Deallocation method (.tp_dealloc), removes the JSSymbolProxy from the cache of proxies by symbol, and removes the reference to the underlying JS Symbol before freeing the JSSymbolProxy
+   *
+   * @param self - The JSSymbolProxy to be free'd
+   */
+  static void JSSymbolProxy_dealloc(JSSymbolProxy *self);
+
+  /**
+   * @brief repr method, formatted like the JS Symbol's toString()
+   *
+   * @param self - The JSSymbolProxy
+   * @return PyObject* - the string "Symbol(description)"
+   */
+  static PyObject *JSSymbolProxy_repr(JSSymbolProxy *self);
+
+  /**
+   * @brief Getter for the description of the JS Symbol
+   *
+   * @param self - The JSSymbolProxy
+   * @param closure - unused
+   * @return PyObject* - the description as a str, or None if the symbol has no description
+   */
+  static PyObject *JSSymbolProxy_get_description(JSSymbolProxy *self, void *closure);
+};
+
+/**
+ * @brief Struct for the getters
+ *
+ */
+static PyGetSetDef JSSymbolProxy_getset[] = {
+  {"description", (getter)JSSymbolProxyMethodDefinitions::JSSymbolProxy_get_description, NULL, PyDoc_STR("The description of the JS Symbol, or None"), NULL},
+  {NULL}  /* Sentinel */
+};
+
+/**
+ * @brief Struct for the JSSymbolProxyType, used by all JSSymbolProxy objects
+ */
+extern PyTypeObject JSSymbolProxyType;
+
+#endif
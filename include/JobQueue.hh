@@ -56,10 +56,21 @@ bool enqueuePromiseJob(JSContext *cx, JS::HandleObject promise,
   JS::HandleObject job, JS::HandleObject allocationSite,
   JS::HandleObject incumbentGlobal) override;
 
+/**
+ * @brief Enqueue a microtask, as the `queueMicrotask` global function does. It runs along with the Promise jobs, in order
+ *
+ * @param cx - javascript context pointer
+ * @param callback - the JS function to call, with no arguments
+ * @return success
+ */
+bool enqueueMicrotask(JSContext *cx, JS::HandleObject callback);
+
 /**
  * @brief Run all jobs in the queue. Running one job may enqueue others; continue to
  * run jobs until the queue is empty.
  *
+ * On the event-loop, the queue is drained by a single callback scheduled when the first job is enqueued, see drainJobs.
+ *
  * Calling this method at the wrong time can break the web. The HTML spec
  * indicates exactly when the job queue should be drained (in HTML jargon,
  * when it should "perform a microtask checkpoint"), and doing so at other
@@ -78,6 +89,16 @@ void runJobs(JSContext *cx) override;
  */
 bool empty() const override;
 
+/**
+ * @brief Run the queued Promise jobs in a single batch, including the jobs enqueued while draining,
+ * as the microtask checkpoint of the event-loop callback scheduled by enqueuePromiseJob.
+ * If a job fails, the remaining jobs are left in the queue and another drain is scheduled
+ *
+ * @param cx - javascript context pointer
+ * @return false if a job failed, with the exception set on the Python error stack
+ */
+bool drainJobs(JSContext *cx);
+
 /**
  * @brief Appends a callback to the queue of FinalizationRegistry callbacks
  *
@@ -99,6 +120,22 @@ private:
 using FunctionVector = JS::GCVector<JSFunction *, 0, js::SystemAllocPolicy>;
 JS::PersistentRooted<FunctionVector> *finalizationRegistryCallbacks;
 
+using JobVector = JS::GCVector<JSObject *, 0, js::SystemAllocPolicy>;
+JS::PersistentRooted<JobVector> *jobs; /**< the pending Promise jobs, in order */
+
+PyObject *drainCallback = nullptr; /**< the Python callable scheduled on the event-loop to call drainJobs */
+PyObject *drainLoop = nullptr; /**< the Python event-loop on which a drain has been scheduled, or NULL if none is pending */
+bool draining = false; /**< whether the jobs are being run, in which case new jobs join the running batch */
+
+/**
+ * @brief Schedule drainJobs on the running Python event-loop, unless a drain is already pending on it
+ * @param cx - javascript context pointer
+ * @return false if there is no running event-loop, with a Python RuntimeError set
+ */
+bool scheduleDrain(JSContext *cx);
+
+class SavedQueue;
+
 /**
  * @brief Capture this JobQueue's current job queue as a SavedJobQueue and return it,
  * leaving the JobQueue's job queue empty. Destroying the returned object
@@ -111,12 +148,13 @@ JS::PersistentRooted<FunctionVector> *finalizationRegistryCallbacks;
 js::UniquePtr<JS::JobQueue::SavedJobQueue> saveJobQueue(JSContext *) override;
 
 /**
- * @brief The callback for dispatching an off-thread promise to the event loop
+ * @brief The callback for dispatching an off-thread promise to the event loop.
+ * The dispatchable is handed over to a single long-lived dispatcher thread, which sends it to the event-loop on the main thread
  *          see https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/public/Promise.h#l580
  *              https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/OffThreadPromiseRuntimeState.cpp#l160
  * @param closure - closure, currently the javascript context
  * @param dispatchable - Pointer to the Dispatchable to be called
- * @return not shutting down
+ * @return not shutting down, false if the dispatcher thread cannot be started, in which case the engine cancels the dispatchable
  */
 static bool dispatchToEventLoop(void *closure, JS::Dispatchable *dispatchable);
 
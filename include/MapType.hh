@@ -0,0 +1,33 @@
+/**
+ * @file MapType.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Maps in python
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_MapType_
+#define PythonMonkey_MapType_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief This struct represents a JS Map in python
+ */
+struct MapType {
+public:
+  /**
+   * @brief Make a JSMapProxy for a JS Map, without copying its entries
+   *
+   * @param cx - javascript context pointer
+   * @param mapObj - the JS Map
+   * @return PyObject* - the new JSMapProxy, or NULL if an exception has been raised
+   */
+  static PyObject *getPyObject(JSContext *cx, JS::HandleObject mapObj);
+};
+
+#endif
@@ -19,7 +19,7 @@
 #include <Python.h>
 
 /**
- * @brief base class for PyDictProxyHandler and PyListProxyHandler
+ * @brief base class for PyDictProxyHandler, PyListProxyHandler and PySetProxyHandler
  */
 struct PyBaseProxyHandler : public js::BaseProxyHandler {
 public:
@@ -32,6 +32,13 @@ public:
 
 enum ProxySlots {PyObjectSlot};
 
+/**
+ * @brief Reserved slots of the global object that cache the prototypes of our proxies.
+ *    JSCLASS_GLOBAL_FLAGS leaves JSCLASS_GLOBAL_APPLICATION_SLOTS reserved slots free for the embedder
+ */
+enum GlobalSlots {PyListPrototypeSlot, PyDictPrototypeSlot, PySetPrototypeSlot, GlobalSlotCount};
+static_assert(GlobalSlotCount <= JSCLASS_GLOBAL_APPLICATION_SLOTS, "too many reserved slots on the global object");
+
 typedef struct {
   const char *name;      /* The name of the method */
   JSNative call;         /* The C function that implements it */
@@ -39,12 +46,54 @@ typedef struct {
 } JSMethodDef;
 
 /**
- * @brief Convert jsid to a PyObject to be used as dict keys
+ * @brief Create a prototype object for our proxies, inheriting from the builtin prototype `parentKey`
+ *    and carrying the native methods in `methods` as non-enumerable own properties
+ *
+ * @param cx - pointer to the JSContext
+ * @param parentKey - the builtin class whose prototype the new prototype inherits from, so that instanceof works
+ * @param methods - the method definitions, terminated by an entry with a NULL name
+ * @return JSObject* - the new prototype object, or nullptr if an exception has been raised
+ */
+JSObject *newProxyPrototype(JSContext *cx, JSProtoKey parentKey, const JSMethodDef *methods);
+
+/**
+ * @brief Get the `this` object of a native method of one of the prototypes made by newProxyPrototype.
+ *    The method can be called on any object (e.g. `Object.getPrototypeOf(pyList).push.call({})`),
+ *    so `this` is checked to be a proxy of the handler family `family` before its python object slot is read
+ *
+ * @param cx - pointer to the JSContext
+ * @param args - the arguments of the native method
+ * @param family - the family of the proxy handler the method operates on
+ * @param className - the builtin class the method belongs to, for the error message
+ * @param methodName - the name of the method, for the error message
+ * @return JSObject* - the proxy, or nullptr if an exception (a TypeError for an incompatible `this`) has been raised
+ */
+JSObject *getThisProxy(JSContext *cx, const JS::CallArgs &args, const void *family, const char *className, const char *methodName);
+
+/**
+ * @brief Raise the TypeError for a native method of one of our proxy prototypes called on an incompatible `this`
+ *
+ * @param cx - pointer to the JSContext
+ * @param args - the arguments of the native method
+ * @param className - the builtin class the method belongs to
+ * @param methodName - the name of the method
+ */
+void reportIncompatibleThis(JSContext *cx, const JS::CallArgs &args, const char *className, const char *methodName);
+
+/**
+ * @brief Convert jsid to a PyObject to be used as dict keys. Symbol keys become the pythonmonkey.JSSymbol for the symbol
  */
 PyObject *idToKey(JSContext *cx, JS::HandleId id);
 
 /**
- * @brief Convert Python dict key to jsid
+ * @brief Convert jsid to a python attribute name. Symbol keys become their source text (e.g. `Symbol(xxx)`), as python attribute names must be str
+ *
+ * @return PyObject* - the new str, or NULL if an exception has been raised
+ */
+PyObject *idToAttrName(JSContext *cx, JS::HandleId id);
+
+/**
+ * @brief Convert Python dict key (str, int or pythonmonkey.JSSymbol) to jsid
  */
 bool keyToId(PyObject *key, JS::MutableHandleId idp);
 
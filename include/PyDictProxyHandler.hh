@@ -23,6 +23,16 @@ public:
   PyDictProxyHandler() : PyObjectProxyHandler(&family) {};
   static const char family;
 
+  /**
+   * @brief Get the PyDictPrototype object of the current global, creating it on first use.
+   *    It inherits from Object.prototype and carries the native Object methods,
+   *    so that method lookups go through the regular prototype chain instead of the getOwnPropertyDescriptor trap
+   *
+   * @param cx - pointer to the JSContext
+   * @return JSObject* - the prototype object, or nullptr if an exception has been raised
+   */
+  static JSObject *getCachedPrototype(JSContext *cx);
+
   /**
    * @brief [[OwnPropertyKeys]]
    *
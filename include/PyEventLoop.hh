@@ -14,6 +14,8 @@
 #include <Python.h>
 #include <jsapi.h>
 #include <vector>
+#include <deque>
+#include <new>
 #include <utility>
 #include <atomic>
 
@@ -27,19 +29,29 @@ public:
     return !!_loop;
   }
 
+  struct TimerQueue;
+
   /**
-   * @brief C++ wrapper for Python `asyncio.Handle` class
+   * @brief C++ wrapper for Python `asyncio.Handle` class, or for a JS timer scheduled natively in a `TimerQueue`
    * @see https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.Handle
    */
   struct AsyncHandle {
-    using id_t = uint32_t;
+    using id_t = uint64_t; /**< `(generation << 32) | (slot + 1)`, see `AsyncHandle::getUniqueId` */
+    friend struct PyEventLoop; // sets up the timers it schedules
+    friend struct TimerQueue;
   public:
     explicit AsyncHandle(PyObject *handle) : _handle(handle) {};
     AsyncHandle(const AsyncHandle &old) = delete; // forbid copy-initialization
-    AsyncHandle(AsyncHandle &&old) : _handle(std::exchange(old._handle, nullptr)), _refed(old._refed.exchange(false)), _debugInfo(std::exchange(old._debugInfo, nullptr)) {}; // clear the moved-from object
+    AsyncHandle(AsyncHandle &&old) : _handle(std::exchange(old._handle, nullptr)), _refed(old._refed.exchange(false)), _counted(std::exchange(old._counted, false)), _debugInfo(std::exchange(old._debugInfo, nullptr)),
+      _jobFn(std::exchange(old._jobFn, nullptr)), _loop(std::exchange(old._loop, nullptr)), _delaySeconds(old._delaySeconds), _repeat(old._repeat),
+      _active(std::exchange(old._active, false)), _cancelled(old._cancelled), _immediate(old._immediate), _inQueue(std::exchange(old._inQueue, false)), _seq(old._seq),
+      _id(std::exchange(old._id, 0)), _released(old._released) {}; // clear the moved-from object
     ~AsyncHandle() {
       if (Py_IsInitialized()) { // the Python runtime has already been finalized when `_timeoutIdMap` is cleared at exit
         Py_XDECREF(_handle);
+        Py_XDECREF(_debugInfo);
+        Py_XDECREF(_jobFn);
+        Py_XDECREF(_loop);
       }
     }
 
@@ -48,6 +60,7 @@ public:
      * @return the timeoutId
      */
     static inline id_t newEmpty() {
+      Py_INCREF(Py_None);
       auto handle = AsyncHandle(Py_None);
       return AsyncHandle::getUniqueId(std::move(handle));
     }
@@ -61,46 +74,65 @@ public:
      * @return true if the job has been cancelled.
      */
     bool cancelled();
+    /**
+     * @brief Restart the timer from now with its original delay, in place, as Node.js `Timeout.refresh()` does.
+     * A timer that has already run is reactivated, ref'ed or not as it was. Cancelled timers and immediate jobs are left untouched.
+     * The timer moves to the running event-loop if it was scheduled on another one.
+     * @return false if an exception has been raised, such as no event-loop running
+     */
+    bool refresh();
     /**
      * @return true if the job function has already been executed or cancelled.
      */
     bool _finishedOrCancelled();
 
     /**
-     * @brief Get the unique `timeoutID` for JS `setTimeout`/`clearTimeout` methods
+     * @brief Get the unique `timeoutID` for JS `setTimeout`/`clearTimeout` methods.
+     * The slots of freed handles are reused, with their generation bumped so that the timeoutIDs of the freed handles stay invalid
      * @see https://developer.mozilla.org/en-US/docs/Web/API/setTimeout#return_value
      */
     static inline id_t getUniqueId(AsyncHandle &&handle) {
       // TODO (Tom Tang): mutex lock
-      _timeoutIdMap.push_back(std::move(handle));
-      return _timeoutIdMap.size() - 1; // the index in `_timeoutIdMap`
+      size_t slot;
+      if (!_freeSlots.empty()) {
+        slot = _freeSlots.back();
+        _freeSlots.pop_back();
+        AsyncHandle *freed = &_timeoutIdMap[slot];
+        freed->~AsyncHandle(); // no-op, the Python objects have already been released by `_freeIfDone`
+        new (freed) AsyncHandle(std::move(handle));
+      } else {
+        slot = _timeoutIdMap.size();
+        _timeoutIdMap.push_back(std::move(handle));
+        _generations.push_back(0);
+      }
+      id_t timeoutID = ((id_t)_generations[slot] << 32) | (slot + 1); // never 0
+      _timeoutIdMap[slot]._id = timeoutID;
+      return timeoutID;
     }
     static inline AsyncHandle *fromId(id_t timeoutID) {
-      try {
-        return &_timeoutIdMap.at(timeoutID);
-      } catch (...) { // std::out_of_range&
-        return nullptr; // invalid timeoutID
+      size_t slot = (timeoutID & 0xFFFFFFFF) - 1;
+      if (slot >= _timeoutIdMap.size() || _timeoutIdMap[slot]._id != timeoutID) {
+        return nullptr; // invalid timeoutID, or the handle has been freed
       }
+      return &_timeoutIdMap[slot];
     }
 
     /**
-     * @brief Get the underlying `asyncio.Handle` Python object
+     * @brief Release the handle as its JS `Timeout` object has been garbage-collected.
+     * The handle is freed and its timeoutID recycled as soon as the timer is finished or cancelled
      */
-    inline PyObject *getHandleObject() const {
-      Py_INCREF(_handle); // otherwise the object would be GC-ed as the AsyncHandle destructor decreases the reference count
-      return _handle;
-    }
+    void release();
 
     /**
-     * @brief Replace the underlying `asyncio.Handle` Python object with the provided value
-     * @return the old `asyncio.Handle` object
+     * @brief Get the underlying `asyncio.Handle` Python object, or NULL if the handle wraps none
      */
-    inline PyObject *swap(PyObject *newHandleObject) {
-      return std::exchange(_handle, newHandleObject);
+    inline PyObject *getHandleObject() const {
+      Py_XINCREF(_handle); // otherwise the object would be GC-ed as the AsyncHandle destructor decreases the reference count
+      return _handle;
     }
 
     /**
-     * @brief Getter for if the timer has been ref'ed
+     * @brief Getter for if the timer has been ref'ed, kept once the timer is finished as Node.js `Timeout.hasRef()` does
      */
     inline bool hasRef() {
       return _refed;
@@ -110,22 +142,16 @@ public:
      * @brief Ref the timer so that the event-loop won't exit as long as the timer is active
      */
     inline void addRef() {
-      if (!_refed) {
-        _refed = true;
-        if (!_finishedOrCancelled()) { // noop if the timer is finished or canceled
-          PyEventLoop::_locker->incCounter();
-        }
-      }
+      _refed = true;
+      _countIfRefed();
     }
 
     /**
      * @brief Unref the timer so that the event-loop can exit
      */
     inline void removeRef() {
-      if (_refed) {
-        _refed = false;
-        PyEventLoop::_locker->decCounter();
-      }
+      _refed = false;
+      _uncount();
     }
 
     /**
@@ -139,31 +165,198 @@ public:
     }
 
     /**
-     * @brief Get an iterator for the `AsyncHandle`s of all timers
+     * @brief Get an iterator for the `AsyncHandle`s of all timers, freed handles are never ref'ed
      */
     static inline auto &getAllTimers() {
       return _timeoutIdMap;
     }
   protected:
+    /**
+     * @brief Free the handle if it has been released and the timer is finished or cancelled:
+     * drop its Python objects and put its slot on the free list
+     */
+    void _freeIfDone();
+
+    /**
+     * @brief Increment the counter of the event-loop jobs for the timer, if it is ref'ed and not finished or cancelled.
+     * A timer holds at most one increment
+     */
+    inline void _countIfRefed() {
+      if (_refed && !_counted && !_finishedOrCancelled()) {
+        _counted = true;
+        PyEventLoop::_locker->incCounter();
+      }
+    }
+
+    /**
+     * @brief Give back the increment of the counter of the event-loop jobs, if the timer holds one,
+     * as it finishes, is cancelled or is unref'ed
+     */
+    inline void _uncount() {
+      if (_counted) {
+        _counted = false;
+        PyEventLoop::_locker->decCounter();
+      }
+    }
+
     PyObject *_handle;
-    std::atomic_bool _refed = false;
+    std::atomic_bool _refed = false; /**< the ref state asked for, see `AsyncHandle::hasRef` */
+    bool _counted = false; /**< true if the timer holds an increment of the counter of the event-loop jobs, only while it is active */
     PyObject *_debugInfo = nullptr;
+
+    // JS timers scheduled natively in the `TimerQueue` of their event-loop
+    PyObject *_jobFn = nullptr; /**< the job function, or NULL if this handle wraps an `asyncio.Handle` */
+    PyObject *_loop = nullptr; /**< the event-loop the timer is scheduled on */
+    double _delaySeconds = 0;
+    bool _repeat = false;
+    bool _active = false; /**< true until the job function has been executed for the last time, or the timer has been cancelled */
+    bool _cancelled = false;
+    bool _immediate = false; /**< true for an immediate job, run in the check phase */
+    bool _inQueue = false; /**< true if the timer has a live entry in the `TimerQueue` */
+    uint64_t _seq = 0; /**< the sequence number of the live entry in the `TimerQueue`, entries with another sequence number are stale */
+
+    id_t _id = 0; /**< the timeoutID, or 0 if the handle is not in `_timeoutIdMap` or has been freed */
+    bool _released = false; /**< true once JS no longer holds the `Timeout` object */
+  };
+
+  /**
+   * @brief The JS timers of a Python event-loop, kept in a binary min-heap ordered by deadline.
+   * Only the earliest deadline is registered with the event-loop, as a single `asyncio.TimerHandle`,
+   * and all the timers that are due run in one batch when it fires.
+   * Cancelled timers are dropped lazily, when they reach the top of the heap or when they make up most of it.
+   *
+   * The queue also holds the immediate jobs of the event-loop, run by a single event-loop callback, the check phase.
+   */
+  struct TimerQueue {
+  public:
+    /**
+     * @brief An entry in the heap
+     */
+    struct Entry {
+      double deadline; /**< in seconds, on the clock of the event-loop, see `TimerQueue::now` */
+      uint64_t seq; /**< breaks ties between equal deadlines so that timers run in the order they were scheduled */
+      AsyncHandle::id_t timerId;
+    };
+
+    /**
+     * @brief Get the timer queue of an event-loop
+     * @param loop - the Python event-loop
+     * @param create - if true, create the queue if the event-loop doesn't have one yet
+     * @return the queue, or NULL if the event-loop doesn't have one and `create` is false
+     */
+    static TimerQueue *forLoop(PyObject *loop, bool create);
+
+    /**
+     * @brief Destroy the queues of the event-loops that have been closed, such as the one of an earlier `asyncio.run`.
+     * Their timers are finished as they can never run, so that they no longer hold up the event-loop shield
+     */
+    static void dropClosedLoops();
+
+    /**
+     * @brief The time on the clock of the event-loop, `loop.time()`, so that the deadlines agree with the wakeup registered with `call_at`
+     * @see https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.time
+     */
+    double now();
+
+    /**
+     * @brief Schedule a timer to run after its delay, from now
+     * @return false if an exception has been raised registering the wakeup with the event-loop, the timer is not scheduled then
+     */
+    bool schedule(AsyncHandle::id_t timerId);
+
+    /**
+     * @brief Drop the live entry of a cancelled timer
+     */
+    void unschedule(AsyncHandle &timer);
+
+    /**
+     * @brief Run all the timers that are due, then register the next earliest deadline with the event-loop
+     * @return false if a job function raised an exception, the remaining due timers run on the next wakeup
+     */
+    bool runDueTimers();
+
+    /**
+     * @brief Schedule an immediate job, the check phase callback is registered with the event-loop for the first one
+     * @return false if an exception has been raised registering the check phase callback, the job is not scheduled then
+     */
+    bool scheduleImmediate(AsyncHandle::id_t timerId);
+
+    /**
+     * @brief Run the immediate jobs scheduled before the check phase started, the ones they schedule run on the next iteration
+     * @return false if a job function raised an exception, the remaining immediate jobs run on the next iteration
+     */
+    bool runImmediates();
+  protected:
+    explicit TimerQueue(PyObject *loop) : _loop(loop) {};
+
+    /**
+     * @brief Register the earliest deadline with the event-loop, if it is earlier than the current wakeup.
+     * The queue is destroyed once it has no timers left.
+     * @return false if an exception has been raised
+     */
+    bool _arm();
+
+    /**
+     * @brief Register the check phase callback with the event-loop
+     * @return false if an exception has been raised
+     */
+    bool _scheduleCheckPhase();
+
+    /**
+     * @brief Finish all the timers and immediate jobs of the queue, and release its event-loop
+     */
+    void _dropTimers();
+
+    /**
+     * @brief Remove the stale entries from the top of the heap
+     */
+    void _dropStaleTop();
+
+    /**
+     * @return true if the entry is the live entry of its timer
+     */
+    static bool _isLive(const Entry &entry);
+
+    PyObject *_loop; /**< strong reference to the event-loop */
+    std::vector<Entry> _heap;
+    size_t _liveCount = 0;
+    uint64_t _nextSeq = 0;
+    PyObject *_wakeup = nullptr; /**< the `asyncio.TimerHandle` registered for the earliest deadline */
+    double _wakeupDeadline = 0;
+    double _clockResolution = 0; /**< asyncio runs timer handles up to this much early, so timers that close to their deadline are due */
+    double _lastTime = 0; /**< the last time read from the event-loop, in case reading it fails */
+    bool _running = false;
+    std::vector<AsyncHandle::id_t> _immediates; /**< the pending immediate jobs, in order */
+    bool _checkScheduled = false; /**< whether the check phase callback is registered with the event-loop */
+
+    static inline std::vector<TimerQueue *> _queues; // one per event-loop with timers
   };
 
   /**
-   * @brief Send job to the Python event-loop
+   * @brief Send job to the Python event-loop.
+   * From the event-loop's own thread the job is scheduled with `call_soon`,
+   * from other threads the jobs sent before the event-loop wakes up share a single `call_soon_threadsafe` wakeup
    * @param jobFn - The JS event-loop job converted to a Python function
-   * @return a AsyncHandle, the value can be safely ignored
+   * @return a AsyncHandle, the value can be safely ignored.
+   *         It wraps no `asyncio.Handle` if the job shares the wakeup of the jobs sent before it, or if an exception has been raised
    */
   AsyncHandle enqueue(PyObject *jobFn);
   /**
-   * @brief Schedule a job to the Python event-loop, with the given delay
+   * @brief Schedule a job to the Python event-loop, with the given delay.
+   * The job is kept in the `TimerQueue` of the event-loop, see `PyEventLoop::TimerQueue`
    * @param jobFn - The JS event-loop job converted to a Python function
    * @param delaySeconds - The job function will be called after the given number of seconds
    * @param repeat - If true, the job will be executed repeatedly on a fixed interval
-   * @return the timeoutId
+   * @return the timeoutId, or 0 if an exception has been raised
    */
   [[nodiscard]] AsyncHandle::id_t enqueueWithDelay(PyObject *jobFn, double delaySeconds, bool repeat);
+  /**
+   * @brief Schedule a job to run on the next iteration of the Python event-loop, as Node.js `setImmediate` does.
+   * All the immediate jobs of the event-loop run in a single batch, see `PyEventLoop::TimerQueue::scheduleImmediate`
+   * @param jobFn - The JS event-loop job converted to a Python function
+   * @return the timeoutId, or 0 if an exception has been raised
+   */
+  [[nodiscard]] AsyncHandle::id_t enqueueImmediate(PyObject *jobFn);
 
   /**
    * @brief C++ wrapper for Python `asyncio.Future` class
@@ -240,6 +433,12 @@ public:
    */
   Future ensureFuture(PyObject *awaitable);
 
+  /**
+   * @brief Look up and cache the asyncio functions and names used by PyEventLoop, called once at module init
+   * @return false if an exception has been raised
+   */
+  static bool init();
+
   /**
    * @brief Get the running Python event-loop on the current thread, or
    *        raise a Python RuntimeError if no event-loop running
@@ -270,22 +469,25 @@ public:
     }
 
     /**
-     * @brief Increment the counter for the number of our job functions in the Python event-loop
+     * @brief Increment the counter for the number of our job functions in the Python event-loop.
+     * The `asyncio.Event` is only touched when the first job is queued
      */
     inline void incCounter() {
-      _counter++;
-      Py_XDECREF(PyObject_CallMethod(_queueIsEmpty, "clear", NULL)); // _queueIsEmpty.clear()
+      if (_counter++ == 0) { // the queue was empty
+        Py_XDECREF(PyObject_CallMethod(_queueIsEmpty, "clear", NULL)); // _queueIsEmpty.clear()
+      }
     }
 
     /**
-     * @brief Decrement the counter for the number of our job functions in the Python event-loop
+     * @brief Decrement the counter for the number of our job functions in the Python event-loop.
+     * The `asyncio.Event` is only touched when the last job is done
      */
     inline void decCounter() {
-      _counter--;
-      if (_counter == 0) { // no job queueing
+      int counter = --_counter;
+      if (counter == 0) { // no job queueing
         // Notify that the queue is empty and awake (unblock) the event-loop shield
         Py_XDECREF(PyObject_CallMethod(_queueIsEmpty, "set", NULL)); // _queueIsEmpty.set()
-      } else if (_counter < 0) { // something went wrong
+      } else if (counter < 0) { // something went wrong
         PyErr_SetString(PyExc_RuntimeError, "Event-loop job counter went below zero.");
       }
     }
@@ -318,11 +520,23 @@ private:
    */
   static PyEventLoop _getLoopOnThread(PyThreadState *tstate);
 
+  /**
+   * @brief Get the running Python event-loop object on a specific thread
+   * @return borrowed reference to the event-loop, or NULL if no event-loop running on that thread, without raising
+   */
+  static PyObject *_getRunningLoopObject(PyThreadState *tstate);
+
   static PyThreadState *_getMainThread();
   static inline PyThreadState *_getCurrentThread();
 
+  static inline PyObject *_ensureFutureFn = nullptr; /**< `asyncio.ensure_future` */
+  static inline PyObject *_runningLoopKey = nullptr; /**< interned "__asyncio_running_event_loop__", the key of the running loop in the thread state dict */
+  static inline PyThreadState *_mainThread = nullptr; /**< the thread state of the main thread, found once */
+
   // TODO (Tom Tang): use separate pools of IDs for different global objects
-  static inline std::vector<AsyncHandle> _timeoutIdMap;
+  static inline std::deque<AsyncHandle> _timeoutIdMap; // a deque never moves the handles as it grows
+  static inline std::vector<uint32_t> _generations; // the generation of each slot in `_timeoutIdMap`, bumped when the slot is freed
+  static inline std::vector<size_t> _freeSlots;
 };
 
 #endif
\ No newline at end of file
@@ -23,6 +23,16 @@ public:
   PyListProxyHandler() : PyBaseProxyHandler(&family) {};
   static const char family;
 
+  /**
+   * @brief Get the PyListPrototype object of the current global, creating it on first use.
+   *    It inherits from Array.prototype and carries the native Array methods that operate on the python list directly,
+   *    so that method lookups go through the regular prototype chain instead of the getOwnPropertyDescriptor trap
+   *
+   * @param cx - pointer to the JSContext
+   * @return JSObject* - the prototype object, or nullptr if an exception has been raised
+   */
+  static JSObject *getCachedPrototype(JSContext *cx);
+
   /**
    * @brief Handles python object reference count when JS Proxy object is finalized
    *
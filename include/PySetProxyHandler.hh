@@ -0,0 +1,104 @@
+/**
+ * @file PySetProxyHandler.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for creating JS proxy objects for python sets
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_PySetProxy_
+#define PythonMonkey_PySetProxy_
+
+#include "include/PyObjectProxyHandler.hh"
+
+
+/**
+ * @brief This struct is the ProxyHandler for JS Proxy Objects pythonmonkey creates to handle coercion from python sets and frozensets to JS Sets.
+ *    The only own property is "size", the Set methods are found on the prototype and operate on the python set directly
+ *
+ */
+struct PySetProxyHandler : public PyObjectProxyHandler {
+public:
+  PySetProxyHandler() : PyObjectProxyHandler(&family) {};
+  static const char family;
+
+  /**
+   * @brief Get the PySetPrototype object of the current global, creating it on first use.
+   *    It inherits from Set.prototype, so that instanceof will work, and carries native Set methods that operate on the python set
+   *
+   * @param cx - pointer to the JSContext
+   * @return JSObject* - the prototype object, or nullptr if an exception has been raised
+   */
+  static JSObject *getCachedPrototype(JSContext *cx);
+
+  /**
+   * @brief [[OwnPropertyKeys]], sets have no enumerable own properties
+   *
+   * @param cx - pointer to JSContext
+   * @param proxy - The proxy object who's keys we output
+   * @param props - out-parameter of object IDs
+   * @return true - call succeeded
+   * @return false - call failed and an exception has been raised
+   */
+  bool ownPropertyKeys(JSContext *cx, JS::HandleObject proxy,
+    JS::MutableHandleIdVector props) const override;
+  /**
+   * @brief [[Delete]], a no-op since the only own property is "size"
+   *
+   * @param cx - pointer to JSContext
+   * @param proxy - The proxy object who's property we wish to delete
+   * @param id - The key we wish to delete
+   * @param result - whether the call succeeded or not
+   * @return true - call succeeded
+   * @return false - call failed and an exception has been raised
+   */
+  bool delete_(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+    JS::ObjectOpResult &result) const override;
+  /**
+   * @brief [[HasProperty]], looks through the prototype chain so that `'add' in set` works
+   * @param cx - pointer to JSContext
+   * @param proxy - The proxy object who's property we wish to check
+   * @param id - key value of the property to check
+   * @param bp - out-paramter: true if object has property, false if not
+   * @return true - call succeeded
+   * @return false - call failed and an exception has been raised
+   */
+  bool has(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+    bool *bp) const override;
+  /**
+   * @brief [[Set]], properties cannot be set on a python set
+   *
+   * @param cx pointer to JSContext
+   * @param proxy The proxy object who's property we wish to set
+   * @param id Key of the property we wish to set
+   * @param v Value that we wish to set the property to
+   * @param receiver The `this` value to use when executing any code
+   * @param result whether or not the call succeeded
+   * @return true call succeed
+   * @return false call failed and an exception has been raised
+   */
+  bool set(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+    JS::HandleValue v, JS::HandleValue receiver,
+    JS::ObjectOpResult &result) const override;
+  /**
+   * @brief Returns true if `id` is "size", false otherwise
+   *
+   * @param cx pointer to JSContext
+   * @param proxy The proxy object who's property we wish to check
+   * @param id  Key of the property we wish to check
+   * @param bp out-paramter: true if object has property, false if not
+   * @return true call succeeded
+   * @return false call failed and an exception has been raised
+   */
+  bool hasOwn(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+    bool *bp) const override;
+
+  bool getOwnPropertyDescriptor(
+    JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+    JS::MutableHandle<mozilla::Maybe<JS::PropertyDescriptor>> desc
+  ) const override;
+};
+
+#endif
@@ -0,0 +1,33 @@
+/**
+ * @file SetType.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Sets in python
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_SetType_
+#define PythonMonkey_SetType_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief This struct represents a JS Set in python
+ */
+struct SetType {
+public:
+  /**
+   * @brief Make a JSSetProxy for a JS Set, without copying its entries
+   *
+   * @param cx - javascript context pointer
+   * @param setObj - the JS Set
+   * @return PyObject* - the new JSSetProxy, or NULL if an exception has been raised
+   */
+  static PyObject *getPyObject(JSContext *cx, JS::HandleObject setObj);
+};
+
+#endif
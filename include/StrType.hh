@@ -36,7 +36,26 @@ public:
    */
   static PyObject *getPyObject(JSContext *cx, JSString *str);
 
-  static const char *getValue(JSContext *cx, JSString *str);
+  /**
+   * @brief Encode a JSString as UTF-8, without going through a python object
+   *
+   * @param cx - javascript context pointer
+   * @param str - JSString pointer
+   *
+   * @returns JS::UniqueChars owning the null-terminated UTF-8 string, or nullptr if an exception has been raised on the JS side
+   */
+  static JS::UniqueChars getValue(JSContext *cx, JSString *str);
+
+  /**
+   * @brief Construct a new, independent python str holding a copy of the characters of a JSString,
+   * rather than a JSStringProxy sharing the JSString's buffer. Surrogate pairs are joined into UCS4 code points
+   *
+   * @param cx - javascript context pointer
+   * @param str - JSString pointer
+   *
+   * @returns PyObject* pointer to the resulting PyObject, or NULL if an exception has been raised
+   */
+  static PyObject *getPyObjectCopy(JSContext *cx, JSString *str);
 };
 
 #endif
\ No newline at end of file
@@ -0,0 +1,43 @@
+/**
+ * @file SymbolType.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Symbols in python
+ * @date 2024-06-04
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_SymbolType_
+#define PythonMonkey_SymbolType_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief This struct represents a JS Symbol in python
+ */
+struct SymbolType {
+public:
+  /**
+   * @brief Get the pythonmonkey.JSSymbol for a JS Symbol.
+   * The same JSSymbol is returned for as long as it is alive, so that `is` and dict lookups behave like `===` in JS,
+   * including for registry symbols (Symbol.for) and well-known symbols (Symbol.iterator)
+   *
+   * @param cx - javascript context pointer
+   * @param symbol - the JS Symbol
+   * @return PyObject* - new reference to the JSSymbol, or NULL if an exception has been raised
+   */
+  static PyObject *getPyObject(JSContext *cx, JS::HandleSymbol symbol);
+
+  /**
+   * @brief Remove the JSSymbol of a JS Symbol from the cache, called when the JSSymbol is deallocated
+   *
+   * @param cx - javascript context pointer
+   * @param symbol - the JS Symbol
+   */
+  static void forgetPyObject(JSContext *cx, JS::HandleSymbol symbol);
+};
+
+#endif
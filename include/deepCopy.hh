@@ -0,0 +1,47 @@
+/**
+ * @file deepCopy.hh
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Functions for eagerly converting whole object graphs between JS and Python, instead of proxying them lazily
+ * @date 2024-05-21
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#ifndef PythonMonkey_DeepCopy_
+#define PythonMonkey_DeepCopy_
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+/**
+ * @brief Function that takes a JS::Value and returns a corresponding PyObject* made only of native python objects.
+ * Plain objects become dicts, arrays become lists and strings become str, recursively, in a single pass over the JS object graph.
+ * Any other value is converted as pyTypeFactory would.
+ *
+ * @param cx - Pointer to the javascript context of the JS::Value
+ * @param rval - The JS::Value to copy
+ * @param maxDepth - Objects nested deeper than maxDepth are left as lazy proxies. Negative for no limit
+ * @param preserveCycles - if true, objects reachable more than once (including through a cycle) are copied once and shared,
+ *    if false, a ValueError is raised when a cycle is found
+ * @return PyObject* - new reference to the copy, or NULL if an exception has been raised
+ */
+PyObject *pyDeepCopy(JSContext *cx, JS::HandleValue rval, int maxDepth, bool preserveCycles);
+
+/**
+ * @brief Function that takes a PyObject and returns a corresponding JS::Value made only of plain JS objects.
+ * dicts become plain objects and lists and tuples become dense arrays, recursively, in a single pass over the python object graph,
+ * so that JS code iterating over them never goes through a proxy trap. Any other object is converted as jsTypeFactory would, except for None with `noneToNull`.
+ *
+ * @param cx - Pointer to the JSContext
+ * @param object - The PyObject to copy
+ * @param maxDepth - Objects nested deeper than maxDepth are left as lazy proxies. Negative for no limit
+ * @param preserveCycles - if true, objects reachable more than once (including through a cycle) are copied once and shared,
+ *    if false, a ValueError is raised when a cycle is found
+ * @param noneToNull - if true, None becomes null as in the python json module, instead of undefined
+ * @return JS::Value - the copy, or undefined if an exception has been raised on the Python error stack
+ */
+JS::Value jsDeepCopy(JSContext *cx, PyObject *object, int maxDepth, bool preserveCycles, bool noneToNull);
+
+#endif
@@ -18,12 +18,21 @@
 
 struct PythonExternalString;
 
+/**
+ * @brief Function that computes the length of the UTF16 encoding of a UCS4 string
+ *
+ * @param chars - pointer to the UCS4-encoded string
+ * @param length - length of chars in code points
+ * @return size_t - length of the UTF16 encoding (counting surrogate pairs as 2)
+ */
+size_t UCS4ToUTF16Length(const uint32_t *chars, size_t length);
+
 /**
  * @brief Function that makes a UTF16-encoded copy of a UCS4 string
  *
  * @param chars - pointer to the UCS4-encoded string
  * @param length - length of chars in code points
- * @param outStr - UTF16-encoded out-parameter string
+ * @param outStr - UTF16-encoded out-parameter string, with room for at least UCS4ToUTF16Length(chars, length) code units
  * @return size_t - length of outStr (counting surrogate pairs as 2)
  */
 size_t UCS4ToUTF16(const uint32_t *chars, size_t length, uint16_t *outStr);
@@ -42,6 +51,13 @@ JS::Value jsTypeFactory(JSContext *cx, PyObject *object);
  */
 JS::Value jsTypeFactorySafe(JSContext *cx, PyObject *object);
 
+/**
+ * @brief Convert the python exception currently set into a JS exception pending on `cx`, clearing the python error
+ *
+ * @param cx - Pointer to the JSContext
+ */
+void setPyException(JSContext *cx);
+
 /**
  * @brief Helper function for jsTypeFactory to create a JSFunction* through JS_NewFunction that knows how to call a python function.
  *
@@ -23,7 +23,7 @@ extern JSContext *GLOBAL_CX; /**< pointer to PythonMonkey's JSContext */
 extern JS::PersistentRootedObject jsFunctionRegistry; /**<// this is a FinalizationRegistry for JSFunctions that depend on Python functions. It is used to handle reference counts when the JSFunction is finalized */
 static JS::Rooted<JSObject *> *global; /**< pointer to the global object of PythonMonkey's JSContext */
 static JSAutoRealm *autoRealm; /**< pointer to PythonMonkey's AutoRealm */
-static JobQueue *JOB_QUEUE; /**< pointer to PythonMonkey's event-loop job queue */
+extern JobQueue *JOB_QUEUE; /**< pointer to PythonMonkey's event-loop job queue */
 
 // Get handle on global object
 PyObject *getPythonMonkeyNull();
@@ -53,6 +53,64 @@ static PyObject *collect(PyObject *self, PyObject *args);
  */
 static PyObject *eval(PyObject *self, PyObject *args);
 
+/**
+ * @brief Function exposed by the python module for eagerly copying a JS-backed value into native python objects
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain the value to copy as the first element)
+ * @param kwargs - Pointer to the python dict of keyword arguments (`max_depth` and `cycles`)
+ * @return PyObject* - The copy, made of python dicts, lists, strs and other native types
+ */
+static PyObject *toPython(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/**
+ * @brief Function exposed by the python module for eagerly copying python dicts, lists and tuples into plain JS objects and arrays
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain the value to copy as the first element)
+ * @param kwargs - Pointer to the python dict of keyword arguments (`max_depth` and `cycles`)
+ * @return PyObject* - A JSObjectProxy or JSArrayProxy for the copy
+ */
+static PyObject *toJs(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/**
+ * @brief Function exposed by the python module for parsing JSON text with SpiderMonkey's JSON parser straight into native python objects
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain the JSON text as str or UTF-8 bytes-like object as the first element)
+ * @return PyObject* - The parsed value, made of python dicts, lists, strs and other native types
+ */
+static PyObject *jsonParseToPython(PyObject *self, PyObject *args);
+
+/**
+ * @brief Function exposed by the python module for serializing a python value to JSON text with SpiderMonkey's JSON.stringify
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain the value to serialize as the first element)
+ * @param kwargs - Pointer to the python dict of keyword arguments (`indent`, used as the `space` argument of JSON.stringify)
+ * @return PyObject* - The JSON text as a str, or None if the value is not representable in JSON
+ */
+static PyObject *stringifyPython(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/**
+ * @brief Function exposed by the python module for serializing a JS value graph to bytes with the structured clone algorithm
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain the value to serialize as the first element)
+ * @param kwargs - Pointer to the python dict of keyword arguments (`transfer`, a JS array of ArrayBuffers whose contents are moved rather than copied)
+ * @return PyObject* - The serialized value as bytes
+ */
+static PyObject *serialize(PyObject *self, PyObject *args, PyObject *kwargs);
+
+/**
+ * @brief Function exposed by the python module for restoring a JS value graph from bytes made by pythonmonkey.serialize
+ *
+ * @param self - Pointer to the module object
+ * @param args - Pointer to the python tuple of arguments (expected to contain a bytes-like object as the first element)
+ * @return PyObject* - The restored value, coerced to a Python type
+ */
+static PyObject *deserialize(PyObject *self, PyObject *args);
+
 /**
  * @brief Initialization function for the module. Starts the JSContext, creates the global object, and sets cleanup functions
  *
@@ -8,6 +8,12 @@ import importlib.metadata
 __version__ = importlib.metadata.version(__name__)
 del importlib
 
+# JS Map and Set proxies implement the mutable mapping and set protocols
+import collections.abc
+collections.abc.MutableMapping.register(JSMapProxy)
+collections.abc.MutableSet.register(JSSetProxy)
+del collections
+
 # Load the module by default to expose global APIs
 # builtin_modules
 require("console")
@@ -45,11 +45,39 @@ declare function internalBinding(namespace: "timers"): {
    */
   enqueueWithDelay(handler: Function, delaySeconds: number, repeat: boolean, debugInfo?: TimerDebugInfo): number;
 
+  /**
+   * internal binding helper for the `setImmediate` global function,
+   * the handler runs in a single batch with the other immediate handlers on the next event-loop iteration
+   * 
+   * **UNSAFE**, does not perform argument type checks
+   * 
+   * @return timeoutId
+   */
+  enqueueImmediate(handler: Function, debugInfo?: TimerDebugInfo): number;
+
+  /**
+   * internal binding helper for the `queueMicrotask` global function, the callback goes to the Promise job queue
+   * 
+   * **UNSAFE**, does not perform argument type checks
+   */
+  enqueueMicrotask(callback: Function): void;
+
   /**
    * internal binding helper for the `clearTimeout` global function
    */
   cancelByTimeoutId(timeoutId: number): void;
 
+  /**
+   * internal binding helper for when a `Timeout` object is garbage-collected,
+   * the timeoutId is recycled once the timer is finished or cancelled
+   */
+  releaseTimer(timeoutId: number): void;
+
+  /**
+   * internal binding helper for restarting the timer from now with its original delay, reactivating it if it has already run
+   */
+  timerRefresh(timeoutId: number): void;
+
   /**
    * internal binding helper for if a timer object has been ref'ed
    */
@@ -67,11 +95,22 @@ declare function internalBinding(namespace: "timers"): {
 
   /**
    * Retrieve debug info inside the timer for the WTFPythonMonkey tool
+   * @return `undefined` if no debug info was captured for the timer
+   */
+  getDebugInfo(timeoutId: number): TimerDebugInfo | undefined;
+
+  /**
+   * If timers capture debug info for the WTFPythonMonkey tool, off by default
+   */
+  isDebugInfoEnabled(): boolean;
+
+  /**
+   * Turn debug info capture on or off for the timers created from now on
    */
-  getDebugInfo(timeoutId: number): TimerDebugInfo;
+  setDebugInfoEnabled(enabled: boolean): void;
 
   /**
-   * Retrieve the debug info for all timers that are still ref'ed
+   * Retrieve the debug info for all timers that are still ref'ed and have debug info captured
    */
   getAllRefedTimersDebugInfo(): TimerDebugInfo[];
 };
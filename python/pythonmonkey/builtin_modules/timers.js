@@ -9,13 +9,22 @@ const internalBinding = require('internal-binding');
 
 const { 
   enqueueWithDelay,
+  enqueueImmediate,
+  enqueueMicrotask,
   cancelByTimeoutId,
+  releaseTimer,
+  timerRefresh,
   timerHasRef,
   timerAddRef,
   timerRemoveRef,
+  isDebugInfoEnabled,
 } = internalBinding('timers');
 
-const { DOMException } = require('dom-exception');
+/**
+ * Free the native timer handle once its `Timeout` object is garbage-collected,
+ * so that its `timeoutId` can be reused when the timer is finished or cancelled
+ */
+const timeoutRegistry = new FinalizationRegistry(releaseTimer);
 
 /**
  * Implement Node.js-style `timeoutId` class returned from setTimeout() and setInterval()
@@ -32,6 +41,7 @@ class Timeout
   constructor(numericId)
   {
     this.#numericId = numericId;
+    timeoutRegistry.register(this, numericId);
   }
 
   /**
@@ -72,9 +82,8 @@ class Timeout
    */
   refresh()
   {
-    throw new DOMException('Timeout.refresh() method is not supported by PythonMonkey.', 'NotSupportedError');
-    // TODO: Do we really need to closely resemble the Node.js API?
-    // This one is not easy to implement since we need to memorize the callback function and delay parameters in every `setTimeout`/`setInterval` call.
+    timerRefresh(this.#numericId);
+    return this; // allow chaining
   }
 
   /**
@@ -123,17 +132,21 @@ function _normalizeTimerArgs(handler, delayMs, additionalArgs)
     delayMs = 0; // as spec-ed
   const delaySeconds = delayMs / 1000; // convert ms to s
 
-  // Populate debug information for the WTFPythonMonkey tool
-  const stacks = new Error().stack.split('\n');
-  const timerType = stacks[1]?.match(/^set(Timeout|Immediate|Interval)/)?.[0]; // `setTimeout@...`/`setImmediate@...`/`setInterval@...` is on the second line of stack trace
-  const debugInfo = {
-    type: timerType, // "setTimeout", "setImmediate", or "setInterval"
-    fn: handler,
-    args: additionalArgs,
-    startTime: new Date(),
-    delaySeconds,
-    stack: stacks.slice(2).join('\n'), // remove the first line `_normalizeTimerArgs@...` and the second line `setTimeout/setImmediate/setInterval@...`
-  };
+  // Populate debug information for the WTFPythonMonkey tool, only when enabled as capturing the stack is expensive
+  let debugInfo;
+  if (isDebugInfoEnabled())
+  {
+    const stacks = new Error().stack.split('\n');
+    const timerType = stacks[1]?.match(/^set(Timeout|Immediate|Interval)/)?.[0]; // `setTimeout@...`/`setImmediate@...`/`setInterval@...` is on the second line of stack trace
+    debugInfo = {
+      type: timerType, // "setTimeout", "setImmediate", or "setInterval"
+      fn: handler,
+      args: additionalArgs,
+      startTime: new Date(),
+      delaySeconds,
+      stack: stacks.slice(2).join('\n'), // remove the first line `_normalizeTimerArgs@...` and the second line `setTimeout/setImmediate/setInterval@...`
+    };
+  }
 
   return { boundHandler, delaySeconds, debugInfo };
 }
@@ -179,9 +192,9 @@ function clearTimeout(timeoutId)
  */
 function setImmediate(handler, ...args)
 {
-  // setImmediate is equal to setTimeout with a 0ms delay
+  // Immediates run in a single batch on the next event-loop iteration, the ones they schedule run on the iteration after
   const { boundHandler, debugInfo } = _normalizeTimerArgs(handler, 0, args);
-  return new Timeout(enqueueWithDelay(boundHandler, 0, false, debugInfo));
+  return new Timeout(enqueueImmediate(boundHandler, debugInfo));
 }
 
 /**
@@ -192,6 +205,22 @@ function setImmediate(handler, ...args)
  */
 const clearImmediate = clearTimeout;
 
+/**
+ * Implement the `queueMicrotask` global function
+ * @see https://developer.mozilla.org/en-US/docs/Web/API/queueMicrotask and
+ * @see https://html.spec.whatwg.org/multipage/timers-and-user-prompts.html#dom-queuemicrotask
+ * @param {Function} callback
+ * @return {void}
+ */
+function queueMicrotask(callback)
+{
+  if (typeof callback !== 'function')
+    throw new TypeError('The "callback" argument must be of type function');
+
+  // the callback goes to the Promise job queue, and runs with no arguments and `this` being undefined, as spec-ed
+  enqueueMicrotask(callback);
+}
+
 /**
  * Implement the `setInterval` global function
  * @see https://developer.mozilla.org/en-US/docs/Web/API/setInterval and
@@ -229,6 +258,9 @@ if (!globalThis.setImmediate)
 if (!globalThis.clearImmediate)
   globalThis.clearImmediate = clearImmediate;
 
+if (!globalThis.queueMicrotask)
+  globalThis.queueMicrotask = queueMicrotask;
+
 if (!globalThis.setInterval)
   globalThis.setInterval = setInterval;
 if (!globalThis.clearInterval)
@@ -238,5 +270,6 @@ exports.setTimeout = setTimeout;
 exports.clearTimeout = clearTimeout;
 exports.setImmediate = setImmediate;
 exports.clearImmediate = clearImmediate;
+exports.queueMicrotask = queueMicrotask;
 exports.setInterval = setInterval;
 exports.clearInterval = clearInterval;
@@ -301,7 +301,8 @@ Options:
 Environment variables:
 TZ                            specify the timezone configuration
 PMJS_PATH                     ':'-separated list of directories prefixed to the module search path
-PMJS_REPL_HISTORY             path to the persistent REPL history file"""
+PMJS_REPL_HISTORY             path to the persistent REPL history file
+PMJS_WTF                      capture timer debug info for WTFPythonMonkey, as --wtf does"""
         )
 
 
@@ -373,6 +374,7 @@ def main():
       pmdb.enable()
     elif o in ("--wtf"):
       enableWTF = True
+      wtfpm.enable()
     else:
       assert False, "unhandled option"
 
@@ -59,6 +59,10 @@ declare var clearTimeout: typeof import("timers").clearTimeout;
 // Expose `setInterval`/`clearInterval` APIs
 declare var setInterval: typeof import("timers").setInterval;
 declare var clearInterval: typeof import("timers").clearInterval;
+// Expose `setImmediate`/`clearImmediate`/`queueMicrotask` APIs
+declare var setImmediate: typeof import("timers").setImmediate;
+declare var clearImmediate: typeof import("timers").clearImmediate;
+declare var queueMicrotask: typeof import("timers").queueMicrotask;
 
 // Expose `URL`/`URLSearchParams` APIs
 declare var URL: typeof import("url").URL;
@@ -6,6 +6,17 @@
 import pythonmonkey as pm
 
 
+def enable():
+  """
+  Capture debug info for the timers created from now on. It is off by default as capturing
+  the stack of every timer is expensive, unless the `PMJS_WTF` environment variable is set.
+  """
+  pm.eval("""(require) => {
+    const internalBinding = require('internal-binding');
+    internalBinding('timers').setDebugInfoEnabled(true);
+  }""")(pm.createRequire(__file__))
+
+
 def printTimersDebugInfo():
   pm.eval("""(require) => {
     const internalBinding = require('internal-binding');
@@ -30,7 +41,7 @@ class WTF:
   """
 
   def __enter__(self):
-    pass
+    enable()
 
   def __exit__(self, errType, errValue, traceback):
     if errType is None:  # no exception
@@ -15,6 +15,7 @@ class EvalOptions(_typing.TypedDict, total=False):
   strict: bool
   module: bool
   fromPythonFrame: bool
+  copy: bool
 
 # pylint: disable=redefined-builtin
 
@@ -49,6 +50,88 @@ def collect() -> None:
   """
 
 
+def to_python(value: _typing.Any, max_depth: _typing.Optional[int] = None, cycles: _typing.Literal["preserve", "error"] = "preserve") -> _typing.Any:
+  """
+  Eagerly copy a JavaScript value into native Python objects in a single pass.
+  Objects become dicts, arrays become lists and strings become str, recursively,
+  so that reading the result never crosses back into the JS engine.
+
+  Objects nested deeper than `max_depth` are left as lazy proxies.
+  With `cycles="preserve"`, shared and cyclic references are kept as shared Python objects;
+  with `cycles="error"`, a ValueError is raised on cycles.
+
+  `pm.eval(code, {'copy': True})` returns the result of the evaluation copied this way.
+  """
+
+
+def to_js(value: _typing.Any, max_depth: _typing.Optional[int] = None, cycles: _typing.Literal["preserve", "error"] = "preserve") -> _typing.Any:
+  """
+  Eagerly copy Python dicts, lists and tuples into plain JavaScript objects and arrays in a single pass,
+  so that JavaScript code reading them runs at native speed rather than through proxy traps.
+  The copy is returned as a JSObjectProxy or JSArrayProxy, and passing it back into JavaScript hands over the plain object.
+
+  Objects nested deeper than `max_depth` are left as lazy proxies.
+  With `cycles="preserve"`, shared and cyclic references are kept as shared JavaScript objects;
+  with `cycles="error"`, a ValueError is raised on cycles.
+  """
+
+
+def json_parse_to_python(text: _typing.Union[str, bytes, bytearray, memoryview]) -> _typing.Any:
+  """
+  Parse JSON text (a str, or UTF-8 encoded bytes) with SpiderMonkey's JSON parser directly into native Python objects,
+  without creating any intermediate proxies. Like every JavaScript number, JSON numbers become Python floats.
+  """
+
+
+def stringify_python(value: _typing.Any, indent: _typing.Union[int, str, None] = None) -> _typing.Optional[str]:
+  """
+  Serialize a Python value to JSON text with SpiderMonkey's JSON.stringify, without going through proxies.
+  None becomes null, as with `json.dumps`.
+  Returns None if the value is not representable in JSON, such as a function, as JSON.stringify returns undefined.
+  """
+
+
+def serialize(value: _typing.Any, transfer: _typing.Any = None) -> bytes:
+  """
+  Serialize a JavaScript value graph to bytes with the structured clone algorithm,
+  so that it can be cached or sent to another process and restored with `deserialize`.
+
+  `transfer` is a JavaScript array of ArrayBuffers (e.g. `pm.eval("[buffer]")`) whose contents
+  are moved into the serialized data rather than copied; those ArrayBuffers are detached afterwards.
+  """
+
+
+def deserialize(data: _typing.Union[bytes, bytearray, memoryview]) -> _typing.Any:
+  """
+  Restore a JavaScript value graph from bytes produced by `serialize`
+  """
+
+
+class JSMapProxy(_typing.MutableMapping[_typing.Any, _typing.Any]):
+  """
+  JavaScript Map proxy, lookups go straight to the underlying Map without copying it
+  """
+
+
+class JSSetProxy(_typing.MutableSet[_typing.Any]):
+  """
+  JavaScript Set proxy, lookups go straight to the underlying Set without copying it
+  """
+
+
+class JSSymbol():
+  """
+  JavaScript Symbol proxy, the same JSSymbol object is returned for the same JS Symbol,
+  so it can be used as a key to access symbol-keyed properties, e.g. `obj[pm.eval("Symbol.iterator")]`
+  """
+
+  @property
+  def description(self) -> _typing.Optional[str]:
+    """
+    The description of the Symbol, or None
+    """
+
+
 class JSFunctionProxy():
   """
   JavaScript Function proxy
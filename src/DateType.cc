@@ -10,47 +10,132 @@
 
 #include "include/DateType.hh"
 
+#include "include/setSpiderMonkeyException.hh"
+
 #include <jsapi.h>
 #include <js/Date.h>
 
 #include <datetime.h>
 
+#include <cmath>
+
+#define MS_PER_SECOND 1000
+#define MS_PER_MINUTE (60 * MS_PER_SECOND)
+#define MS_PER_HOUR (60 * MS_PER_MINUTE)
+#define MS_PER_DAY (24 * MS_PER_HOUR)
+
+/**
+ * @brief Convert a number of days since 1970-01-01 to a proleptic Gregorian calendar date
+ *    see https://howardhinnant.github.io/date_algorithms.html#civil_from_days
+ */
+static void civilFromDays(int64_t days, int64_t *year, int *month, int *day) {
+  days += 719468; // shift the epoch from 1970-01-01 to 0000-03-01
+  const int64_t era = (days >= 0 ? days : days - 146096) / 146097;
+  const int64_t dayOfEra = days - era * 146097;                                                  // [0, 146096]
+  const int64_t yearOfEra = (dayOfEra - dayOfEra / 1460 + dayOfEra / 36524 - dayOfEra / 146096) / 365; // [0, 399]
+  const int64_t dayOfYear = dayOfEra - (365 * yearOfEra + yearOfEra / 4 - yearOfEra / 100);       // [0, 365]
+  const int64_t monthFromMarch = (5 * dayOfYear + 2) / 153;                                       // [0, 11]
+  *day = dayOfYear - (153 * monthFromMarch + 2) / 5 + 1;                                         // [1, 31]
+  *month = monthFromMarch < 10 ? monthFromMarch + 3 : monthFromMarch - 9;                        // [1, 12]
+  *year = yearOfEra + era * 400 + (*month <= 2);
+}
+
+/**
+ * @brief Convert a proleptic Gregorian calendar date to a number of days since 1970-01-01
+ *    see https://howardhinnant.github.io/date_algorithms.html#days_from_civil
+ */
+static int64_t daysFromCivil(int64_t year, int month, int day) {
+  year -= month <= 2;
+  const int64_t era = (year >= 0 ? year : year - 399) / 400;
+  const int64_t yearOfEra = year - era * 400;                                          // [0, 399]
+  const int64_t dayOfYear = (153 * (month > 2 ? month - 3 : month + 9) + 2) / 5 + day - 1; // [0, 365]
+  const int64_t dayOfEra = yearOfEra * 365 + yearOfEra / 4 - yearOfEra / 100 + dayOfYear; // [0, 146096]
+  return era * 146097 + dayOfEra - 719468;
+}
+
 PyObject *DateType::getPyObject(JSContext *cx, JS::HandleObject dateObj) {
-  if (!PyDateTimeAPI) { PyDateTime_IMPORT; } // for PyDateTime_FromTimestamp
-
-  JS::Rooted<JS::ValueArray<0>> args(cx);
-  JS::Rooted<JS::Value> year(cx);
-  JS::Rooted<JS::Value> month(cx);
-  JS::Rooted<JS::Value> day(cx);
-  JS::Rooted<JS::Value> hour(cx);
-  JS::Rooted<JS::Value> minute(cx);
-  JS::Rooted<JS::Value> second(cx);
-  JS::Rooted<JS::Value> usecond(cx);
-  JS_CallFunctionName(cx, dateObj, "getUTCFullYear", args, &year);
-  JS_CallFunctionName(cx, dateObj, "getUTCMonth", args, &month);
-  JS_CallFunctionName(cx, dateObj, "getUTCDate", args, &day);
-  JS_CallFunctionName(cx, dateObj, "getUTCHours", args, &hour);
-  JS_CallFunctionName(cx, dateObj, "getUTCMinutes", args, &minute);
-  JS_CallFunctionName(cx, dateObj, "getUTCSeconds", args, &second);
-  JS_CallFunctionName(cx, dateObj, "getUTCMilliseconds", args, &usecond);
-
-  PyObject *pyObject = PyDateTimeAPI->DateTime_FromDateAndTime(
-    year.toNumber(), month.toNumber() + 1, day.toNumber(),
-    hour.toNumber(), minute.toNumber(), second.toNumber(),
-    usecond.toNumber() * 1000,
+  if (!PyDateTimeAPI) { PyDateTime_IMPORT; } // for DateTime_FromDateAndTime
+
+  double msecSinceEpoch;
+  if (!JS::DateGetMsecSinceEpoch(cx, dateObj, &msecSinceEpoch)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+  if (std::isnan(msecSinceEpoch)) {
+    PyErr_SetString(PyExc_ValueError, "cannot convert an Invalid Date to a python datetime");
+    return NULL;
+  }
+
+  // the time value is integral and within +-8.64e15 ms, see https://tc39.es/ecma262/#sec-time-values-and-time-range
+  int64_t msec = (int64_t)msecSinceEpoch;
+  int64_t days = msec / MS_PER_DAY;
+  int64_t msecInDay = msec % MS_PER_DAY;
+  if (msecInDay < 0) {
+    days -= 1;
+    msecInDay += MS_PER_DAY;
+  }
+
+  int64_t year;
+  int month, day;
+  civilFromDays(days, &year, &month, &day);
+
+  // raises a ValueError if the year is out of python's [1, 9999] range
+  return PyDateTimeAPI->DateTime_FromDateAndTime(
+    year, month, day,
+    msecInDay / MS_PER_HOUR, (msecInDay % MS_PER_HOUR) / MS_PER_MINUTE, (msecInDay % MS_PER_MINUTE) / MS_PER_SECOND,
+    (msecInDay % MS_PER_SECOND) * 1000,
     PyDateTime_TimeZone_UTC, // Make the resulting Python datetime object timezone-aware
                              // See https://docs.python.org/3/library/datetime.html#aware-and-naive-objects
     PyDateTimeAPI->DateTimeType
   );
-  Py_INCREF(PyDateTime_TimeZone_UTC);
-
-  return pyObject;
 }
 
 JSObject *DateType::toJsDate(JSContext *cx, PyObject *pyObject) {
-  // See https://docs.python.org/3/library/datetime.html#datetime.datetime.timestamp
-  PyObject *timestamp = PyObject_CallMethod(pyObject, "timestamp", NULL); // the result is in seconds
-  double milliseconds = PyFloat_AsDouble(timestamp) * 1000;
-  Py_DECREF(timestamp);
+  if (!PyDateTimeAPI) { PyDateTime_IMPORT; }
+
+  PyObject *tzinfo = PyObject_GetAttrString(pyObject, "tzinfo"); // PyDateTime_DATE_GET_TZINFO needs python 3.10
+  if (!tzinfo) {
+    return nullptr;
+  }
+
+  double milliseconds;
+  if (tzinfo == Py_None) {
+    // naive datetimes are in local time, let python resolve the UTC offset including DST folds
+    // See https://docs.python.org/3/library/datetime.html#datetime.datetime.timestamp
+    Py_DECREF(tzinfo);
+    PyObject *timestamp = PyObject_CallMethod(pyObject, "timestamp", NULL); // the result is in seconds
+    if (!timestamp) {
+      return nullptr;
+    }
+    milliseconds = PyFloat_AsDouble(timestamp) * 1000;
+    Py_DECREF(timestamp);
+  }
+  else {
+    // aware datetimes: compute the time value straight from the fields, only asking python for the UTC offset when not in UTC already
+    int64_t offsetMsec = 0;
+    if (tzinfo != PyDateTime_TimeZone_UTC) {
+      PyObject *offset = PyObject_CallMethod(pyObject, "utcoffset", NULL);
+      if (!offset) {
+        Py_DECREF(tzinfo);
+        return nullptr;
+      }
+      if (PyDelta_Check(offset)) {
+        offsetMsec = (int64_t)PyDateTime_DELTA_GET_DAYS(offset) * MS_PER_DAY +
+                     (int64_t)PyDateTime_DELTA_GET_SECONDS(offset) * MS_PER_SECOND +
+                     PyDateTime_DELTA_GET_MICROSECONDS(offset) / 1000;
+      }
+      Py_DECREF(offset);
+    }
+    Py_DECREF(tzinfo);
+
+    int64_t days = daysFromCivil(PyDateTime_GET_YEAR(pyObject), PyDateTime_GET_MONTH(pyObject), PyDateTime_GET_DAY(pyObject));
+    milliseconds = (double)(days * MS_PER_DAY +
+                            (int64_t)PyDateTime_DATE_GET_HOUR(pyObject) * MS_PER_HOUR +
+                            (int64_t)PyDateTime_DATE_GET_MINUTE(pyObject) * MS_PER_MINUTE +
+                            (int64_t)PyDateTime_DATE_GET_SECOND(pyObject) * MS_PER_SECOND +
+                            PyDateTime_DATE_GET_MICROSECOND(pyObject) / 1000 -
+                            offsetMsec);
+  }
+
   return JS::NewDateObject(cx, JS::TimeClip(milliseconds));
-}
\ No newline at end of file
+}
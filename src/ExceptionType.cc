@@ -96,7 +96,7 @@ JSObject *ExceptionType::toJsError(JSContext *cx, PyObject *exceptionValue, PyOb
   if (stackObj.get()) {
     JS::RootedString stackStr(cx);
     JS::BuildStackString(cx, nullptr, stackObj, &stackStr, 2, js::StackFormat::SpiderMonkey);
-    stackStream << "\nJS Stack Trace:\n" << StrType::getValue(cx, stackStr);
+    stackStream << "\nJS Stack Trace:\n" << StrType::getValue(cx, stackStr).get();
   }
 
 
@@ -16,6 +16,10 @@
 
 #include <vector>
 
+#if PY_VERSION_HEX < 0x030b0000 // Python version is less than 3.11
+  #include <longintrepr.h> // for the digit type, included by Python.h since 3.11
+#endif
+
 #define SIGN_BIT_MASK 0b1000 // https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/BigIntType.h#l40
 #define CELL_HEADER_LENGTH 8 // https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/gc/Cell.h#l602
 
@@ -68,6 +72,79 @@ static inline bool PythonLong_IsNegative(const PyLongObject *op) {
 #endif
 }
 
+/**
+ * @brief Get the digit storage of a Python int
+ */
+static inline digit *PythonLong_Digits(PyLongObject *op) {
+#ifdef _PyLong_SIGN_MASK // Python 3.12+
+  return op->long_value.ob_digit;
+#else
+  return op->ob_digit;
+#endif
+}
+
+/**
+ * @brief Set both the sign and the number of digits of a freshly allocated Python int
+ * @param op - the Python int object
+ * @param sign - -1 (negative), 0 (zero), or 1 (positive)
+ * @param digitCount - the number of digits in use
+ */
+static inline void PythonLong_SetSignAndDigitCount(PyLongObject *op, int sign, Py_ssize_t digitCount) {
+#ifdef _PyLong_SIGN_MASK // Python 3.12+
+  // see https://github.com/python/cpython/blob/v3.12.0/Include/internal/pycore_long.h#L246-L253
+  op->long_value.lv_tag = ((uintptr_t)digitCount << _PyLong_NON_SIZE_BITS) | ((1-sign) & _PyLong_SIGN_MASK);
+#elif PY_VERSION_HEX >= 0x03090000
+  Py_SET_SIZE(op, sign * digitCount);
+#else
+  ((PyVarObject *)op)->ob_size = sign * digitCount; // Py_SET_SIZE is not available in Python < 3.9
+#endif
+}
+
+/**
+ * @brief Build a pythonmonkey.bigint directly from little-endian JS BigInt digits,
+ * regrouping their bits into Python digits instead of going through a byte array and a call to the pythonmonkey.bigint constructor
+ * @see long_subtype_new in https://github.com/python/cpython/blob/v3.12.0/Objects/longobject.c
+ */
+static PyObject *newBigIntFromDigits(const js_digit_t *jsDigits, uint32_t jsDigitCount, bool isNegative) {
+  PyTypeObject *bigintType = (PyTypeObject *)getPythonMonkeyBigInt();
+  Py_ssize_t maxPyDigitCount = ((Py_ssize_t)jsDigitCount * JS_DIGIT_BIT + PY_DIGIT_BIT - 1) / PY_DIGIT_BIT;
+  PyLongObject *op = (PyLongObject *)bigintType->tp_alloc(bigintType, maxPyDigitCount > 0 ? maxPyDigitCount : 1);
+  if (!op) {
+    return NULL;
+  }
+
+  digit *pyDigits = PythonLong_Digits(op);
+  Py_ssize_t pyDigitCount = 0;
+  js_digit_t carry = 0; // the bits of the current JS digit not yet stored, at most PY_DIGIT_BIT - 1 of them
+  int carryBits = 0;
+  for (uint32_t i = 0; i < jsDigitCount; i++) {
+    js_digit_t jsDigit = jsDigits[i];
+    int jsDigitBits = JS_DIGIT_BIT;
+    // complete the Python digit started with the previous JS digit
+    int fillBits = PY_DIGIT_BIT - carryBits;
+    pyDigits[pyDigitCount++] = (digit)((carry | (jsDigit << carryBits)) & PyLong_MASK);
+    jsDigit >>= fillBits;
+    jsDigitBits -= fillBits;
+    // then store whole Python digits
+    while (jsDigitBits >= PY_DIGIT_BIT) {
+      pyDigits[pyDigitCount++] = (digit)(jsDigit & PyLong_MASK);
+      jsDigit >>= PY_DIGIT_BIT;
+      jsDigitBits -= PY_DIGIT_BIT;
+    }
+    carry = jsDigit;
+    carryBits = jsDigitBits;
+  }
+  if (carryBits > 0) {
+    pyDigits[pyDigitCount++] = (digit)carry;
+  }
+
+  // normalize, Python ints have no leading zero digits
+  while (pyDigitCount > 0 && pyDigits[pyDigitCount - 1] == 0) {
+    pyDigitCount--;
+  }
+  PythonLong_SetSignAndDigitCount(op, pyDigitCount == 0 ? 0 : (isNegative ? -1 : 1), pyDigitCount);
+  return (PyObject *)op;
+}
 
 PyObject *IntType::getPyObject(JSContext *cx, JS::BigInt *bigint) {
   // Get the sign bit
@@ -94,30 +171,22 @@ PyObject *IntType::getPyObject(JSContext *cx, JS::BigInt *bigint) {
   // @TODO (Tom Tang): use C++23 std::byteswap?
   #endif
 
-  // If the native endianness is also little-endian,
-  // we now have consecutive bytes of 8-bit "digits" in little-endian order
-  const uint8_t *bytes = const_cast<const uint8_t *>((uint8_t *)jsDigits);
-  PyObject *pyIntObj = _PyLong_FromByteArray(bytes, jsDigitCount * JS_DIGIT_BYTE, true, false);
-
-  // Cast to a pythonmonkey.bigint to differentiate it from a normal Python int,
+  // Build the pythonmonkey.bigint directly to differentiate it from a normal Python int,
   //  allowing Py<->JS two-way BigInt conversion.
-  // We don't do `Py_SET_TYPE` because `_PyLong_FromByteArray` may cache and reuse objects for small ints
-  #if PY_VERSION_HEX >= 0x03090000
-  PyObject *pyObject = PyObject_CallOneArg(getPythonMonkeyBigInt(), pyIntObj); // pyObject = pythonmonkey.bigint(pyIntObj)
-  #else
-  PyObject *pyObject = PyObject_CallFunction(getPythonMonkeyBigInt(), "O", pyIntObj); // PyObject_CallOneArg is not available in Python < 3.9
-  #endif
-  Py_DECREF(pyIntObj);
-
-  // Set the sign bit
-  if (isNegative) {
-    PythonLong_SetSign((PyLongObject *)pyObject, -1);
-  }
-
-  return pyObject;
+  return newBigIntFromDigits(jsDigits, jsDigitCount, isNegative);
 }
 
 JS::BigInt *IntType::toJsBigInt(JSContext *cx, PyObject *pyObject) {
+  // Fast path for ints that fit in an int64_t, without touching the sign of the Python int
+  int overflow;
+  long long value = PyLong_AsLongLongAndOverflow(pyObject, &overflow);
+  if (value == -1 && PyErr_Occurred()) {
+    return nullptr;
+  }
+  if (!overflow) {
+    return JS::detail::BigIntFromInt64(cx, value);
+  }
+
   // Figure out how many 64-bit "digits" we would have for JS BigInt
   //    see https://github.com/python/cpython/blob/3.9/Modules/_randommodule.c#L306
   size_t bitCount = _PyLong_NumBits(pyObject);
@@ -133,7 +202,7 @@ JS::BigInt *IntType::toJsBigInt(JSContext *cx, PyObject *pyObject) {
 
   JS::BigInt *bigint = nullptr;
   if (jsDigitCount <= 1) {
-    // Fast path for int fits in one js_digit_t (uint64 on 64-bit OS)
+    // int fits in one js_digit_t (uint64 on 64-bit OS)
     bigint = JS::detail::BigIntFromUint64(cx, PyLong_AsUnsignedLongLong(pyObject));
   } else {
     // Convert to bytes of 8-bit "digits" in **big-endian** order
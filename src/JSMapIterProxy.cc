@@ -0,0 +1,84 @@
+/**
+ * @file JSMapIterProxy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSMapIterProxy is a custom C-implemented python type. It acts as a python iterator over the iterators of JS Maps and Sets
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/JSMapIterProxy.hh"
+
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
+#include "include/pyTypeFactory.hh"
+#include "include/setSpiderMonkeyException.hh"
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+PyObject *JSMapIterProxyMethodDefinitions::JSMapIterProxy_fromIterator(JSContext *cx, JS::HandleValue jsIterator, bool entries) {
+  JSMapIterProxy *iterator = PyObject_New(JSMapIterProxy, &JSMapIterProxyType);
+  if (iterator == NULL) {
+    return NULL;
+  }
+  iterator->jsIterator = new JS::PersistentRootedObject(cx, &jsIterator.toObject());
+  iterator->entries = entries;
+  return (PyObject *)iterator;
+}
+
+void JSMapIterProxyMethodDefinitions::JSMapIterProxy_dealloc(JSMapIterProxy *self)
+{
+  delete self->jsIterator;
+  PyObject_Del(self);
+}
+
+PyObject *JSMapIterProxyMethodDefinitions::JSMapIterProxy_iter(JSMapIterProxy *self) {
+  Py_INCREF(self);
+  return (PyObject *)self;
+}
+
+PyObject *JSMapIterProxyMethodDefinitions::JSMapIterProxy_next(JSMapIterProxy *self) {
+  JS::RootedValue result(GLOBAL_CX);
+  if (!JS_CallFunctionName(GLOBAL_CX, *(self->jsIterator), "next", JS::HandleValueArray::empty(), &result)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+
+  JS::RootedObject resultObj(GLOBAL_CX, &result.toObject()); // Map and Set iterators always return an object
+  JS::RootedValue done(GLOBAL_CX);
+  JS::RootedValue value(GLOBAL_CX);
+  if (!JS_GetProperty(GLOBAL_CX, resultObj, "done", &done) || !JS_GetProperty(GLOBAL_CX, resultObj, "value", &value)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  if (done.toBoolean()) {
+    return NULL; // StopIteration
+  }
+
+  if (!self->entries) {
+    return pyTypeFactory(GLOBAL_CX, value);
+  }
+
+  JS::RootedObject entry(GLOBAL_CX, &value.toObject());
+  JS::RootedValue entryKey(GLOBAL_CX);
+  JS::RootedValue entryValue(GLOBAL_CX);
+  if (!JS_GetElement(GLOBAL_CX, entry, 0, &entryKey) || !JS_GetElement(GLOBAL_CX, entry, 1, &entryValue)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  PyObject *key = pyTypeFactory(GLOBAL_CX, entryKey);
+  if (!key) {
+    return NULL;
+  }
+  PyObject *item = pyTypeFactory(GLOBAL_CX, entryValue);
+  if (!item) {
+    Py_DECREF(key);
+    return NULL;
+  }
+  PyObject *tuple = PyTuple_Pack(2, key, item);
+  Py_DECREF(key);
+  Py_DECREF(item);
+  return tuple;
+}
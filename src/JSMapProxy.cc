@@ -0,0 +1,397 @@
+/**
+ * @file JSMapProxy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSMapProxy is a custom C-implemented python type. It acts as a proxy for JS Maps from Spidermonkey, and behaves like a python mapping would.
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/JSMapProxy.hh"
+
+#include "include/JSMapIterProxy.hh"
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
+#include "include/jsTypeFactory.hh"
+#include "include/pyTypeFactory.hh"
+#include "include/setSpiderMonkeyException.hh"
+
+#include <jsapi.h>
+#include <js/MapAndSet.h>
+
+#include <Python.h>
+
+/**
+ * @brief Convert a python key to the JS value it is stored under in the Map
+ *
+ * @return true on success, false if a python exception has been raised
+ */
+static bool keyToValue(PyObject *key, JS::MutableHandleValue jsKey) {
+  jsKey.set(jsTypeFactory(GLOBAL_CX, key));
+  return !PyErr_Occurred();
+}
+
+bool JSMapProxyMethodDefinitions::init() {
+  PyObject *abc = PyImport_ImportModule("collections.abc");
+  if (!abc) {
+    return false;
+  }
+  mappingType = PyObject_GetAttrString(abc, "Mapping");
+  keysViewType = PyObject_GetAttrString(abc, "KeysView");
+  valuesViewType = PyObject_GetAttrString(abc, "ValuesView");
+  itemsViewType = PyObject_GetAttrString(abc, "ItemsView");
+  Py_DECREF(abc);
+  return mappingType && keysViewType && valuesViewType && itemsViewType;
+}
+
+/**
+ * @brief Make a live view of the Map, of the collections.abc view class `viewType`, which can be iterated more than once
+ *
+ * @return PyObject* - the new view, or NULL if an exception has been raised
+ */
+static PyObject *newView(JSMapProxy *self, PyObject *viewType) {
+  return PyObject_CallFunctionObjArgs(viewType, (PyObject *)self, NULL);
+}
+
+/**
+ * @brief Make an iterator over the (key, value) tuples of the Map, in insertion order
+ *
+ * @return PyObject* - the new iterator, or NULL if an exception has been raised
+ */
+static PyObject *entriesIterator(JSMapProxy *self) {
+  JS::RootedValue iterator(GLOBAL_CX);
+  if (!JS::MapEntries(GLOBAL_CX, *(self->jsMap), &iterator)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return JSMapIterProxyMethodDefinitions::JSMapIterProxy_fromIterator(GLOBAL_CX, iterator, true);
+}
+
+/**
+ * @brief Set the entries of `other` in the Map, as dict.update does:
+ *    a mapping with a keys() method is read key by key, and anything else is an iterable of (key, value) pairs
+ *
+ * @return int -1 on exception, 0 on success
+ */
+static int mergeFrom(JSMapProxy *self, PyObject *other) {
+  bool isMapping = PyObject_HasAttrString(other, "keys");
+  PyObject *iterator;
+  if (isMapping) {
+    PyObject *keys = PyMapping_Keys(other);
+    if (!keys) {
+      return -1;
+    }
+    iterator = PyObject_GetIter(keys);
+    Py_DECREF(keys);
+  } else {
+    iterator = PyObject_GetIter(other);
+  }
+  if (!iterator) {
+    return -1;
+  }
+
+  PyObject *item;
+  while ((item = PyIter_Next(iterator))) {
+    int status = -1;
+    if (isMapping) {
+      PyObject *value = PyObject_GetItem(other, item);
+      if (value) {
+        status = JSMapProxyMethodDefinitions::JSMapProxy_assign(self, item, value);
+        Py_DECREF(value);
+      }
+    } else {
+      PyObject *pair = PySequence_Fast(item, "cannot convert Map update sequence element to a sequence");
+      if (pair && PySequence_Fast_GET_SIZE(pair) != 2) {
+        PyErr_Format(PyExc_ValueError, "Map update sequence element has length %zd; 2 is required", PySequence_Fast_GET_SIZE(pair));
+      } else if (pair) {
+        status = JSMapProxyMethodDefinitions::JSMapProxy_assign(self, PySequence_Fast_GET_ITEM(pair, 0), PySequence_Fast_GET_ITEM(pair, 1));
+      }
+      Py_XDECREF(pair);
+    }
+    Py_DECREF(item);
+    if (status < 0) {
+      Py_DECREF(iterator);
+      return -1;
+    }
+  }
+  Py_DECREF(iterator);
+  return PyErr_Occurred() ? -1 : 0;
+}
+
+void JSMapProxyMethodDefinitions::JSMapProxy_dealloc(JSMapProxy *self)
+{
+  delete self->jsMap;
+  Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+Py_ssize_t JSMapProxyMethodDefinitions::JSMapProxy_length(JSMapProxy *self)
+{
+  return JS::MapSize(GLOBAL_CX, *(self->jsMap));
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_get(JSMapProxy *self, PyObject *key)
+{
+  JS::RootedValue jsKey(GLOBAL_CX);
+  if (!keyToValue(key, &jsKey)) {
+    return NULL;
+  }
+
+  bool has;
+  if (!JS::MapHas(GLOBAL_CX, *(self->jsMap), jsKey, &has)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  if (!has) { // can't rely on MapGet alone, since undefined is a valid value
+    _PyErr_SetKeyError(key);
+    return NULL;
+  }
+
+  JS::RootedValue value(GLOBAL_CX);
+  if (!JS::MapGet(GLOBAL_CX, *(self->jsMap), jsKey, &value)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return pyTypeFactory(GLOBAL_CX, value);
+}
+
+int JSMapProxyMethodDefinitions::JSMapProxy_assign(JSMapProxy *self, PyObject *key, PyObject *value)
+{
+  JS::RootedValue jsKey(GLOBAL_CX);
+  if (!keyToValue(key, &jsKey)) {
+    return -1;
+  }
+
+  if (value) { // we are setting a value
+    JS::RootedValue jsValue(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, value));
+    if (PyErr_Occurred()) {
+      return -1;
+    }
+    if (!JS::MapSet(GLOBAL_CX, *(self->jsMap), jsKey, jsValue)) {
+      setSpiderMonkeyException(GLOBAL_CX);
+      return -1;
+    }
+  } else { // we are deleting a value
+    bool deleted;
+    if (!JS::MapDelete(GLOBAL_CX, *(self->jsMap), jsKey, &deleted)) {
+      setSpiderMonkeyException(GLOBAL_CX);
+      return -1;
+    }
+    if (!deleted) {
+      _PyErr_SetKeyError(key);
+      return -1;
+    }
+  }
+  return 0;
+}
+
+int JSMapProxyMethodDefinitions::JSMapProxy_contains(JSMapProxy *self, PyObject *key)
+{
+  JS::RootedValue jsKey(GLOBAL_CX);
+  if (!keyToValue(key, &jsKey)) {
+    return -1;
+  }
+
+  bool has;
+  if (!JS::MapHas(GLOBAL_CX, *(self->jsMap), jsKey, &has)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return -1;
+  }
+  return has;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_iter(JSMapProxy *self) {
+  JS::RootedValue iterator(GLOBAL_CX);
+  if (!JS::MapKeys(GLOBAL_CX, *(self->jsMap), &iterator)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return JSMapIterProxyMethodDefinitions::JSMapIterProxy_fromIterator(GLOBAL_CX, iterator, false);
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_repr(JSMapProxy *self) {
+  int status = Py_ReprEnter((PyObject *)self);
+  if (status != 0) {
+    return status > 0 ? PyUnicode_FromString("Map(...)") : NULL;
+  }
+
+  PyObject *repr = NULL;
+  PyObject *items = entriesIterator(self);
+  if (items) {
+    PyObject *itemsList = PySequence_List(items);
+    Py_DECREF(items);
+    if (itemsList) {
+      repr = PyUnicode_FromFormat("Map(%R)", itemsList);
+      Py_DECREF(itemsList);
+    }
+  }
+
+  Py_ReprLeave((PyObject *)self);
+  return repr;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_richcompare(JSMapProxy *self, PyObject *other, int op) {
+  if (op != Py_EQ && op != Py_NE) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  if (PyObject_TypeCheck(other, &JSMapProxyType) && **(self->jsMap) == **(((JSMapProxy *)other)->jsMap)) {
+    return PyBool_FromLong(op == Py_EQ);
+  }
+
+  int isMapping = PyObject_IsInstance(other, mappingType);
+  if (isMapping < 0) {
+    return NULL;
+  }
+  if (!isMapping) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  // as collections.abc.Mapping does, compare the entries of both sides collected in dicts
+  PyObject *result = NULL;
+  PyObject *selfItems = PyDict_New();
+  PyObject *otherItems = PyDict_New();
+  if (selfItems && otherItems && PyDict_Merge(selfItems, (PyObject *)self, 1) == 0 && PyDict_Merge(otherItems, other, 1) == 0) {
+    result = PyObject_RichCompare(selfItems, otherItems, op);
+  }
+  Py_XDECREF(selfItems);
+  Py_XDECREF(otherItems);
+  return result;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_get_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs) {
+  PyObject *key;
+  PyObject *default_value = Py_None;
+
+  if (!_PyArg_CheckPositional("get", nargs, 1, 2)) {
+    return NULL;
+  }
+  key = args[0];
+  if (nargs == 2) {
+    default_value = args[1];
+  }
+
+  int has = JSMapProxy_contains(self, key);
+  if (has < 0) {
+    return NULL;
+  }
+  if (!has) {
+    Py_INCREF(default_value);
+    return default_value;
+  }
+  return JSMapProxy_get(self, key);
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_pop_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs) {
+  PyObject *key;
+  PyObject *default_value = NULL;
+
+  if (!_PyArg_CheckPositional("pop", nargs, 1, 2)) {
+    return NULL;
+  }
+  key = args[0];
+  if (nargs == 2) {
+    default_value = args[1];
+  }
+
+  int has = JSMapProxy_contains(self, key);
+  if (has < 0) {
+    return NULL;
+  }
+  if (!has) {
+    if (default_value != NULL) {
+      Py_INCREF(default_value);
+      return default_value;
+    }
+    _PyErr_SetKeyError(key);
+    return NULL;
+  }
+
+  PyObject *value = JSMapProxy_get(self, key);
+  if (value == NULL || JSMapProxy_assign(self, key, NULL) < 0) {
+    Py_XDECREF(value);
+    return NULL;
+  }
+  return value;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_setdefault_method(JSMapProxy *self, PyObject *const *args, Py_ssize_t nargs) {
+  PyObject *key;
+  PyObject *default_value = Py_None;
+
+  if (!_PyArg_CheckPositional("setdefault", nargs, 1, 2)) {
+    return NULL;
+  }
+  key = args[0];
+  if (nargs == 2) {
+    default_value = args[1];
+  }
+
+  int has = JSMapProxy_contains(self, key);
+  if (has < 0) {
+    return NULL;
+  }
+  if (has) {
+    return JSMapProxy_get(self, key);
+  }
+  if (JSMapProxy_assign(self, key, default_value) < 0) {
+    return NULL;
+  }
+  Py_INCREF(default_value);
+  return default_value;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_popitem_method(JSMapProxy *self) {
+  PyObject *items = entriesIterator(self);
+  if (!items) {
+    return NULL;
+  }
+  PyObject *item = PyIter_Next(items);
+  Py_DECREF(items);
+  if (!item) {
+    if (!PyErr_Occurred()) {
+      PyErr_SetString(PyExc_KeyError, "popitem(): Map is empty");
+    }
+    return NULL;
+  }
+
+  if (JSMapProxy_assign(self, PyTuple_GET_ITEM(item, 0), NULL) < 0) {
+    Py_DECREF(item);
+    return NULL;
+  }
+  return item;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_update_method(JSMapProxy *self, PyObject *args, PyObject *kwds) {
+  PyObject *other = NULL;
+  if (!PyArg_UnpackTuple(args, "update", 0, 1, &other)) {
+    return NULL;
+  }
+
+  if (other != NULL && mergeFrom(self, other) < 0) {
+    return NULL;
+  }
+  if (kwds != NULL && mergeFrom(self, kwds) < 0) {
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_clear_method(JSMapProxy *self) {
+  if (!JS::MapClear(GLOBAL_CX, *(self->jsMap))) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_keys_method(JSMapProxy *self) {
+  return newView(self, keysViewType);
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_values_method(JSMapProxy *self) {
+  return newView(self, valuesViewType);
+}
+
+PyObject *JSMapProxyMethodDefinitions::JSMapProxy_items_method(JSMapProxy *self) {
+  return newView(self, itemsViewType);
+}
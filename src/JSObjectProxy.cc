@@ -22,6 +22,7 @@
 #include "include/PyBaseProxyHandler.hh"
 
 #include "include/JSFunctionProxy.hh"
+#include "include/JSSymbolProxy.hh"
 
 #include <jsapi.h>
 #include <jsfriendapi.h>
@@ -42,6 +43,9 @@ bool keyToId(PyObject *key, JS::MutableHandleId idp) {
   } else if (PyLong_Check(key)) { // key is int type
     uint32_t keyAsInt = PyLong_AsUnsignedLong(key); // TODO raise OverflowError if the value of pylong is out of range for a unsigned long
     return JS_IndexToId(GLOBAL_CX, keyAsInt, idp);
+  } else if (PyObject_TypeCheck(key, &JSSymbolProxyType)) { // key is a pythonmonkey.JSSymbol
+    idp.set(JS::PropertyKey::Symbol(*((JSSymbolProxy *)key)->jsSymbol));
+    return true;
   } else {
     return false; // fail
   }
@@ -144,7 +148,7 @@ PyObject *JSObjectProxyMethodDefinitions::JSObjectProxy_get(JSObjectProxy *self,
 {
   JS::RootedId id(GLOBAL_CX);
   if (!keyToId(key, &id)) {
-    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str or int");
+    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str, int or pythonmonkey.JSSymbol");
     return NULL;
   }
 
@@ -155,7 +159,7 @@ PyObject *JSObjectProxyMethodDefinitions::JSObjectProxy_get_subscript(JSObjectPr
 {
   JS::RootedId id(GLOBAL_CX);
   if (!keyToId(key, &id)) {
-    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str or int");
+    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str, int or pythonmonkey.JSSymbol");
     return NULL;
   }
 
@@ -166,7 +170,7 @@ int JSObjectProxyMethodDefinitions::JSObjectProxy_contains(JSObjectProxy *self,
 {
   JS::RootedId id(GLOBAL_CX);
   if (!keyToId(key, &id)) {
-    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str or int");
+    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str, int or pythonmonkey.JSSymbol");
     return -1;
   }
   JS::RootedValue value(GLOBAL_CX);
@@ -188,7 +192,7 @@ int JSObjectProxyMethodDefinitions::JSObjectProxy_assign(JSObjectProxy *self, Py
 {
   JS::RootedId id(GLOBAL_CX);
   if (!keyToId(key, &id)) { // invalid key
-    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str or int");
+    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str, int or pythonmonkey.JSSymbol");
     return -1;
   }
 
@@ -666,7 +670,7 @@ PyObject *JSObjectProxyMethodDefinitions::JSObjectProxy_pop_method(JSObjectProxy
 skip_optional:
   JS::RootedId id(GLOBAL_CX);
   if (!keyToId(key, &id)) {
-    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str or int");
+    PyErr_SetString(PyExc_AttributeError, "JSObjectProxy property name must be of type str, int or pythonmonkey.JSSymbol");
     return NULL;
   }
 
@@ -0,0 +1,411 @@
+/**
+ * @file JSSetProxy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSSetProxy is a custom C-implemented python type. It acts as a proxy for JS Sets from Spidermonkey, and behaves like a python set would.
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/JSSetProxy.hh"
+
+#include "include/JSMapIterProxy.hh"
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
+#include "include/jsTypeFactory.hh"
+#include "include/pyTypeFactory.hh"
+#include "include/setSpiderMonkeyException.hh"
+
+#include <jsapi.h>
+#include <js/MapAndSet.h>
+
+#include <Python.h>
+
+/**
+ * @brief Remove `element` from the Set
+ *
+ * @return int 1 if it was removed, 0 if it was not in the Set, and -1 on error
+ */
+static int deleteElement(JSSetProxy *self, PyObject *element) {
+  JS::RootedValue jsElement(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, element));
+  if (PyErr_Occurred()) {
+    return -1;
+  }
+
+  bool deleted;
+  if (!JS::SetDelete(GLOBAL_CX, *(self->jsSet), jsElement, &deleted)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return -1;
+  }
+  return deleted;
+}
+
+/**
+ * @brief Whether `object` can be iterated over, as the other operand of the set operators must be
+ */
+static bool isIterable(PyObject *object) {
+  return Py_TYPE(object)->tp_iter != NULL || PySequence_Check(object);
+}
+
+bool JSSetProxyMethodDefinitions::init() {
+  PyObject *abc = PyImport_ImportModule("collections.abc");
+  if (!abc) {
+    return false;
+  }
+  setType = PyObject_GetAttrString(abc, "Set");
+  Py_DECREF(abc);
+  return setType != nullptr;
+}
+
+/**
+ * @brief Whether `object` is a python set or frozenset, a JSSetProxy, or any other collections.abc.Set, that sets compare with
+ *
+ * @return int 1 if it is, 0 if not, and -1 on error
+ */
+static int isSet(PyObject *object) {
+  if (PyAnySet_Check(object) || PyObject_TypeCheck(object, &JSSetProxyType)) {
+    return 1;
+  }
+  return PyObject_IsInstance(object, JSSetProxyMethodDefinitions::setType);
+}
+
+/**
+ * @brief Whether `other` is a JSSetProxy for the same JS Set as `self`
+ */
+static bool isSameSet(JSSetProxy *self, PyObject *other) {
+  return PyObject_TypeCheck(other, &JSSetProxyType) && **(self->jsSet) == **(((JSSetProxy *)other)->jsSet);
+}
+
+/**
+ * @brief Get the elements of `object` as a python set, or a new reference to `object` itself if it already is a python set or frozenset
+ *
+ * @return PyObject* - new reference to the set, or NULL if an exception has been raised
+ */
+static PyObject *toPySet(PyObject *object) {
+  if (PyAnySet_Check(object)) {
+    Py_INCREF(object);
+    return object;
+  }
+  return PySet_New(object);
+}
+
+/**
+ * @brief Apply the python set operator `op` (such as PyNumber_Or) to the elements of both operands.
+ *    As with collections.abc.Set, the result is a new python set, and not a JS Set
+ *
+ * @return PyObject* - the result, NotImplemented if an operand is not iterable, or NULL if an exception has been raised
+ */
+static PyObject *setOperation(PyObject *left, PyObject *right, binaryfunc op) {
+  if (!isIterable(left) || !isIterable(right)) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  PyObject *leftSet = toPySet(left);
+  if (!leftSet) {
+    return NULL;
+  }
+  PyObject *rightSet = toPySet(right);
+  if (!rightSet) {
+    Py_DECREF(leftSet);
+    return NULL;
+  }
+
+  PyObject *result = op(leftSet, rightSet);
+  Py_DECREF(leftSet);
+  Py_DECREF(rightSet);
+  return result;
+}
+
+void JSSetProxyMethodDefinitions::JSSetProxy_dealloc(JSSetProxy *self)
+{
+  delete self->jsSet;
+  Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+Py_ssize_t JSSetProxyMethodDefinitions::JSSetProxy_length(JSSetProxy *self)
+{
+  return JS::SetSize(GLOBAL_CX, *(self->jsSet));
+}
+
+int JSSetProxyMethodDefinitions::JSSetProxy_contains(JSSetProxy *self, PyObject *element)
+{
+  JS::RootedValue jsElement(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, element));
+  if (PyErr_Occurred()) {
+    return -1;
+  }
+
+  bool has;
+  if (!JS::SetHas(GLOBAL_CX, *(self->jsSet), jsElement, &has)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return -1;
+  }
+  return has;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_iter(JSSetProxy *self) {
+  JS::RootedValue iterator(GLOBAL_CX);
+  if (!JS::SetValues(GLOBAL_CX, *(self->jsSet), &iterator)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return JSMapIterProxyMethodDefinitions::JSMapIterProxy_fromIterator(GLOBAL_CX, iterator, false);
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_repr(JSSetProxy *self) {
+  int status = Py_ReprEnter((PyObject *)self);
+  if (status != 0) {
+    return status > 0 ? PyUnicode_FromString("Set(...)") : NULL;
+  }
+
+  PyObject *repr = NULL;
+  PyObject *elements = PySequence_List((PyObject *)self);
+  if (elements) {
+    repr = PyUnicode_FromFormat("Set(%R)", elements);
+    Py_DECREF(elements);
+  }
+
+  Py_ReprLeave((PyObject *)self);
+  return repr;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_richcompare(JSSetProxy *self, PyObject *other, int op) {
+  int otherIsSet = isSet(other);
+  if (otherIsSet < 0) {
+    return NULL;
+  }
+  if (!otherIsSet) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  PyObject *selfSet = PySet_New((PyObject *)self);
+  if (!selfSet) {
+    return NULL;
+  }
+  PyObject *otherSet = toPySet(other);
+  if (!otherSet) {
+    Py_DECREF(selfSet);
+    return NULL;
+  }
+
+  PyObject *result = PyObject_RichCompare(selfSet, otherSet, op);
+  Py_DECREF(selfSet);
+  Py_DECREF(otherSet);
+  return result;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_or(PyObject *left, PyObject *right) {
+  return setOperation(left, right, PyNumber_Or);
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_and(PyObject *left, PyObject *right) {
+  return setOperation(left, right, PyNumber_And);
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_subtract(PyObject *left, PyObject *right) {
+  return setOperation(left, right, PyNumber_Subtract);
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_xor(PyObject *left, PyObject *right) {
+  return setOperation(left, right, PyNumber_Xor);
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_ior(JSSetProxy *self, PyObject *other) {
+  if (!isIterable(other)) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  PyObject *iterator = PyObject_GetIter(other);
+  if (!iterator) {
+    return NULL;
+  }
+  PyObject *element;
+  while ((element = PyIter_Next(iterator))) {
+    PyObject *added = JSSetProxy_add_method(self, element);
+    Py_DECREF(element);
+    if (!added) {
+      Py_DECREF(iterator);
+      return NULL;
+    }
+    Py_DECREF(added);
+  }
+  Py_DECREF(iterator);
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+
+  Py_INCREF(self);
+  return (PyObject *)self;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_iand(JSSetProxy *self, PyObject *other) {
+  PyObject *removed = setOperation((PyObject *)self, other, PyNumber_Subtract);
+  if (!removed || removed == Py_NotImplemented) {
+    return removed;
+  }
+
+  PyObject *result = JSSetProxy_isub(self, removed);
+  Py_DECREF(removed);
+  return result;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_isub(JSSetProxy *self, PyObject *other) {
+  if (!isIterable(other)) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  if (isSameSet(self, other)) {
+    if (!JS::SetClear(GLOBAL_CX, *(self->jsSet))) {
+      setSpiderMonkeyException(GLOBAL_CX);
+      return NULL;
+    }
+  } else {
+    PyObject *iterator = PyObject_GetIter(other);
+    if (!iterator) {
+      return NULL;
+    }
+    PyObject *element;
+    while ((element = PyIter_Next(iterator))) {
+      int deleted = deleteElement(self, element);
+      Py_DECREF(element);
+      if (deleted < 0) {
+        Py_DECREF(iterator);
+        return NULL;
+      }
+    }
+    Py_DECREF(iterator);
+    if (PyErr_Occurred()) {
+      return NULL;
+    }
+  }
+
+  Py_INCREF(self);
+  return (PyObject *)self;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_ixor(JSSetProxy *self, PyObject *other) {
+  if (!isIterable(other)) {
+    Py_RETURN_NOTIMPLEMENTED;
+  }
+
+  if (isSameSet(self, other)) {
+    return JSSetProxy_isub(self, other);
+  }
+
+  // each distinct element toggles once, even if the iterable yields it several times
+  PyObject *otherSet = toPySet(other);
+  if (!otherSet) {
+    return NULL;
+  }
+  PyObject *iterator = PyObject_GetIter(otherSet);
+  Py_DECREF(otherSet);
+  if (!iterator) {
+    return NULL;
+  }
+  PyObject *element;
+  while ((element = PyIter_Next(iterator))) {
+    int deleted = deleteElement(self, element);
+    PyObject *added = NULL;
+    if (deleted == 0) {
+      added = JSSetProxy_add_method(self, element);
+      Py_XDECREF(added);
+    }
+    Py_DECREF(element);
+    if (deleted < 0 || (deleted == 0 && !added)) {
+      Py_DECREF(iterator);
+      return NULL;
+    }
+  }
+  Py_DECREF(iterator);
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+
+  Py_INCREF(self);
+  return (PyObject *)self;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_add_method(JSSetProxy *self, PyObject *element) {
+  JS::RootedValue jsElement(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, element));
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+
+  if (!JS::SetAdd(GLOBAL_CX, *(self->jsSet), jsElement)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_discard_method(JSSetProxy *self, PyObject *element) {
+  if (deleteElement(self, element) < 0) {
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_remove_method(JSSetProxy *self, PyObject *element) {
+  int deleted = deleteElement(self, element);
+  if (deleted < 0) {
+    return NULL;
+  }
+  if (!deleted) {
+    _PyErr_SetKeyError(element);
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_clear_method(JSSetProxy *self) {
+  if (!JS::SetClear(GLOBAL_CX, *(self->jsSet))) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_pop_method(JSSetProxy *self) {
+  PyObject *iterator = JSSetProxy_iter(self);
+  if (!iterator) {
+    return NULL;
+  }
+  PyObject *element = PyIter_Next(iterator);
+  Py_DECREF(iterator);
+  if (!element) {
+    if (!PyErr_Occurred()) {
+      PyErr_SetString(PyExc_KeyError, "pop from an empty Set");
+    }
+    return NULL;
+  }
+
+  if (deleteElement(self, element) < 0) {
+    Py_DECREF(element);
+    return NULL;
+  }
+  return element;
+}
+
+PyObject *JSSetProxyMethodDefinitions::JSSetProxy_isdisjoint_method(JSSetProxy *self, PyObject *other) {
+  PyObject *iterator = PyObject_GetIter(other);
+  if (!iterator) {
+    return NULL;
+  }
+
+  PyObject *element;
+  while ((element = PyIter_Next(iterator))) {
+    int has = JSSetProxy_contains(self, element);
+    Py_DECREF(element);
+    if (has != 0) {
+      Py_DECREF(iterator);
+      if (has < 0) {
+        return NULL;
+      }
+      Py_RETURN_FALSE;
+    }
+  }
+  Py_DECREF(iterator);
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+  Py_RETURN_TRUE;
+}
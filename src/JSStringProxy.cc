@@ -0,0 +1,59 @@
+/**
+ * @file JSStringProxy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSStringProxy is a custom C-implemented python type that derives from str. It acts as a proxy for JSStrings from Spidermonkey, and behaves like a str would.
+ * @date 2024-05-28
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/JSStringProxy.hh"
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+#include <vector>
+
+#define JS_STRING_ROOT_POOL_MAX_SIZE 1024 // roots released beyond this many free ones are deleted rather than pooled
+
+static std::vector<JS::PersistentRootedValue *> freeJSStringRoots;
+
+JS::PersistentRootedValue *acquireJSStringRoot(JSContext *cx, JSString *str) {
+  JS::PersistentRootedValue *root;
+  if (freeJSStringRoots.empty()) {
+    root = new JS::PersistentRootedValue(cx);
+  } else {
+    root = freeJSStringRoots.back();
+    freeJSStringRoots.pop_back();
+  }
+  root->setString(str);
+  return root;
+}
+
+void releaseJSStringRoot(JS::PersistentRootedValue *root) {
+  if (freeJSStringRoots.size() < JS_STRING_ROOT_POOL_MAX_SIZE) {
+    root->setUndefined(); // stays registered with the runtime, but no longer keeps the string alive
+    freeJSStringRoots.push_back(root);
+  } else {
+    delete root;
+  }
+}
+
+void JSStringProxyMethodDefinitions::JSStringProxy_dealloc(JSStringProxy *self)
+{
+  // see https://github.com/python/cpython/blob/v3.11.3/Objects/unicodeobject.c#L1513-L1557
+  PyCompactUnicodeObject *compact = (PyCompactUnicodeObject *)self;
+  if (compact->utf8) {
+    PyObject_Free(compact->utf8);
+  }
+#if PY_VERSION_HEX < 0x030c0000 // Python version is less than 3.12
+  if (compact->_base.wstr && (void *)compact->_base.wstr != self->str.data.any) {
+    PyObject_Free(compact->_base.wstr);
+  }
+#endif
+
+  releaseJSStringRoot(self->jsString);
+  Py_TYPE(self)->tp_free((PyObject *)self);
+}
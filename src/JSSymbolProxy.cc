@@ -0,0 +1,51 @@
+/**
+ * @file JSSymbolProxy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief JSSymbolProxy is a custom C-implemented python type. It acts as a proxy for JS Symbols from Spidermonkey, exposed to python as pythonmonkey.JSSymbol
+ * @date 2024-06-04
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/JSSymbolProxy.hh"
+
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
+#include "include/StrType.hh"
+#include "include/SymbolType.hh"
+
+#include <jsapi.h>
+#include <js/Symbol.h>
+
+#include <Python.h>
+
+void JSSymbolProxyMethodDefinitions::JSSymbolProxy_dealloc(JSSymbolProxy *self)
+{
+  SymbolType::forgetPyObject(GLOBAL_CX, *(self->jsSymbol));
+  delete self->jsSymbol;
+  Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+PyObject *JSSymbolProxyMethodDefinitions::JSSymbolProxy_repr(JSSymbolProxy *self)
+{
+  JS::RootedString description(GLOBAL_CX, JS::GetSymbolDescription(*(self->jsSymbol)));
+  if (!description) {
+    return PyUnicode_FromString("Symbol()");
+  }
+  PyObject *descriptionStr = StrType::getPyObjectCopy(GLOBAL_CX, description);
+  if (!descriptionStr) {
+    return NULL;
+  }
+  PyObject *repr = PyUnicode_FromFormat("Symbol(%U)", descriptionStr);
+  Py_DECREF(descriptionStr);
+  return repr;
+}
+
+PyObject *JSSymbolProxyMethodDefinitions::JSSymbolProxy_get_description(JSSymbolProxy *self, void *closure)
+{
+  JS::RootedString description(GLOBAL_CX, JS::GetSymbolDescription(*(self->jsSymbol)));
+  if (!description) {
+    Py_RETURN_NONE;
+  }
+  return StrType::getPyObjectCopy(GLOBAL_CX, description);
+}
@@ -12,16 +12,23 @@
 
 #include "include/PyEventLoop.hh"
 #include "include/pyTypeFactory.hh"
+#include "include/setSpiderMonkeyException.hh"
 
 #include <Python.h>
 
 #include <jsfriendapi.h>
 #include <mozilla/Unused.h>
 
-#include <stdexcept>
+#include <algorithm>
+#include <condition_variable>
+#include <cstdio>
+#include <mutex>
+#include <utility>
+#include <vector>
 
 JobQueue::JobQueue(JSContext *cx) {
   finalizationRegistryCallbacks = new JS::PersistentRooted<FunctionVector>(cx);   // Leaks but it's OK since freed at process exit
+  jobs = new JS::PersistentRooted<JobVector>(cx);   // Leaks but it's OK since freed at process exit
 }
 
 JSObject *JobQueue::getIncumbentGlobal(JSContext *cx) {
@@ -34,34 +41,121 @@ bool JobQueue::enqueuePromiseJob(JSContext *cx,
   [[maybe_unused]] JS::HandleObject allocationSite,
   JS::HandleObject incumbentGlobal) {
 
-  // Convert the `job` JS function to a Python function for event-loop callback
-  JS::RootedValue jobv(cx, JS::ObjectValue(*job));
-  PyObject *callback = pyTypeFactory(cx, jobv);
+  // Jobs enqueued while draining join the running batch, otherwise make sure a drain is scheduled on the running Python event-loop
+  if (!draining && !scheduleDrain(cx)) {
+    return false;
+  }
 
-  // Send job to the running Python event-loop
-  PyEventLoop loop = PyEventLoop::getRunningLoop();
-  if (!loop.initialized()) return false;
+  if (!jobs->append(job)) {
+    JS_ReportOutOfMemory(cx);
+    return false;
+  }
 
   // Inform the JS runtime that the job queue is no longer empty
   JS::JobQueueMayNotBeEmpty(cx);
+  return true;
+}
 
-  loop.enqueue(callback);
+bool JobQueue::enqueueMicrotask(JSContext *cx, JS::HandleObject callback) {
+  // A Promise job is simply a function called with no arguments, so is a microtask
+  return enqueuePromiseJob(cx, nullptr, callback, nullptr, nullptr);
+}
 
-  Py_DECREF(callback);
+bool JobQueue::scheduleDrain(JSContext *cx) {
+  PyEventLoop loop = PyEventLoop::getRunningLoop();
+  if (!loop.initialized()) return false;
+
+  // A drain scheduled on an event-loop that is no longer running would never happen, so a new one is scheduled on the running loop
+  if (drainLoop == loop._loop) {
+    return true;
+  }
+  loop.enqueue(drainCallback);
+  Py_INCREF(loop._loop);
+  Py_XSETREF(drainLoop, loop._loop);
+  return true;
+}
+
+bool JobQueue::drainJobs(JSContext *cx) {
+  if (draining) {
+    return true; // the jobs are already being run further up the stack
+  }
+  draining = true;
+
+  JS::RootedObject job(cx);
+  JS::RootedValue unusedRval(cx);
+  JS::Rooted<JobVector> batch(cx);
+  while (!jobs->empty()) {
+    std::swap(batch.get(), jobs->get());
+    for (size_t index = 0; index < batch.length(); index++) {
+      job = batch.get()[index];
+      JSAutoRealm ar(cx, job);
+      if (!JS::Call(cx, JS::UndefinedHandleValue, job, JS::HandleValueArray::empty(), &unusedRval)) {
+        setSpiderMonkeyException(cx);
+
+        // Put the jobs not run yet back in front of the jobs enqueued by this batch
+        JS::Rooted<JobVector> remaining(cx);
+        if (!remaining.append(batch.get().begin() + index + 1, batch.get().end()) || !remaining.appendAll(jobs->get())) {
+          JS_ReportOutOfMemory(cx);
+        }
+        std::swap(remaining.get(), jobs->get());
+        draining = false;
+        Py_CLEAR(drainLoop);
+        if (!jobs->empty()) {
+          PyObject *type, *value, *traceback;
+          PyErr_Fetch(&type, &value, &traceback);
+          if (!scheduleDrain(cx)) {
+            PyErr_Clear();
+          }
+          PyErr_Restore(type, value, traceback);
+        }
+        return false;
+      }
+    }
+    batch.clear();
+  }
+
+  draining = false;
+  Py_CLEAR(drainLoop);
+  JS::JobQueueIsEmpty(cx);
   return true;
 }
 
 void JobQueue::runJobs(JSContext *cx) {
-  // Do nothing
+  if (!drainJobs(cx)) {
+    PyErr_Print();
+  }
 }
 
 bool JobQueue::empty() const {
-  // TODO (Tom Tang): implement using `get_running_loop` and getting job count on loop???
-  throw std::logic_error("JobQueue::empty is not implemented\n");
+  return jobs->empty();
 }
 
+/**
+ * @brief Job queue saved while the debugger runs its own code, restored once the debugger is done
+ * @see https://hg.mozilla.org/releases/mozilla-esr115/file/tip/js/public/Promise.h#l113
+ */
+class JobQueue::SavedQueue : public JS::JobQueue::SavedJobQueue {
+public:
+  SavedQueue(JSContext *cx, JobQueue *jobQueue) : jobQueue(jobQueue), saved(cx), draining(jobQueue->draining) {
+    std::swap(saved.get(), jobQueue->jobs->get());
+    jobQueue->draining = false;
+  }
+
+  ~SavedQueue() {
+    // the debugger's own jobs should all have been run by now, any left over run after the saved ones
+    mozilla::Unused << saved.appendAll(jobQueue->jobs->get());
+    std::swap(saved.get(), jobQueue->jobs->get());
+    jobQueue->draining = draining;
+  }
+
+private:
+  JobQueue *jobQueue;
+  JS::PersistentRooted<JobVector> saved;
+  bool draining;
+};
+
 js::UniquePtr<JS::JobQueue::SavedJobQueue> JobQueue::saveJobQueue(JSContext *cx) {
-  auto saved = js::MakeUnique<JS::JobQueue::SavedJobQueue>();
+  auto saved = js::MakeUnique<SavedQueue>(cx, this);
   if (!saved) {
     JS_ReportOutOfMemory(cx);
     return NULL;
@@ -69,7 +163,32 @@ js::UniquePtr<JS::JobQueue::SavedJobQueue> JobQueue::saveJobQueue(JSContext *cx)
   return saved;
 }
 
+/**
+ * @brief The event-loop callback running all the queued Promise jobs
+ * @param drainArgs - tuple of the javascript context and the JobQueue
+ */
+static PyObject *drainJobQueue(PyObject *drainArgs, PyObject *Py_UNUSED(unused)) {
+  JSContext *cx = (JSContext *)PyLong_AsVoidPtr(PyTuple_GetItem(drainArgs, 0));
+  JobQueue *jobQueue = (JobQueue *)PyLong_AsVoidPtr(PyTuple_GetItem(drainArgs, 1));
+  if (!jobQueue->drainJobs(cx)) {
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+
+static PyMethodDef drainJobQueueDef = {"drainJobQueue", drainJobQueue, METH_NOARGS, NULL};
+
 bool JobQueue::init(JSContext *cx) {
+  PyObject *drainArgs = Py_BuildValue("(NN)", PyLong_FromVoidPtr(cx), PyLong_FromVoidPtr(this));
+  if (!drainArgs) {
+    return false;
+  }
+  drainCallback = PyCFunction_New(&drainJobQueueDef, drainArgs);
+  Py_DECREF(drainArgs);
+  if (!drainCallback) {
+    return false;
+  }
+
   JS::SetJobQueue(cx, this);
   JS::InitDispatchToEventLoop(cx, dispatchToEventLoop, cx);
   return true;
@@ -84,21 +203,75 @@ static PyObject *callDispatchFunc(PyObject *dispatchFuncTuple, PyObject *Py_UNUS
 
 static PyMethodDef callDispatchFuncDef = {"JsDispatchCallable", callDispatchFunc, METH_NOARGS, NULL};
 
-bool JobQueue::dispatchToEventLoop(void *closure, JS::Dispatchable *dispatchable) {
-  JSContext *cx = (JSContext *)closure;
+/**
+ * @brief Dispatchables waiting for the dispatcher thread to send them to the event-loop, with the javascript context to run them on
+ */
+static std::vector<std::pair<JSContext *, JS::Dispatchable *>> pendingDispatchables;
+static std::mutex pendingDispatchablesMutex;
+static std::condition_variable pendingDispatchablesCondition;
+static bool dispatcherThreadStarted = false; // guarded by pendingDispatchablesMutex
 
-  // The `dispatchToEventLoop` function is running in a helper thread, so
-  // we must acquire the Python GIL (global interpreter lock)
-  //    see https://docs.python.org/3/c-api/init.html#non-python-created-threads
-  PyGILState_STATE gstate = PyGILState_Ensure();
+/**
+ * @brief Body of the long-lived dispatcher thread, sending the dispatchables to the event-loop on the main thread in batches
+ */
+static void dispatcherThreadMain(void *Py_UNUSED(unused)) {
+  std::vector<std::pair<JSContext *, JS::Dispatchable *>> batch;
+  while (true) {
+    {
+      std::unique_lock<std::mutex> lock(pendingDispatchablesMutex);
+      pendingDispatchablesCondition.wait(lock, [] { return !pendingDispatchables.empty(); });
+      std::swap(batch, pendingDispatchables);
+    }
 
-  PyObject *dispatchFuncTuple = PyTuple_Pack(2, PyLong_FromVoidPtr(cx), PyLong_FromVoidPtr(dispatchable));
-  PyObject *pyFunc = PyCFunction_New(&callDispatchFuncDef, dispatchFuncTuple);
+    if (!Py_IsInitialized()) { // the Python runtime is being finalized at exit
+      return;
+    }
+    PyGILState_STATE gstate = PyGILState_Ensure();
+    for (auto &[cx, dispatchable] : batch) {
+      PyObject *dispatchFuncTuple = Py_BuildValue("(NN)", PyLong_FromVoidPtr(cx), PyLong_FromVoidPtr(dispatchable));
+      PyObject *pyFunc = PyCFunction_New(&callDispatchFuncDef, dispatchFuncTuple);
+      Py_DECREF(dispatchFuncTuple);
+      if (!sendJobToMainLoop(pyFunc)) {
+        PyErr_Clear(); // no event-loop to run it on, nowhere to report it
+      }
+      Py_DECREF(pyFunc);
+    }
+    PyGILState_Release(gstate);
+    batch.clear();
+  }
+}
 
-  // Avoid using the current, JS helper thread to send jobs to event-loop as it may cause deadlock
-  PyThread_start_new_thread((void (*)(void *)) &sendJobToMainLoop, pyFunc);
+bool JobQueue::dispatchToEventLoop(void *closure, JS::Dispatchable *dispatchable) {
+  JSContext *cx = (JSContext *)closure;
 
-  PyGILState_Release(gstate);
+  // The `dispatchToEventLoop` function is running in a helper thread.
+  // Avoid using the current, JS helper thread to send jobs to event-loop as it may cause deadlock acquiring the Python GIL,
+  // hand the job over to the dispatcher thread instead, started on the first dispatch
+  bool startDispatcherThread;
+  {
+    std::lock_guard<std::mutex> lock(pendingDispatchablesMutex);
+    pendingDispatchables.emplace_back(cx, dispatchable);
+    startDispatcherThread = !std::exchange(dispatcherThreadStarted, true);
+  }
+  if (startDispatcherThread) {
+    if (PyThread_start_new_thread(dispatcherThreadMain, NULL) == PYTHREAD_INVALID_THREAD_ID) {
+      // Let the next dispatch try again, the dispatchables already pending are sent once the thread is up.
+      // Ours is handed back to the engine, which cancels it as if shutting down.
+      // We can't raise a Python exception here without risking a deadlock on the GIL.
+      {
+        std::lock_guard<std::mutex> lock(pendingDispatchablesMutex);
+        dispatcherThreadStarted = false;
+        auto ours = std::find(pendingDispatchables.begin(), pendingDispatchables.end(), std::make_pair(cx, dispatchable));
+        if (ours != pendingDispatchables.end()) {
+          pendingDispatchables.erase(ours);
+        }
+      }
+      fprintf(stderr, "PythonMonkey: cannot start the thread dispatching off-thread Promises to the event-loop\n");
+      return false;
+    }
+  } else {
+    pendingDispatchablesCondition.notify_one();
+  }
   return true;
 }
 
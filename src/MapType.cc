@@ -0,0 +1,25 @@
+/**
+ * @file MapType.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Maps in python
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/MapType.hh"
+
+#include "include/JSMapProxy.hh"
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+PyObject *MapType::getPyObject(JSContext *cx, JS::HandleObject mapObj) {
+  JSMapProxy *proxy = PyObject_New(JSMapProxy, &JSMapProxyType);
+  if (proxy != NULL) {
+    proxy->jsMap = new JS::PersistentRootedObject(cx, mapObj);
+  }
+  return (PyObject *)proxy;
+}
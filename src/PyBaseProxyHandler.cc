@@ -11,27 +11,80 @@
 
 #include "include/PyBaseProxyHandler.hh"
 
+#include "include/SymbolType.hh"
+
 #include <jsapi.h>
+#include <jsfriendapi.h>
+#include <js/friend/ErrorMessages.h>
 
 #include <Python.h>
 
 
 PyObject *idToKey(JSContext *cx, JS::HandleId id) {
+  if (id.isSymbol()) { // symbol keys become the pythonmonkey.JSSymbol for the symbol, which cannot collide with str keys
+    JS::RootedSymbol symbol(cx, id.toSymbol());
+    return SymbolType::getPyObject(cx, symbol);
+  }
+
   JS::RootedValue idv(cx, js::IdToValue(id));
-  JS::RootedString idStr(cx);
-  if (!id.isSymbol()) { // `JS::ToString` returns `nullptr` for JS symbols
-    idStr = JS::ToString(cx, idv);
-  } else {
-    // TODO (Tom Tang): Revisit this once we have Symbol coercion support
-    // FIXME (Tom Tang): key collision for symbols without a description string, or pure strings look like "Symbol(xxx)"
-    idStr = JS_ValueToSource(cx, idv);
+  JS::RootedString idStr(cx, JS::ToString(cx, idv));
+
+  // We convert all other types of property keys to string
+  auto chars = JS_EncodeStringToUTF8(cx, idStr);
+  return PyUnicode_FromString(chars.get());
+}
+
+PyObject *idToAttrName(JSContext *cx, JS::HandleId id) {
+  if (!id.isSymbol()) {
+    return idToKey(cx, id);
   }
 
-  // We convert all types of property keys to string
+  // python attribute names must be str, so a symbol key becomes its source text, as in `Symbol(xxx)`
+  JS::RootedValue idv(cx, js::IdToValue(id));
+  JS::RootedString idStr(cx, JS_ValueToSource(cx, idv));
+  if (!idStr) {
+    return NULL;
+  }
   auto chars = JS_EncodeStringToUTF8(cx, idStr);
   return PyUnicode_FromString(chars.get());
 }
 
+JSObject *newProxyPrototype(JSContext *cx, JSProtoKey parentKey, const JSMethodDef *methods) {
+  JS::RootedObject parentPrototype(cx);
+  if (!JS_GetClassPrototype(cx, parentKey, &parentPrototype)) {
+    return nullptr;
+  }
+
+  JS::RootedObject prototype(cx, JS_NewObjectWithGivenProto(cx, nullptr, parentPrototype));
+  if (!prototype) {
+    return nullptr;
+  }
+
+  for (size_t index = 0; methods[index].name != NULL; index++) {
+    if (!JS_DefineFunction(cx, prototype, methods[index].name, methods[index].call, methods[index].nargs, 0)) {
+      return nullptr;
+    }
+  }
+
+  return prototype;
+}
+
+JSObject *getThisProxy(JSContext *cx, const JS::CallArgs &args, const void *family, const char *className, const char *methodName) {
+  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  if (!proxy) {
+    return nullptr;
+  }
+  if (!js::IsProxy(proxy) || js::GetProxyHandler(proxy)->family() != family) {
+    reportIncompatibleThis(cx, args, className, methodName);
+    return nullptr;
+  }
+  return proxy;
+}
+
+void reportIncompatibleThis(JSContext *cx, const JS::CallArgs &args, const char *className, const char *methodName) {
+  JS_ReportErrorNumberASCII(cx, js::GetErrorMessage, nullptr, JSMSG_INCOMPATIBLE_PROTO, className, methodName, JS::InformalValueTypeName(args.thisv()));
+}
+
 bool idToIndex(JSContext *cx, JS::HandleId id, Py_ssize_t *index) {
   if (id.isInt()) { // int-like strings have already been automatically converted to ints
     *index = id.toInt();
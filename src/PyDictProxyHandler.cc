@@ -26,6 +26,22 @@
 
 const char PyDictProxyHandler::family = 0;
 
+JSObject *PyDictProxyHandler::getCachedPrototype(JSContext *cx) {
+  JS::RootedObject global(cx, JS::CurrentGlobalOrNull(cx));
+  JS::Value cachedPrototype = JS::GetReservedSlot(global, PyDictPrototypeSlot);
+  if (cachedPrototype.isObject()) {
+    return &cachedPrototype.toObject();
+  }
+
+  JS::RootedObject prototype(cx, newProxyPrototype(cx, JSProto_Object, object_methods));
+  if (!prototype) {
+    return nullptr;
+  }
+
+  JS::SetReservedSlot(global, PyDictPrototypeSlot, JS::ObjectValue(*prototype));
+  return prototype;
+}
+
 bool PyDictProxyHandler::ownPropertyKeys(JSContext *cx, JS::HandleObject proxy, JS::MutableHandleIdVector props) const {
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   PyObject *keys = PyDict_Keys(self);
@@ -58,7 +74,18 @@ bool PyDictProxyHandler::getOwnPropertyDescriptor(
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   PyObject *item = PyDict_GetItemWithError(self, attrName);
 
-  return handleGetOwnPropertyDescriptor(cx, id, desc, item);
+  // methods are found on the prototype chain, see PyDictProxyHandler::getCachedPrototype
+  if (!item) { // NULL if the key is not present
+    desc.set(mozilla::Nothing()); // JS objects return undefined for nonpresent keys
+  } else {
+    desc.set(mozilla::Some(
+      JS::PropertyDescriptor::Data(
+        jsTypeFactory(cx, item),
+        {JS::PropertyAttribute::Writable, JS::PropertyAttribute::Enumerable}
+      )
+    ));
+  }
+  return true;
 }
 
 bool PyDictProxyHandler::set(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
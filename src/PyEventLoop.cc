@@ -10,9 +10,12 @@
 
 
 #include "include/PyEventLoop.hh"
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
 
 #include <Python.h>
 
+#include <algorithm>
+
 /**
  * @brief Wrapper to decrement the counter of queueing event-loop jobs after the job finishes
  */
@@ -28,75 +31,407 @@ static PyObject *eventLoopJobWrapper(PyObject *jobFn, PyObject *Py_UNUSED(_)) {
 }
 static PyMethodDef loopJobWrapperDef = {"eventLoopJobWrapper", eventLoopJobWrapper, METH_NOARGS, NULL};
 
-static PyObject *_enqueueWithDelay(PyObject *_loop, PyEventLoop::AsyncHandle::id_t handleId, PyObject *jobFn, double delaySeconds, bool repeat);
+/**
+ * @brief Event-loop callback for the earliest deadline of a `TimerQueue`
+ * @param loop - the event-loop the `TimerQueue` belongs to
+ */
+static PyObject *timerQueueWakeup(PyObject *loop, PyObject *Py_UNUSED(_)) {
+  PyEventLoop::TimerQueue *queue = PyEventLoop::TimerQueue::forLoop(loop, false);
+  if (queue && !queue->runDueTimers()) {
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+static PyMethodDef timerQueueWakeupDef = {"timerQueueWakeup", timerQueueWakeup, METH_NOARGS, NULL};
 
 /**
- * @brief Wrapper to remove the reference of the timer after the job finishes
+ * @brief Event-loop callback for the check phase of a `TimerQueue`, running its immediate jobs
+ * @param loop - the event-loop the `TimerQueue` belongs to
  */
-static PyObject *timerJobWrapper(PyObject *jobFn, PyObject *args) {
-  PyObject *_loop = PyTuple_GetItem(args, 0);
-  PyEventLoop::AsyncHandle::id_t handleId = PyLong_AsLong(PyTuple_GetItem(args, 1));
-  double delaySeconds = PyFloat_AsDouble(PyTuple_GetItem(args, 2));
-  bool repeat = (bool)PyLong_AsLong(PyTuple_GetItem(args, 3));
+static PyObject *timerQueueCheckPhase(PyObject *loop, PyObject *Py_UNUSED(_)) {
+  PyEventLoop::TimerQueue *queue = PyEventLoop::TimerQueue::forLoop(loop, false);
+  if (queue && !queue->runImmediates()) {
+    return NULL;
+  }
+  Py_RETURN_NONE;
+}
+static PyMethodDef timerQueueCheckPhaseDef = {"timerQueueCheckPhase", timerQueueCheckPhase, METH_NOARGS, NULL};
 
-  PyObject *ret = PyObject_CallObject(jobFn, NULL); // jobFn()
-  Py_XDECREF(ret); // don't care about its return value
+/**
+ * @brief Jobs enqueued from other threads, waiting to be moved onto their event-loop by a single `call_soon_threadsafe` wakeup.
+ * Only accessed while holding the GIL
+ */
+static PyObject *pendingThreadsafeJobs = nullptr; // list of job wrappers, or NULL if no wakeup is pending
+static PyObject *pendingThreadsafeLoop = nullptr; // the event-loop the pending jobs go to
 
-  PyObject *errType, *errValue, *traceback; // we can't call any Python code unless the error indicator is clear
-  PyErr_Fetch(&errType, &errValue, &traceback);
-  // Making sure a `AsyncHandle::fromId` call is close to its `handle`'s use.
-  // We need to ensure the memory block doesn't move for reallocation before we can use the pointer,
-  // as we could have multiple new `setTimeout` calls to expand the `_timeoutIdMap` vector while running the job function in parallel.
-  auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
-  if (repeat && !handle->cancelled()) {
-    _enqueueWithDelay(_loop, handleId, jobFn, delaySeconds, repeat);
-  } else {
-    handle->removeRef();
+/**
+ * @brief Event-loop callback moving the jobs enqueued from other threads onto the event-loop, now that we are on its thread
+ */
+static PyObject *scheduleThreadsafeJobs(PyObject *Py_UNUSED(self), PyObject *Py_UNUSED(_)) {
+  PyObject *loop = std::exchange(pendingThreadsafeLoop, nullptr);
+  PyObject *jobs = std::exchange(pendingThreadsafeJobs, nullptr);
+  bool ok = true;
+  for (Py_ssize_t index = 0; index < PyList_GET_SIZE(jobs); index++) {
+    PyObject *asyncHandle = PyObject_CallMethod(loop, "call_soon", "O", PyList_GET_ITEM(jobs, index));
+    if (!asyncHandle) {
+      ok = false;
+      break;
+    }
+    Py_DECREF(asyncHandle);
   }
-
-  if (errType != NULL) { // PyErr_Occurred()
-    PyErr_Restore(errType, errValue, traceback);
+  Py_DECREF(jobs);
+  Py_DECREF(loop);
+  if (!ok) {
     return NULL;
-  } else {
-    Py_RETURN_NONE;
   }
+  Py_RETURN_NONE;
 }
-static PyMethodDef timerJobWrapperDef = {"timerJobWrapper", timerJobWrapper, METH_VARARGS, NULL};
+static PyMethodDef scheduleThreadsafeJobsDef = {"scheduleThreadsafeJobs", scheduleThreadsafeJobs, METH_NOARGS, NULL};
 
 PyEventLoop::AsyncHandle PyEventLoop::enqueue(PyObject *jobFn) {
-  PyEventLoop::_locker->incCounter();
   PyObject *wrapper = PyCFunction_New(&loopJobWrapperDef, jobFn);
-  // Enqueue job to the Python event-loop
-  //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_soon
-  PyObject *asyncHandle = PyObject_CallMethod(_loop, "call_soon_threadsafe", "O", wrapper);
-  return PyEventLoop::AsyncHandle(asyncHandle);
-}
-
-static PyObject *_enqueueWithDelay(PyObject *_loop, PyEventLoop::AsyncHandle::id_t handleId, PyObject *jobFn, double delaySeconds, bool repeat) {
-  PyObject *wrapper = PyCFunction_New(&timerJobWrapperDef, jobFn);
-  // Schedule job to the Python event-loop
-  //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_later
-  PyObject *asyncHandle = PyObject_CallMethod(_loop, "call_later", "dOOIdb", delaySeconds, wrapper, _loop, handleId, delaySeconds, repeat); // https://docs.python.org/3/c-api/arg.html#c.Py_BuildValue
-  if (!asyncHandle) {
-    return nullptr; // RuntimeError
+  if (!wrapper) {
+    return PyEventLoop::AsyncHandle(NULL);
   }
+  // Counted before the job is sent, as the event-loop could run it from its own thread as soon as it is.
+  // The count is given back if the job can't be sent.
+  PyEventLoop::_locker->incCounter();
+  PyObject *asyncHandle = NULL;
+  bool queued = false;
+  if (_getRunningLoopObject(_getCurrentThread()) == _loop) {
+    // Enqueue job to the Python event-loop, no need to wake up the event-loop as we are on its thread
+    //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_soon
+    asyncHandle = PyObject_CallMethod(_loop, "call_soon", "O", wrapper);
+    queued = asyncHandle != NULL;
+  } else if (pendingThreadsafeJobs && pendingThreadsafeLoop == _loop) {
+    // A wakeup is already on its way to the event-loop, the job goes along with it and has no `asyncio.Handle` of its own
+    queued = PyList_Append(pendingThreadsafeJobs, wrapper) == 0;
+  } else if (!pendingThreadsafeJobs) {
+    // Wake up the event-loop from another thread
+    //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_soon_threadsafe
+    pendingThreadsafeJobs = PyList_New(0);
+    if (pendingThreadsafeJobs && PyList_Append(pendingThreadsafeJobs, wrapper) == 0) {
+      Py_INCREF(_loop);
+      pendingThreadsafeLoop = _loop;
+      PyObject *scheduler = PyCFunction_New(&scheduleThreadsafeJobsDef, NULL);
+      if (scheduler) {
+        asyncHandle = PyObject_CallMethod(_loop, "call_soon_threadsafe", "O", scheduler);
+        Py_DECREF(scheduler);
+      }
+      queued = asyncHandle != NULL;
+    }
+    if (!queued) { // the event-loop is closed
+      Py_CLEAR(pendingThreadsafeJobs);
+      Py_CLEAR(pendingThreadsafeLoop);
+    }
+  } else {
+    // Jobs are already pending for another event-loop
+    asyncHandle = PyObject_CallMethod(_loop, "call_soon_threadsafe", "O", wrapper);
+    queued = asyncHandle != NULL;
+  }
+  Py_DECREF(wrapper);
 
-  auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
-  Py_XDECREF(handle->swap(asyncHandle));
-
-  return asyncHandle;
+  if (!queued) { // give the count back, keeping the exception raised
+    PyObject *errType, *errValue, *traceback;
+    PyErr_Fetch(&errType, &errValue, &traceback);
+    PyEventLoop::_locker->decCounter();
+    PyErr_Restore(errType, errValue, traceback);
+  }
+  return PyEventLoop::AsyncHandle(asyncHandle);
 }
 
 PyEventLoop::AsyncHandle::id_t PyEventLoop::enqueueWithDelay(PyObject *jobFn, double delaySeconds, bool repeat) {
   auto handleId = PyEventLoop::AsyncHandle::newEmpty();
-  if (!_enqueueWithDelay(_loop, handleId, jobFn, delaySeconds, repeat)) {
-    PyErr_Print(); // RuntimeError: Non-thread-safe operation invoked on an event loop other than the current one
+  auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
+  Py_INCREF(jobFn);
+  handle->_jobFn = jobFn;
+  Py_INCREF(_loop);
+  handle->_loop = _loop;
+  handle->_delaySeconds = delaySeconds;
+  handle->_repeat = repeat;
+  handle->_active = true;
+
+  if (!TimerQueue::forLoop(_loop, true)->schedule(handleId)) {
+    // RuntimeError: Non-thread-safe operation invoked on an event loop other than the current one.
+    // JS never gets the timeoutID, so the handle is freed right away without being ref'ed
+    handle->_active = false;
+    handle->release();
+    return 0;
   }
+  handle->addRef();
+  return handleId;
+}
+
+PyEventLoop::AsyncHandle::id_t PyEventLoop::enqueueImmediate(PyObject *jobFn) {
+  auto handleId = PyEventLoop::AsyncHandle::newEmpty();
   auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
+  Py_INCREF(jobFn);
+  handle->_jobFn = jobFn;
+  Py_INCREF(_loop);
+  handle->_loop = _loop;
+  handle->_active = true;
+  handle->_immediate = true;
+
+  if (!TimerQueue::forLoop(_loop, true)->scheduleImmediate(handleId)) {
+    // RuntimeError: Non-thread-safe operation invoked on an event loop other than the current one.
+    // JS never gets the timeoutID, so the handle is freed right away without being ref'ed
+    handle->_active = false;
+    handle->release();
+    return 0;
+  }
   handle->addRef();
   return handleId;
 }
 
+/* static */
+PyEventLoop::TimerQueue *PyEventLoop::TimerQueue::forLoop(PyObject *loop, bool create) {
+  for (TimerQueue *queue: _queues) { // there is rarely more than one event-loop with timers
+    if (queue->_loop == loop) {
+      return queue;
+    }
+  }
+  if (!create) {
+    return nullptr;
+  }
+
+  dropClosedLoops();
+  Py_INCREF(loop);
+  TimerQueue *queue = new TimerQueue(loop);
+  // `_clock_resolution` is not part of the public event-loop API, other implementations such as uvloop don't run timers early
+  //    see https://github.com/python/cpython/blob/v3.12.0/Lib/asyncio/base_events.py#L1922-L1929
+  PyObject *resolution = PyObject_GetAttrString(loop, "_clock_resolution");
+  if (resolution) {
+    queue->_clockResolution = PyFloat_AsDouble(resolution);
+    Py_DECREF(resolution);
+  }
+  if (!resolution || PyErr_Occurred()) {
+    PyErr_Clear();
+    queue->_clockResolution = 0;
+  }
+  _queues.push_back(queue);
+  return queue;
+}
+
+/* static */
+void PyEventLoop::TimerQueue::dropClosedLoops() {
+  PyObject *errType, *errValue, *traceback;
+  PyErr_Fetch(&errType, &errValue, &traceback); // could be called with an exception raised
+  size_t index = 0;
+  while (index < _queues.size()) {
+    TimerQueue *queue = _queues[index];
+    //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.is_closed
+    PyObject *closed = PyObject_CallMethod(queue->_loop, "is_closed", NULL);
+    if (!closed) {
+      PyErr_Clear();
+    }
+    if (closed != Py_True || queue->_running) {
+      Py_XDECREF(closed);
+      index++;
+      continue;
+    }
+    Py_DECREF(closed);
+    _queues.erase(_queues.begin() + index);
+    queue->_dropTimers();
+    delete queue;
+  }
+  PyErr_Restore(errType, errValue, traceback);
+}
+
+void PyEventLoop::TimerQueue::_dropTimers() {
+  std::vector<AsyncHandle::id_t> timerIds;
+  for (const Entry &entry: _heap) {
+    if (_isLive(entry)) {
+      timerIds.push_back(entry.timerId);
+    }
+  }
+  timerIds.insert(timerIds.end(), _immediates.begin(), _immediates.end());
+  _heap.clear();
+  _immediates.clear();
+  _liveCount = 0;
+
+  // The timers can never run, they are finished so that they no longer hold up the event-loop shield.
+  // `Timeout.refresh()` can still move them to a running event-loop.
+  for (AsyncHandle::id_t timerId: timerIds) {
+    AsyncHandle *timer = AsyncHandle::fromId(timerId);
+    if (!timer || timer->_loop != _loop) {
+      continue;
+    }
+    timer->_inQueue = false;
+    timer->_active = false;
+    timer->_uncount();
+    timer->_freeIfDone();
+  }
+
+  Py_CLEAR(_wakeup); // the event-loop is closed, its callbacks are never called
+  Py_CLEAR(_loop);
+}
+
+double PyEventLoop::TimerQueue::now() {
+  PyObject *time = PyObject_CallMethod(_loop, "time", NULL);
+  if (time) {
+    double seconds = PyFloat_AsDouble(time);
+    Py_DECREF(time);
+    if (!PyErr_Occurred()) {
+      _lastTime = seconds;
+    }
+  }
+  if (!time || PyErr_Occurred()) {
+    PyErr_Clear();
+  }
+  return _lastTime;
+}
+
+/**
+ * @brief Ordering of the heap entries, the earliest deadline goes on top
+ */
+static bool laterEntry(const PyEventLoop::TimerQueue::Entry &a, const PyEventLoop::TimerQueue::Entry &b) {
+  return a.deadline > b.deadline || (a.deadline == b.deadline && a.seq > b.seq);
+}
+
+/* static */
+bool PyEventLoop::TimerQueue::_isLive(const Entry &entry) {
+  AsyncHandle *timer = AsyncHandle::fromId(entry.timerId);
+  return timer && timer->_inQueue && timer->_seq == entry.seq;
+}
+
+bool PyEventLoop::TimerQueue::schedule(AsyncHandle::id_t timerId) {
+  AsyncHandle *timer = AsyncHandle::fromId(timerId);
+  if (timer->_inQueue) {
+    unschedule(*timer);
+  }
+  timer->_inQueue = true;
+  timer->_seq = _nextSeq++;
+  _heap.push_back({now() + timer->_delaySeconds, timer->_seq, timerId});
+  std::push_heap(_heap.begin(), _heap.end(), laterEntry);
+  _liveCount++;
+  if (!_running && !_arm()) { // `runDueTimers` arms the queue once it's done
+    unschedule(*timer);
+    return false;
+  }
+  return true;
+}
+
+void PyEventLoop::TimerQueue::unschedule(AsyncHandle &timer) {
+  if (!timer._inQueue) {
+    return;
+  }
+  timer._inQueue = false;
+  _liveCount--;
+
+  // Compact the heap once cancelled timers make up most of it, so that long timeouts cancelled early don't pile up
+  if (_heap.size() > 64 && _liveCount < _heap.size() / 2) {
+    _heap.erase(std::remove_if(_heap.begin(), _heap.end(), [](const Entry &entry) { return !_isLive(entry); }), _heap.end());
+    std::make_heap(_heap.begin(), _heap.end(), laterEntry);
+  }
+}
+
+void PyEventLoop::TimerQueue::_dropStaleTop() {
+  while (!_heap.empty() && !_isLive(_heap.front())) {
+    std::pop_heap(_heap.begin(), _heap.end(), laterEntry);
+    _heap.pop_back();
+  }
+}
+
+bool PyEventLoop::TimerQueue::_arm() {
+  _dropStaleTop();
+  if (_heap.empty()) {
+    if (_wakeup) {
+      Py_XDECREF(PyObject_CallMethod(_wakeup, "cancel", NULL));
+      Py_CLEAR(_wakeup);
+    }
+    if (!_immediates.empty() || _checkScheduled) {
+      return true; // the check phase still needs the queue
+    }
+    // No timers left, the event-loop can be released
+    _queues.erase(std::find(_queues.begin(), _queues.end(), this));
+    Py_DECREF(_loop);
+    delete this;
+    return true;
+  }
+
+  double deadline = _heap.front().deadline;
+  if (_wakeup) {
+    if (_wakeupDeadline <= deadline) {
+      return true; // the current wakeup comes first, the queue is armed again when it fires
+    }
+    Py_XDECREF(PyObject_CallMethod(_wakeup, "cancel", NULL));
+    Py_CLEAR(_wakeup);
+  }
+
+  // Schedule the wakeup to the Python event-loop, the deadline is already on its clock
+  //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_at
+  PyObject *callback = PyCFunction_New(&timerQueueWakeupDef, _loop);
+  _wakeup = PyObject_CallMethod(_loop, "call_at", "dO", deadline, callback); // https://docs.python.org/3/c-api/arg.html#c.Py_BuildValue
+  Py_DECREF(callback);
+  if (!_wakeup) {
+    return false; // RuntimeError
+  }
+  _wakeupDeadline = deadline;
+  return true;
+}
+
+bool PyEventLoop::TimerQueue::runDueTimers() {
+  Py_CLEAR(_wakeup); // we are the wakeup
+
+  // Timers scheduled while running, including repeating ones, wait for the next wakeup.
+  // As asyncio does for its own timer handles, timers within the clock resolution of their deadline are due,
+  // otherwise an early wakeup would find nothing due and keep re-arming until the clock catches up.
+  double batchTime = now() + _clockResolution;
+  uint64_t batchSeq = _nextSeq;
+  PyObject *errType = NULL, *errValue = NULL, *traceback = NULL;
+  _running = true;
+  while (errType == NULL) {
+    _dropStaleTop();
+    if (_heap.empty() || _heap.front().deadline > batchTime || _heap.front().seq >= batchSeq) {
+      break;
+    }
+    AsyncHandle::id_t timerId = _heap.front().timerId;
+    std::pop_heap(_heap.begin(), _heap.end(), laterEntry);
+    _heap.pop_back();
+
+    AsyncHandle *timer = AsyncHandle::fromId(timerId);
+    timer->_inQueue = false;
+    _liveCount--;
+
+    PyObject *jobFn = timer->_jobFn;
+    Py_INCREF(jobFn);
+    PyObject *ret = PyObject_CallObject(jobFn, NULL); // jobFn()
+    Py_XDECREF(ret); // don't care about its return value
+    Py_DECREF(jobFn);
+    if (!PyErr_Occurred()) {
+      // As in Node.js, the microtasks queued by a callback run before the next callback.
+      // If one fails, its exception is left on the Python error stack
+      JOB_QUEUE->drainJobs(GLOBAL_CX);
+    }
+    PyErr_Fetch(&errType, &errValue, &traceback); // we can't call any Python code unless the error indicator is clear
+
+    // The job function could have cancelled the timer, after which it may have been freed
+    timer = AsyncHandle::fromId(timerId);
+    if (!timer) {
+      continue;
+    }
+    if (timer->_inQueue) {
+      // already rescheduled by the job function, with `Timeout.refresh()`
+    } else if (timer->_repeat && timer->_active) {
+      schedule(timerId);
+    } else { // the one-shot timer is done, it stayed counted until the job function returned so the event-loop shield stays up
+      timer->_active = false;
+      timer->_uncount();
+      timer->_freeIfDone();
+    }
+  }
+  _running = false;
+
+  if (!_arm()) { // could destroy this queue
+    PyErr_Print();
+  }
+  if (errType != NULL) { // the job function raised, let the event-loop report it
+    PyErr_Restore(errType, errValue, traceback);
+    return false;
+  }
+  return true;
+}
+
 PyEventLoop::Future PyEventLoop::createFuture() {
   //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.create_future
   PyObject *futureObj = PyObject_CallMethod(_loop, "create_future", NULL);
@@ -104,9 +439,6 @@ PyEventLoop::Future PyEventLoop::createFuture() {
 }
 
 PyEventLoop::Future PyEventLoop::ensureFuture(PyObject *awaitable) {
-  PyObject *asyncio = PyImport_ImportModule("asyncio");
-
-  PyObject *ensure_future_fn = PyObject_GetAttrString(asyncio, "ensure_future"); // ensure_future_fn = asyncio.ensure_future
   // instead of a simpler `PyObject_CallMethod`, only the `PyObject_Call` API function can be used here because `loop` is a keyword-only argument
   //    see https://docs.python.org/3.9/library/asyncio-future.html#asyncio.ensure_future
   //        https://docs.python.org/3/c-api/call.html#object-calling-api
@@ -114,11 +446,9 @@ PyEventLoop::Future PyEventLoop::ensureFuture(PyObject *awaitable) {
   PyTuple_SetItem(args, 0, awaitable);
   PyObject *kwargs = PyDict_New();
   PyDict_SetItemString(kwargs, "loop", _loop);
-  PyObject *futureObj = PyObject_Call(ensure_future_fn, args, kwargs); // futureObj = ensure_future_fn(awaitable, loop=_loop)
+  PyObject *futureObj = PyObject_Call(_ensureFutureFn, args, kwargs); // futureObj = asyncio.ensure_future(awaitable, loop=_loop)
 
   // clean up
-  Py_DECREF(asyncio);
-  Py_DECREF(ensure_future_fn);
   Py_DECREF(args);
   Py_DECREF(kwargs);
 
@@ -126,6 +456,22 @@ PyEventLoop::Future PyEventLoop::ensureFuture(PyObject *awaitable) {
   return PyEventLoop::Future(futureObj);
 }
 
+/* static */
+bool PyEventLoop::init() {
+  PyObject *asyncio = PyImport_ImportModule("asyncio");
+  if (!asyncio) {
+    return false;
+  }
+  _ensureFutureFn = PyObject_GetAttrString(asyncio, "ensure_future");
+  Py_DECREF(asyncio);
+  if (!_ensureFutureFn) {
+    return false;
+  }
+
+  _runningLoopKey = PyUnicode_InternFromString("__asyncio_running_event_loop__");
+  return _runningLoopKey != nullptr;
+}
+
 /* static */
 PyEventLoop PyEventLoop::_loopNotFound() {
   PyErr_SetString(PyExc_RuntimeError, "PythonMonkey cannot find a running Python event-loop to make asynchronous calls.");
@@ -133,7 +479,7 @@ PyEventLoop PyEventLoop::_loopNotFound() {
 }
 
 /* static */
-PyEventLoop PyEventLoop::_getLoopOnThread(PyThreadState *tstate) {
+PyObject *PyEventLoop::_getRunningLoopObject(PyThreadState *tstate) {
   // Modified from Python 3.9 `get_running_loop` https://github.com/python/cpython/blob/7cb3a44/Modules/_asynciomodule.c#L241-L278
   #if PY_VERSION_HEX >= 0x03090000 // Python version is greater than 3.9
   PyObject *ts_dict = _PyThreadState_GetDict(tstate);  // borrowed reference
@@ -141,14 +487,16 @@ PyEventLoop PyEventLoop::_getLoopOnThread(PyThreadState *tstate) {
   PyObject *ts_dict = tstate->dict; // see https://github.com/python/cpython/blob/v3.8.17/Modules/_asynciomodule.c#L244-L245
   #endif
   if (ts_dict == NULL) {
-    return _loopNotFound();
+    return nullptr;
   }
 
-  // TODO: Python `get_running_loop` caches the PyRunningLoopHolder, should we do it as well for the main thread?
+  // Python `get_running_loop` caches the PyRunningLoopHolder, but relies on `_set_running_loop` to invalidate its cache,
+  // which we cannot hook into. The lookup itself is kept cheap instead, with an interned key whose hash is cached.
   //    see https://github.com/python/cpython/blob/7cb3a44/Modules/_asynciomodule.c#L234-L239
-  PyObject *rl = PyDict_GetItemString(ts_dict, "__asyncio_running_event_loop__");  // borrowed reference
+  PyObject *rl = PyDict_GetItemWithError(ts_dict, _runningLoopKey);  // borrowed reference
   if (rl == NULL) {
-    return _loopNotFound();
+    PyErr_Clear();
+    return nullptr;
   }
 
 #if PY_VERSION_HEX < 0x030c0000 // Python version is less than 3.12
@@ -164,6 +512,15 @@ PyEventLoop PyEventLoop::_getLoopOnThread(PyThreadState *tstate) {
   PyObject *running_loop = rl;
 #endif
   if (running_loop == Py_None) {
+    return nullptr;
+  }
+  return running_loop;
+}
+
+/* static */
+PyEventLoop PyEventLoop::_getLoopOnThread(PyThreadState *tstate) {
+  PyObject *running_loop = _getRunningLoopObject(tstate);
+  if (!running_loop) {
     return _loopNotFound();
   }
 
@@ -173,6 +530,11 @@ PyEventLoop PyEventLoop::_getLoopOnThread(PyThreadState *tstate) {
 
 /* static */
 PyThreadState *PyEventLoop::_getMainThread() {
+  // The main thread state lives as long as the interpreter, so the linked-list of threads is only walked once
+  if (_mainThread) {
+    return _mainThread;
+  }
+
   // The last element in the linked-list of threads associated with the main interpreter should be the main thread
   // (The first element is the current thread, see https://github.com/python/cpython/blob/7cb3a44/Python/pystate.c#L291-L293)
   PyInterpreterState *interp = PyInterpreterState_Main();
@@ -180,6 +542,7 @@ PyThreadState *PyEventLoop::_getMainThread() {
   while (PyThreadState_Next(tstate) != nullptr) {
     tstate = PyThreadState_Next(tstate);
   }
+  _mainThread = tstate;
   return tstate;
 }
 
@@ -200,9 +563,100 @@ PyEventLoop PyEventLoop::getRunningLoop() {
   return _getLoopOnThread(_getCurrentThread());
 }
 
+bool PyEventLoop::TimerQueue::scheduleImmediate(AsyncHandle::id_t timerId) {
+  _immediates.push_back(timerId);
+  if (!_checkScheduled && !_scheduleCheckPhase()) { // the job joins the pending check phase if there is one
+    _immediates.pop_back();
+    return false;
+  }
+  return true;
+}
+
+bool PyEventLoop::TimerQueue::_scheduleCheckPhase() {
+  // `call_later` with no delay rather than `call_soon`, so that the callbacks already scheduled with `call_soon`, such as the microtask checkpoint, run first.
+  // The event-loop moves its due timers behind the ready callbacks on every iteration.
+  //    https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.loop.call_later
+  PyObject *callback = PyCFunction_New(&timerQueueCheckPhaseDef, _loop);
+  PyObject *asyncHandle = PyObject_CallMethod(_loop, "call_later", "dO", 0.0, callback);
+  Py_DECREF(callback);
+  if (!asyncHandle) {
+    return false; // RuntimeError
+  }
+  Py_DECREF(asyncHandle);
+  _checkScheduled = true;
+  return true;
+}
+
+bool PyEventLoop::TimerQueue::runImmediates() {
+  _checkScheduled = false; // immediate jobs scheduled from now on go to the next check phase
+
+  std::vector<AsyncHandle::id_t> batch;
+  std::swap(batch, _immediates);
+  PyObject *errType = NULL, *errValue = NULL, *traceback = NULL;
+  size_t index = 0;
+  while (index < batch.size() && errType == NULL) {
+    AsyncHandle::id_t timerId = batch[index++];
+    AsyncHandle *immediate = AsyncHandle::fromId(timerId);
+    if (!immediate || !immediate->_active) {
+      continue; // cancelled
+    }
+
+    PyObject *jobFn = immediate->_jobFn;
+    Py_INCREF(jobFn);
+    PyObject *ret = PyObject_CallObject(jobFn, NULL); // jobFn()
+    Py_XDECREF(ret); // don't care about its return value
+    Py_DECREF(jobFn);
+    if (!PyErr_Occurred()) {
+      // As in Node.js, the microtasks queued by a callback run before the next callback.
+      // If one fails, its exception is left on the Python error stack
+      JOB_QUEUE->drainJobs(GLOBAL_CX);
+    }
+    PyErr_Fetch(&errType, &errValue, &traceback); // we can't call any Python code unless the error indicator is clear
+
+    // The job function could have cancelled the immediate job, after which it may have been freed
+    immediate = AsyncHandle::fromId(timerId);
+    if (immediate) {
+      immediate->_active = false;
+      immediate->_uncount();
+      immediate->_freeIfDone();
+    }
+  }
+
+  if (index < batch.size()) { // the jobs not run yet go before the ones scheduled by this batch
+    _immediates.insert(_immediates.begin(), batch.begin() + index, batch.end());
+  }
+  if (!_immediates.empty() && !_checkScheduled && !_scheduleCheckPhase()) {
+    PyErr_Print();
+  }
+  if (!_arm()) { // could destroy this queue if no timers or immediate jobs are left
+    PyErr_Print();
+  }
+
+  if (errType != NULL) { // the job function raised, let the event-loop report it
+    PyErr_Restore(errType, errValue, traceback);
+    return false;
+  }
+  return true;
+}
+
 void PyEventLoop::AsyncHandle::cancel() {
-  if (!_finishedOrCancelled()) {
-    removeRef(); // automatically unref at finish
+  _uncount(); // the ref state asked for is kept, as for a finished timer
+
+  if (_jobFn) { // a JS timer in the `TimerQueue`
+    if (_active) {
+      _active = false;
+      _cancelled = true;
+    }
+    TimerQueue *queue = TimerQueue::forLoop(_loop, false);
+    if (queue) {
+      queue->unschedule(*this);
+    }
+    _freeIfDone();
+    return;
+  }
+
+  if (!_handle) { // a job sharing the wakeup of other jobs sent from another thread, which can't be cancelled on its own
+    return;
   }
 
   // https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.Handle.cancel
@@ -210,7 +664,45 @@ void PyEventLoop::AsyncHandle::cancel() {
   Py_XDECREF(ret);
 }
 
+bool PyEventLoop::AsyncHandle::refresh() {
+  if (!_jobFn || _immediate || _cancelled) {
+    return true;
+  }
+
+  // The timer moves to the running event-loop, its own one may have stopped (a timer from an earlier `asyncio.run`)
+  PyEventLoop loop = PyEventLoop::getRunningLoop();
+  if (!loop.initialized()) {
+    return false;
+  }
+  if (loop._loop != _loop) {
+    TimerQueue *oldQueue = TimerQueue::forLoop(_loop, false);
+    if (oldQueue) {
+      oldQueue->unschedule(*this);
+    }
+    Py_INCREF(loop._loop);
+    Py_SETREF(_loop, loop._loop);
+  }
+
+  // The old entry of the timer in the heap becomes stale, no new handle or job function wrapper is created
+  if (!TimerQueue::forLoop(_loop, true)->schedule(_id)) {
+    return false;
+  }
+
+  if (!_active) { // the timer has already run, only counted again once it is scheduled so that the event-loop shield can't get stuck
+    _active = true;
+    _countIfRefed(); // as in Node.js, the timer keeps its ref state
+  }
+  return true;
+}
+
 bool PyEventLoop::AsyncHandle::cancelled() {
+  if (_jobFn) {
+    return _cancelled;
+  }
+  if (!_handle) { // a job sharing the wakeup of other jobs sent from another thread is never cancelled
+    return false;
+  }
+
   // https://docs.python.org/3/library/asyncio-eventloop.html#asyncio.Handle.cancelled
   PyObject *ret = PyObject_CallMethod(_handle, "cancelled", NULL); // returns Python bool
   bool cancelled = ret == Py_True;
@@ -218,7 +710,33 @@ bool PyEventLoop::AsyncHandle::cancelled() {
   return cancelled;
 }
 
+void PyEventLoop::AsyncHandle::release() {
+  _released = true;
+  _freeIfDone();
+}
+
+void PyEventLoop::AsyncHandle::_freeIfDone() {
+  if (!_released || _active || _inQueue || !_id) {
+    return;
+  }
+
+  size_t slot = (_id & 0xFFFFFFFF) - 1;
+  _generations[slot] = (_generations[slot] + 1) & 0x1FFFFF; // timeoutIDs must stay exact as JS numbers, under 2^53
+  _freeSlots.push_back(slot);
+  _id = 0;
+
+  removeRef(); // freed handles are never ref'ed
+  Py_CLEAR(_handle);
+  Py_CLEAR(_debugInfo);
+  Py_CLEAR(_jobFn);
+  Py_CLEAR(_loop);
+}
+
 bool PyEventLoop::AsyncHandle::_finishedOrCancelled() {
+  if (_jobFn) {
+    return !_active;
+  }
+
   PyObject *scheduled = PyObject_GetAttrString(_handle, "_scheduled"); // this attribute only exists on asyncio.TimerHandle returned by loop.call_later
                                                                        // NULL if no such attribute (on a strict asyncio.Handle returned by loop.call_soon)
   bool notScheduled = scheduled && scheduled == Py_False; // not scheduled means the job function has already been executed or canceled
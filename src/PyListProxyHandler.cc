@@ -55,7 +55,7 @@ static bool makeNewPyMethod(JSContext *cx, JS::MutableHandleValue function, JS::
 static bool array_reverse(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "reverse"));
   if (!proxy) {
     return false;
   }
@@ -75,7 +75,7 @@ static bool array_reverse(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_pop(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "pop"));
   if (!proxy) {
     return false;
   }
@@ -102,7 +102,7 @@ static bool array_pop(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_push(JSContext *cx, unsigned argc, JS::Value *vp) { // surely the function name is in there...review JSAPI examples
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "push"));
   if (!proxy) {
     return false;
   }
@@ -127,7 +127,7 @@ static bool array_push(JSContext *cx, unsigned argc, JS::Value *vp) { // surely
 static bool array_shift(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "shift"));
   if (!proxy) {
     return false;
   }
@@ -155,7 +155,7 @@ static bool array_shift(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_unshift(JSContext *cx, unsigned argc, JS::Value *vp) { // surely the function name is in there...review JSAPI examples
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "unshift"));
   if (!proxy) {
     return false;
   }
@@ -197,7 +197,7 @@ static bool array_slice(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "slice"));
   if (!proxy) {
     return false;
   }
@@ -242,7 +242,7 @@ static bool array_indexOf(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "indexOf"));
   if (!proxy) {
     return false;
   }
@@ -297,7 +297,7 @@ static bool array_indexOf(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_splice(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "splice"));
   if (!proxy) {
     return false;
   }
@@ -384,7 +384,7 @@ static bool array_fill(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "fill"));
   if (!proxy) {
     return false;
   }
@@ -448,7 +448,7 @@ static bool array_fill(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_copyWithin(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "copyWithin"));
   if (!proxy) {
     return false;
   }
@@ -543,7 +543,7 @@ static bool array_copyWithin(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_concat(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "concat"));
   if (!proxy) {
     return false;
   }
@@ -615,7 +615,7 @@ static bool array_lastIndexOf(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "lastIndexOf"));
   if (!proxy) {
     return false;
   }
@@ -692,7 +692,7 @@ static bool array_forEach(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "forEach"));
   if (!proxy) {
     return false;
   }
@@ -753,7 +753,7 @@ static bool array_map(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "map"));
   if (!proxy) {
     return false;
   }
@@ -820,7 +820,7 @@ static bool array_filter(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "filter"));
   if (!proxy) {
     return false;
   }
@@ -892,7 +892,7 @@ static bool array_reduce(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "reduce"));
   if (!proxy) {
     return false;
   }
@@ -948,7 +948,7 @@ static bool array_reduceRight(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "reduceRight"));
   if (!proxy) {
     return false;
   }
@@ -1002,7 +1002,7 @@ static bool array_some(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "some"));
   if (!proxy) {
     return false;
   }
@@ -1067,7 +1067,7 @@ static bool array_every(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "every"));
   if (!proxy) {
     return false;
   }
@@ -1132,7 +1132,7 @@ static bool array_find(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "find"));
   if (!proxy) {
     return false;
   }
@@ -1198,7 +1198,7 @@ static bool array_findIndex(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "findIndex"));
   if (!proxy) {
     return false;
   }
@@ -1421,7 +1421,7 @@ static uint32_t FlattenIntoArrayWithCallBack(JSContext *cx,
 static bool array_flat(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "flat"));
   if (!proxy) {
     return false;
   }
@@ -1452,7 +1452,7 @@ static bool array_flatMap(JSContext *cx, unsigned argc, JS::Value *vp) {
     return false;
   }
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "flatMap"));
   if (!proxy) {
     return false;
   }
@@ -1499,7 +1499,7 @@ static bool array_flatMap(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_join(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "join"));
   if (!proxy) {
     return false;
   }
@@ -1560,7 +1560,7 @@ static bool array_toString(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_toLocaleString(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "toLocaleString"));
   if (!proxy) {
     return false;
   }
@@ -1613,7 +1613,7 @@ static bool array_toLocaleString(JSContext *cx, unsigned argc, JS::Value *vp) {
 static bool array_valueOf(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "valueOf"));
   if (!proxy) {
     return false;
   }
@@ -1740,7 +1740,7 @@ static bool js_sort_compare_default(JSContext *cx, unsigned argc, JS::Value *vp)
 static bool array_sort(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", "sort"));
   if (!proxy) {
     return false;
   }
@@ -1913,7 +1913,7 @@ static bool DefineListIterator(JSContext *cx, JS::HandleObject global) {
 static bool array_iterator_func(JSContext *cx, unsigned argc, JS::Value *vp, int itemKind) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
 
-  JS::RootedObject proxy(cx, JS::ToObject(cx, args.thisv()));
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PyListProxyHandler::family, "Array", itemKind == ITEM_KIND_KEY ? "keys" : itemKind == ITEM_KIND_VALUE ? "values" : "entries"));
   if (!proxy) {
     return false;
   }
@@ -1998,32 +1998,32 @@ static JSMethodDef array_methods[] = {
 };
 
 
+JSObject *PyListProxyHandler::getCachedPrototype(JSContext *cx) {
+  JS::RootedObject global(cx, JS::CurrentGlobalOrNull(cx));
+  JS::Value cachedPrototype = JS::GetReservedSlot(global, PyListPrototypeSlot);
+  if (cachedPrototype.isObject()) {
+    return &cachedPrototype.toObject();
+  }
+
+  JS::RootedObject prototype(cx, newProxyPrototype(cx, JSProto_Array, array_methods));
+  if (!prototype) {
+    return nullptr;
+  }
+
+  JS::RootedId iteratorId(cx, JS::GetWellKnownSymbolKey(cx, JS::SymbolCode::iterator));
+  if (!JS_DefineFunctionById(cx, prototype, iteratorId, array_values, 0, 0)) {
+    return nullptr;
+  }
+
+  JS::SetReservedSlot(global, PyListPrototypeSlot, JS::ObjectValue(*prototype));
+  return prototype;
+}
+
 bool PyListProxyHandler::getOwnPropertyDescriptor(
   JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
   JS::MutableHandle<mozilla::Maybe<JS::PropertyDescriptor>> desc
 ) const {
-  // see if we're calling a function
-  if (id.isString()) {
-    for (size_t index = 0;; index++) {
-      bool isThatFunction;
-      const char *methodName = array_methods[index].name;
-      if (methodName == NULL) {   // reached end of list
-        break;
-      }
-      else if (JS_StringEqualsAscii(cx, id.toString(), methodName, &isThatFunction) && isThatFunction) {
-        JSFunction *newFunction = JS_NewFunction(cx, array_methods[index].call, array_methods[index].nargs, 0, NULL);
-        if (!newFunction) return false;
-        JS::RootedObject funObj(cx, JS_GetFunctionObject(newFunction));
-        desc.set(mozilla::Some(
-          JS::PropertyDescriptor::Data(
-            JS::ObjectValue(*funObj),
-            {JS::PropertyAttribute::Enumerable}
-          )
-        ));
-        return true;
-      }
-    }
-  }
+  // methods, "constructor" and [Symbol.iterator] are found on the prototype chain, see PyListProxyHandler::getCachedPrototype
 
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   // "length" property
@@ -2037,50 +2037,6 @@ bool PyListProxyHandler::getOwnPropertyDescriptor(
     return true;
   }
 
-  // "constructor" property
-  bool isConstructorProperty;
-  if (id.isString() && JS_StringEqualsLiteral(cx, id.toString(), "constructor", &isConstructorProperty) && isConstructorProperty) {
-    JS::RootedObject global(cx, JS::GetNonCCWObjectGlobal(proxy));
-
-    JS::RootedObject rootedArrayPrototype(cx);
-    if (!JS_GetClassPrototype(cx, JSProto_Array, &rootedArrayPrototype)) {
-      return false;
-    }
-
-    JS::RootedValue Array_Prototype_Constructor(cx);
-    if (!JS_GetProperty(cx, rootedArrayPrototype, "constructor", &Array_Prototype_Constructor)) {
-      return false;
-    }
-
-    JS::RootedObject rootedArrayPrototypeConstructor(cx, Array_Prototype_Constructor.toObjectOrNull());
-
-    desc.set(mozilla::Some(
-      JS::PropertyDescriptor::Data(
-        JS::ObjectValue(*rootedArrayPrototypeConstructor),
-        {JS::PropertyAttribute::Enumerable}
-      )
-    ));
-    return true;
-  }
-
-  // symbol property
-  if (id.isSymbol()) {
-    JS::RootedSymbol rootedSymbol(cx, id.toSymbol());
-
-    if (JS::GetSymbolCode(rootedSymbol) == JS::SymbolCode::iterator) {
-      JSFunction *newFunction = JS_NewFunction(cx, array_values, 0, 0, NULL);
-      if (!newFunction) return false;
-      JS::RootedObject funObj(cx, JS_GetFunctionObject(newFunction));
-      desc.set(mozilla::Some(
-        JS::PropertyDescriptor::Data(
-          JS::ObjectValue(*funObj),
-          {JS::PropertyAttribute::Enumerable}
-        )
-      ));
-      return true;
-    }
-  }
-
   // item
   Py_ssize_t index;
   PyObject *item;
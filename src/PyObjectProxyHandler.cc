@@ -9,6 +9,7 @@
  */
 
 #include "include/PyObjectProxyHandler.hh"
+#include "include/PyDictProxyHandler.hh"
 
 #include "include/jsTypeFactory.hh"
 #include "include/pyTypeFactory.hh"
@@ -42,6 +43,12 @@ bool PyObjectProxyHandler::object_valueOf(JSContext *cx, unsigned argc, JS::Valu
   if (!proxy) {
     return false;
   }
+  // also on the shared dict prototype, so `this` can be any object
+  const void *family = js::IsProxy(proxy) ? js::GetProxyHandler(proxy)->family() : nullptr;
+  if (family != &PyObjectProxyHandler::family && family != &PyDictProxyHandler::family) {
+    reportIncompatibleThis(cx, args, "Object", "valueOf");
+    return false;
+  }
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
 
   // return ref to self
@@ -140,7 +147,10 @@ bool PyObjectProxyHandler::ownPropertyKeys(JSContext *cx, JS::HandleObject proxy
 
 bool PyObjectProxyHandler::delete_(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
   JS::ObjectOpResult &result) const {
-  PyObject *attrName = idToKey(cx, id);
+  PyObject *attrName = idToAttrName(cx, id);
+  if (!attrName) {
+    return false;
+  }
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   if (PyObject_SetAttr(self, attrName, NULL) < 0) {
     return result.failCantDelete(); // raises JS exception
@@ -157,7 +167,10 @@ bool PyObjectProxyHandler::getOwnPropertyDescriptor(
   JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
   JS::MutableHandle<mozilla::Maybe<JS::PropertyDescriptor>> desc
 ) const {
-  PyObject *attrName = idToKey(cx, id);
+  PyObject *attrName = idToAttrName(cx, id);
+  if (!attrName) {
+    return false;
+  }
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   PyObject *item = PyObject_GetAttr(self, attrName);
   if (!item) { // clear error, we will be returning undefined in this case
@@ -171,7 +184,10 @@ bool PyObjectProxyHandler::set(JSContext *cx, JS::HandleObject proxy, JS::Handle
   JS::HandleValue v, JS::HandleValue receiver,
   JS::ObjectOpResult &result) const {
   JS::RootedValue rootedV(cx, v);
-  PyObject *attrName = idToKey(cx, id);
+  PyObject *attrName = idToAttrName(cx, id);
+  if (!attrName) {
+    return false;
+  }
 
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   PyObject *value = pyTypeFactory(cx, rootedV);
@@ -190,7 +206,10 @@ bool PyObjectProxyHandler::enumerate(JSContext *cx, JS::HandleObject proxy,
 
 bool PyObjectProxyHandler::hasOwn(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
   bool *bp) const {
-  PyObject *attrName = idToKey(cx, id);
+  PyObject *attrName = idToAttrName(cx, id);
+  if (!attrName) {
+    return false;
+  }
   PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
   *bp = PyObject_HasAttr(self, attrName) == 1;
   return true;
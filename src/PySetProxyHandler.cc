@@ -0,0 +1,333 @@
+/**
+ * @file PySetProxyHandler.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for creating JS proxy objects for python sets
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/PySetProxyHandler.hh"
+
+#include "include/jsTypeFactory.hh"
+#include "include/pyTypeFactory.hh"
+
+#include <jsapi.h>
+#include <jsfriendapi.h>
+#include <js/Proxy.h>
+#include <js/Symbol.h>
+
+#include <Python.h>
+
+
+
+const char PySetProxyHandler::family = 0;
+
+/**
+ * @brief Convert the first argument of a Set method to the python object it would be stored as in the python set
+ *
+ * @return PyObject* - new reference, or NULL if a JS exception has been raised
+ */
+static PyObject *getElementArgument(JSContext *cx, JS::CallArgs &args) {
+  PyObject *element = pyTypeFactory(cx, args.get(0));
+  if (!element) {
+    setPyException(cx);
+  }
+  return element;
+}
+
+static bool checkMutable(JSContext *cx, PyObject *self) {
+  if (PyFrozenSet_Check(self)) {
+    JS_ReportErrorASCII(cx, "cannot modify a python frozenset");
+    return false;
+  }
+  return true;
+}
+
+static bool set_has(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "has"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+
+  PyObject *element = getElementArgument(cx, args);
+  if (!element) {
+    return false;
+  }
+  int contains = PySet_Contains(self, element);
+  Py_DECREF(element);
+  if (contains < 0) {
+    setPyException(cx);
+    return false;
+  }
+
+  args.rval().setBoolean(contains);
+  return true;
+}
+
+static bool set_add(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "add"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+  if (!checkMutable(cx, self)) {
+    return false;
+  }
+
+  PyObject *element = getElementArgument(cx, args);
+  if (!element) {
+    return false;
+  }
+  int result = PySet_Add(self, element);
+  Py_DECREF(element);
+  if (result < 0) {
+    setPyException(cx);
+    return false;
+  }
+
+  args.rval().setObject(*proxy); // return the set itself, for chaining
+  return true;
+}
+
+static bool set_delete(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "delete"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+  if (!checkMutable(cx, self)) {
+    return false;
+  }
+
+  PyObject *element = getElementArgument(cx, args);
+  if (!element) {
+    return false;
+  }
+  int deleted = PySet_Discard(self, element);
+  Py_DECREF(element);
+  if (deleted < 0) {
+    setPyException(cx);
+    return false;
+  }
+
+  args.rval().setBoolean(deleted);
+  return true;
+}
+
+static bool set_clear(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "clear"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+  if (!checkMutable(cx, self)) {
+    return false;
+  }
+
+  if (PySet_Clear(self) < 0) {
+    setPyException(cx);
+    return false;
+  }
+
+  args.rval().setUndefined();
+  return true;
+}
+
+static bool set_forEach(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  if (!args.requireAtLeast(cx, "forEach", 1)) {
+    return false;
+  }
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "forEach"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+
+  JS::RootedValue callBack(cx, args[0]);
+  if (!callBack.isObject() || !JS::IsCallable(&callBack.toObject())) {
+    JS_ReportErrorASCII(cx, "forEach: callback is not a function");
+    return false;
+  }
+  JS::RootedValue thisArg(cx, args.get(1));
+
+  // iterate over a snapshot, since python sets can't be modified during iteration
+  PyObject *elements = PySequence_List(self);
+  if (!elements) {
+    setPyException(cx);
+    return false;
+  }
+
+  JS::RootedValueArray<3> jArgs(cx);
+  JS::RootedValue rval(cx);
+  Py_ssize_t length = PyList_GET_SIZE(elements);
+  for (Py_ssize_t index = 0; index < length; index++) {
+    JS::RootedValue element(cx, jsTypeFactory(cx, PyList_GET_ITEM(elements, index)));
+    jArgs[0].set(element);
+    jArgs[1].set(element);
+    jArgs[2].setObject(*proxy);
+    if (!JS::Call(cx, thisArg, callBack, jArgs, &rval)) {
+      Py_DECREF(elements);
+      return false;
+    }
+  }
+  Py_DECREF(elements);
+
+  args.rval().setUndefined();
+  return true;
+}
+
+static bool set_values(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "values"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+
+  PyObject *iterator = PyObject_GetIter(self);
+  if (!iterator) {
+    setPyException(cx);
+    return false;
+  }
+  args.rval().set(jsTypeFactory(cx, iterator)); // a JS iterator over the python iterator, see PyIterableProxyHandler
+  Py_DECREF(iterator);
+  return true;
+}
+
+static bool set_entries(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+
+  JS::RootedObject proxy(cx, getThisProxy(cx, args, &PySetProxyHandler::family, "Set", "entries"));
+  if (!proxy) {
+    return false;
+  }
+  PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+
+  PyObject *elements = PySequence_List(self);
+  if (!elements) {
+    setPyException(cx);
+    return false;
+  }
+
+  // [value, value] pairs, as for JS Sets
+  Py_ssize_t length = PyList_GET_SIZE(elements);
+  JS::RootedObject entries(cx, JS::NewArrayObject(cx, length));
+  if (!entries) {
+    Py_DECREF(elements);
+    return false;
+  }
+  for (Py_ssize_t index = 0; index < length; index++) {
+    JS::RootedValueArray<2> pair(cx);
+    pair[0].set(jsTypeFactory(cx, PyList_GET_ITEM(elements, index)));
+    pair[1].set(pair[0]);
+    JS::RootedObject entry(cx, JS::NewArrayObject(cx, pair));
+    if (!entry || !JS_DefineElement(cx, entries, index, entry, JSPROP_ENUMERATE)) {
+      Py_DECREF(elements);
+      return false;
+    }
+  }
+  Py_DECREF(elements);
+
+  return JS_CallFunctionName(cx, entries, "values", JS::HandleValueArray::empty(), args.rval());
+}
+
+static JSMethodDef set_methods[] = {
+  {"has", set_has, 1},
+  {"add", set_add, 1},
+  {"delete", set_delete, 1},
+  {"clear", set_clear, 0},
+  {"forEach", set_forEach, 1},
+  {"values", set_values, 0},
+  {"keys", set_values, 0},
+  {"entries", set_entries, 0},
+  {NULL, NULL, 0}
+};
+
+JSObject *PySetProxyHandler::getCachedPrototype(JSContext *cx) {
+  JS::RootedObject global(cx, JS::CurrentGlobalOrNull(cx));
+  JS::Value cachedPrototype = JS::GetReservedSlot(global, PySetPrototypeSlot);
+  if (cachedPrototype.isObject()) {
+    return &cachedPrototype.toObject();
+  }
+
+  JS::RootedObject prototype(cx, newProxyPrototype(cx, JSProto_Set, set_methods));
+  if (!prototype) {
+    return nullptr;
+  }
+
+  JS::RootedId iteratorId(cx, JS::GetWellKnownSymbolKey(cx, JS::SymbolCode::iterator));
+  if (!JS_DefineFunctionById(cx, prototype, iteratorId, set_values, 0, 0)) {
+    return nullptr;
+  }
+
+  JS::SetReservedSlot(global, PySetPrototypeSlot, JS::ObjectValue(*prototype));
+  return prototype;
+}
+
+static bool isSizeProperty(JSContext *cx, JS::HandleId id) {
+  bool isSize;
+  return id.isString() && JS_StringEqualsLiteral(cx, id.toString(), "size", &isSize) && isSize;
+}
+
+bool PySetProxyHandler::ownPropertyKeys(JSContext *cx, JS::HandleObject proxy, JS::MutableHandleIdVector props) const {
+  return true; // no own enumerable properties, like a JS Set
+}
+
+bool PySetProxyHandler::delete_(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+  JS::ObjectOpResult &result) const {
+  if (isSizeProperty(cx, id)) {
+    return result.failCantDelete();
+  }
+  return result.succeed();
+}
+
+bool PySetProxyHandler::has(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+  bool *bp) const {
+  return js::BaseProxyHandler::has(cx, proxy, id, bp);
+}
+
+bool PySetProxyHandler::set(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+  JS::HandleValue v, JS::HandleValue receiver,
+  JS::ObjectOpResult &result) const {
+  return result.failReadOnly();
+}
+
+bool PySetProxyHandler::hasOwn(JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+  bool *bp) const {
+  *bp = isSizeProperty(cx, id);
+  return true;
+}
+
+bool PySetProxyHandler::getOwnPropertyDescriptor(
+  JSContext *cx, JS::HandleObject proxy, JS::HandleId id,
+  JS::MutableHandle<mozilla::Maybe<JS::PropertyDescriptor>> desc
+) const {
+  // methods and [Symbol.iterator] are found on the prototype chain, see PySetProxyHandler::getCachedPrototype
+  if (isSizeProperty(cx, id)) {
+    PyObject *self = JS::GetMaybePtrFromReservedSlot<PyObject>(proxy, PyObjectSlot);
+    desc.set(mozilla::Some(
+      JS::PropertyDescriptor::Data(
+        JS::NumberValue(PySet_Size(self)),
+        {}
+      )
+    ));
+  } else {
+    desc.set(mozilla::Nothing());
+  }
+  return true;
+}
@@ -0,0 +1,25 @@
+/**
+ * @file SetType.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Sets in python
+ * @date 2024-05-29
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/SetType.hh"
+
+#include "include/JSSetProxy.hh"
+
+#include <jsapi.h>
+
+#include <Python.h>
+
+PyObject *SetType::getPyObject(JSContext *cx, JS::HandleObject setObj) {
+  JSSetProxy *proxy = PyObject_New(JSSetProxy, &JSSetProxyType);
+  if (proxy != NULL) {
+    proxy->jsSet = new JS::PersistentRootedObject(cx, setObj);
+  }
+  return (PyObject *)proxy;
+}
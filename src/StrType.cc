@@ -10,6 +10,7 @@
 
 #include "include/StrType.hh"
 #include "include/JSStringProxy.hh"
+#include "include/setSpiderMonkeyException.hh"
 
 #include <jsapi.h>
 #include <js/String.h>
@@ -102,12 +103,16 @@ static PyObject *processString(JSContext *cx, JSString *str) {
   size_t length = JS::GetLinearStringLength(lstr);
 
   PyObject *pyObject = (PyObject *)PyObject_New(JSStringProxy, &JSStringProxyType); // new reference
-  Py_INCREF(pyObject);
+  if (!pyObject) {
+    return NULL;
+  }
 
-  ((JSStringProxy *)pyObject)->jsString.setString((JSString *)lstr);
+  ((JSStringProxy *)pyObject)->jsString = acquireJSStringRoot(cx, (JSString *)lstr); // keeps the character data alive, released in tp_dealloc
 
   // Initialize as legacy string (https://github.com/python/cpython/blob/v3.12.0b1/Include/cpython/unicodeobject.h#L78-L93)
   // see https://github.com/python/cpython/blob/v3.11.3/Objects/unicodeobject.c#L1230-L1245
+  // python computes the hash and the UTF-8 encoding (straight from the latin1/UCS2 data) on first use and caches them in these fields,
+  // the UTF-8 buffer is freed in JSStringProxy_dealloc
   PY_UNICODE_OBJECT_HASH(pyObject) = -1;
   PY_UNICODE_OBJECT_STATE(pyObject).interned = 0;
   PY_UNICODE_OBJECT_STATE(pyObject).compact = 0;
@@ -170,9 +175,26 @@ PyObject *StrType::getPyObject(JSContext *cx, JSString *str) {
   return processString(cx, str);
 }
 
-const char *StrType::getValue(JSContext *cx, JSString *str) {
-  PyObject *pyObject = processString(cx, str);
-  const char *value = PyUnicode_AsUTF8(pyObject);
-  Py_DECREF(pyObject);
-  return value;
-}
\ No newline at end of file
+JS::UniqueChars StrType::getValue(JSContext *cx, JSString *str) {
+  JS::RootedString rootedStr(cx, str);
+  return JS_EncodeStringToUTF8(cx, rootedStr); // encodes straight from the latin1 or UTF-16 chars, no python object needed
+}
+
+PyObject *StrType::getPyObjectCopy(JSContext *cx, JSString *str) {
+  JSLinearString *lstr = JS_EnsureLinearString(cx, str);
+  if (!lstr) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  size_t length = JS::GetLinearStringLength(lstr);
+  JS::AutoCheckCannotGC nogc;
+  if (JS::LinearStringHasLatin1Chars(lstr)) { // latin1 spidermonkey, latin1 python
+    return PyUnicode_FromKindAndData(PyUnicode_1BYTE_KIND, JS::GetLatin1LinearStringChars(nogc, lstr), length);
+  }
+
+  // utf16 spidermonkey, let python pick the narrowest representation, keeping unpaired surrogates as they are
+  const char16_t *chars = JS::GetTwoByteLinearStringChars(nogc, lstr);
+  int byteorder = PY_LITTLE_ENDIAN ? -1 : 1;
+  return PyUnicode_DecodeUTF16((const char *)chars, length * sizeof(char16_t), "surrogatepass", &byteorder);
+}
@@ -0,0 +1,73 @@
+/**
+ * @file SymbolType.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Struct for representing JS Symbols in python
+ * @date 2024-06-04
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/SymbolType.hh"
+
+#include "include/JSSymbolProxy.hh"
+#include "include/setSpiderMonkeyException.hh"
+
+#include <jsapi.h>
+#include <js/MapAndSet.h>
+
+#include <Python.h>
+
+/**
+ * @brief JS Map from the JS Symbols to their live JSSymbol, as private values.
+ * A JS Map rather than a C++ map since the GC may move the symbols. Entries are removed when the JSSymbol is deallocated
+ */
+static JS::PersistentRootedObject *symbolCache = nullptr;
+
+PyObject *SymbolType::getPyObject(JSContext *cx, JS::HandleSymbol symbol) {
+  if (!symbolCache) {
+    JSObject *cache = JS::NewMapObject(cx);
+    if (!cache) {
+      setSpiderMonkeyException(cx);
+      return NULL;
+    }
+    symbolCache = new JS::PersistentRootedObject(cx, cache);
+  }
+
+  JS::RootedValue key(cx, JS::SymbolValue(symbol));
+  JS::RootedValue cached(cx);
+  if (!JS::MapGet(cx, *symbolCache, key, &cached)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+  if (!cached.isUndefined()) {
+    PyObject *proxy = (PyObject *)cached.toPrivate();
+    Py_INCREF(proxy);
+    return proxy;
+  }
+
+  JSSymbolProxy *proxy = PyObject_New(JSSymbolProxy, &JSSymbolProxyType);
+  if (!proxy) {
+    return NULL;
+  }
+  proxy->jsSymbol = new JS::PersistentRootedSymbol(cx, symbol);
+
+  JS::RootedValue value(cx, JS::PrivateValue(proxy));
+  if (!JS::MapSet(cx, *symbolCache, key, value)) {
+    Py_DECREF(proxy);
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+  return (PyObject *)proxy;
+}
+
+void SymbolType::forgetPyObject(JSContext *cx, JS::HandleSymbol symbol) {
+  if (!symbolCache) {
+    return;
+  }
+  JS::RootedValue key(cx, JS::SymbolValue(symbol));
+  bool deleted;
+  if (!JS::MapDelete(cx, *symbolCache, key, &deleted)) {
+    JS_ClearPendingException(cx);
+  }
+}
@@ -0,0 +1,493 @@
+/**
+ * @file deepCopy.cc
+ * @author Caleb Aikens (caleb@distributive.network)
+ * @brief Functions for eagerly converting whole object graphs between JS and Python, instead of proxying them lazily
+ * @date 2024-05-21
+ *
+ * @copyright Copyright (c) 2024 Distributive Corp.
+ *
+ */
+
+#include "include/deepCopy.hh"
+
+#include "include/jsTypeFactory.hh"
+#include "include/pyTypeFactory.hh"
+#include "include/PyBaseProxyHandler.hh"
+#include "include/PyDictProxyHandler.hh"
+#include "include/PyListProxyHandler.hh"
+#include "include/PyObjectProxyHandler.hh"
+#include "include/PyIterableProxyHandler.hh"
+#include "include/setSpiderMonkeyException.hh"
+#include "include/StrType.hh"
+
+#include <jsapi.h>
+#include <jsfriendapi.h>
+#include <js/Array.h>
+#include <js/MapAndSet.h>
+#include <js/Object.h>
+#include <js/ValueArray.h>
+
+#include <Python.h>
+
+/**
+ * @brief State shared by all the steps of a single pyDeepCopy call
+ */
+struct PyDeepCopyState {
+  PyDeepCopyState(JSContext *cx, int maxDepth, bool preserveCycles) : cx(cx), maxDepth(maxDepth), preserveCycles(preserveCycles), seen(cx), copies(NULL) {};
+
+  JSContext *cx;
+  int maxDepth;
+  bool preserveCycles;
+  JS::RootedObject seen; // JS Map from the objects being (or already) copied to their index in `copies`
+  PyObject *copies; // list of the copies made so far, only used when preserving cycles
+};
+
+static PyObject *copyValue(PyDeepCopyState &state, JS::HandleValue value, int depth);
+
+/**
+ * @brief Check whether `obj` is one of our proxies for a python object, which should be unwrapped rather than copied
+ */
+static bool isPyObjectProxy(JSObject *obj) {
+  if (!js::IsProxy(obj)) {
+    return false;
+  }
+  const void *family = js::GetProxyHandler(obj)->family();
+  return family == &PyDictProxyHandler::family ||
+         family == &PyListProxyHandler::family ||
+         family == &PyIterableProxyHandler::family ||
+         family == &PyObjectProxyHandler::family;
+}
+
+/**
+ * @brief Look up `obj` among the objects already visited, and register `copy` for it if it is new
+ *
+ * @return PyObject* - a new reference to the existing copy, `copy` itself if `obj` was not visited yet, or NULL if an exception has been raised
+ */
+static PyObject *rememberCopy(PyDeepCopyState &state, JS::HandleObject obj, PyObject *copy) {
+  JSContext *cx = state.cx;
+  JS::RootedValue key(cx, JS::ObjectValue(*obj));
+  JS::RootedValue index(cx);
+  if (!JS::MapGet(cx, state.seen, key, &index)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  if (!index.isUndefined()) {
+    if (!state.preserveCycles) {
+      PyErr_SetString(PyExc_ValueError, "cannot copy a cyclic Javascript object");
+      return NULL;
+    }
+    PyObject *existingCopy = PyList_GET_ITEM(state.copies, index.toInt32());
+    Py_INCREF(existingCopy);
+    return existingCopy;
+  }
+
+  if (state.preserveCycles) {
+    index.setInt32(PyList_GET_SIZE(state.copies));
+    if (PyList_Append(state.copies, copy) < 0) {
+      return NULL;
+    }
+  } else {
+    index.setBoolean(true); // only the ancestors of the current object are tracked
+  }
+  if (!JS::MapSet(cx, state.seen, key, index)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+  return copy;
+}
+
+/**
+ * @brief Remove `obj` from the visited objects once it has been copied, so that only its ancestors count as cycles
+ */
+static bool forgetCopy(PyDeepCopyState &state, JS::HandleObject obj) {
+  if (state.preserveCycles) {
+    return true;
+  }
+
+  JS::RootedValue key(state.cx, JS::ObjectValue(*obj));
+  bool deleted;
+  if (!JS::MapDelete(state.cx, state.seen, key, &deleted)) {
+    setSpiderMonkeyException(state.cx);
+    return false;
+  }
+  return true;
+}
+
+static PyObject *copyArray(PyDeepCopyState &state, JS::HandleObject array, int depth) {
+  JSContext *cx = state.cx;
+  uint32_t length;
+  if (!JS::GetArrayLength(cx, array, &length)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  PyObject *list = PyList_New(length);
+  if (!list) {
+    return NULL;
+  }
+  PyObject *copy = rememberCopy(state, array, list);
+  if (copy != list) {
+    Py_DECREF(list);
+    return copy;
+  }
+
+  JS::RootedValue element(cx);
+  for (uint32_t index = 0; index < length; index++) {
+    if (!JS_GetElement(cx, array, index, &element)) {
+      setSpiderMonkeyException(cx);
+      Py_DECREF(list);
+      return NULL;
+    }
+    PyObject *item = copyValue(state, element, depth + 1);
+    if (!item) {
+      Py_DECREF(list);
+      return NULL;
+    }
+    PyList_SET_ITEM(list, index, item); // steals the reference
+  }
+
+  if (!forgetCopy(state, array)) {
+    Py_DECREF(list);
+    return NULL;
+  }
+  return list;
+}
+
+static PyObject *copyObject(PyDeepCopyState &state, JS::HandleObject obj, int depth) {
+  JSContext *cx = state.cx;
+  JS::RootedIdVector props(cx);
+  if (!js::GetPropertyKeys(cx, obj, JSITER_OWNONLY, &props)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  PyObject *dict = PyDict_New();
+  if (!dict) {
+    return NULL;
+  }
+  PyObject *copy = rememberCopy(state, obj, dict);
+  if (copy != dict) {
+    Py_DECREF(dict);
+    return copy;
+  }
+
+  JS::RootedId id(cx);
+  JS::RootedValue propValue(cx);
+  JS::RootedObject propObject(cx);
+  for (size_t index = 0; index < props.length(); index++) {
+    id = props[index];
+    if (!JS_GetPropertyById(cx, obj, id, &propValue)) {
+      setSpiderMonkeyException(cx);
+      Py_DECREF(dict);
+      return NULL;
+    }
+
+    // bind `this` of methods to the object they were found on, as JSObjectProxy does
+    if (propValue.isObject()) {
+      propObject = &propValue.toObject();
+      if (JS_ObjectIsFunction(propObject) && !JS_IsNativeFunction(propObject, callPyFunc)) {
+        JS::Rooted<JS::ValueArray<1>> args(cx);
+        args[0].setObject(*obj);
+        if (!JS_CallFunctionName(cx, propObject, "bind", args, &propValue)) {
+          setSpiderMonkeyException(cx);
+          Py_DECREF(dict);
+          return NULL;
+        }
+      }
+    }
+
+    PyObject *key = idToKey(cx, id);
+    PyObject *value = copyValue(state, propValue, depth + 1);
+    if (!key || !value || PyDict_SetItem(dict, key, value) < 0) {
+      Py_XDECREF(key);
+      Py_XDECREF(value);
+      Py_DECREF(dict);
+      return NULL;
+    }
+    Py_DECREF(key);
+    Py_DECREF(value);
+  }
+
+  if (!forgetCopy(state, obj)) {
+    Py_DECREF(dict);
+    return NULL;
+  }
+  return dict;
+}
+
+static PyObject *copyValue(PyDeepCopyState &state, JS::HandleValue value, int depth) {
+  JSContext *cx = state.cx;
+
+  if (value.isString()) {
+    return StrType::getPyObjectCopy(cx, value.toString());
+  }
+
+  if (!value.isObject() || (state.maxDepth >= 0 && depth > state.maxDepth)) {
+    return pyTypeFactory(cx, value); // primitives, and objects past the maximum depth, which stay lazy
+  }
+
+  JS::RootedObject obj(cx, &value.toObject());
+  if (isPyObjectProxy(obj)) {
+    return pyTypeFactory(cx, value); // the underlying python object
+  }
+
+  js::ESClass cls;
+  if (!JS::GetBuiltinClass(cx, obj, &cls)) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  JS::RootedValue unboxed(cx);
+  switch (cls) {
+  case js::ESClass::Array:
+  case js::ESClass::Object: {
+      // each level of nesting recurses, so deeply nested graphs raise a RecursionError instead of overflowing the C stack
+      if (Py_EnterRecursiveCall(" while copying a JS object to python")) {
+        return NULL;
+      }
+      PyObject *copy = cls == js::ESClass::Array ? copyArray(state, obj, depth) : copyObject(state, obj, depth);
+      Py_LeaveRecursiveCall();
+      return copy;
+    }
+  case js::ESClass::Boolean:
+  case js::ESClass::Number:
+  case js::ESClass::BigInt:
+  case js::ESClass::String:
+    if (!js::Unbox(cx, obj, &unboxed)) {
+      setSpiderMonkeyException(cx);
+      return NULL;
+    }
+    return copyValue(state, unboxed, depth);
+  default:
+    return pyTypeFactory(cx, value); // functions, dates, promises, errors, buffers...
+  }
+}
+
+PyObject *pyDeepCopy(JSContext *cx, JS::HandleValue rval, int maxDepth, bool preserveCycles) {
+  PyDeepCopyState state(cx, maxDepth, preserveCycles);
+
+  state.seen = JS::NewMapObject(cx);
+  if (!state.seen) {
+    setSpiderMonkeyException(cx);
+    return NULL;
+  }
+
+  if (preserveCycles) {
+    state.copies = PyList_New(0);
+    if (!state.copies) {
+      return NULL;
+    }
+  }
+
+  PyObject *copy = copyValue(state, rval, 0);
+  Py_XDECREF(state.copies);
+  return copy;
+}
+
+/**
+ * @brief State shared by all the steps of a single jsDeepCopy call
+ */
+struct JSDeepCopyState {
+  JSDeepCopyState(JSContext *cx, int maxDepth, bool preserveCycles, bool noneToNull) : cx(cx), maxDepth(maxDepth), preserveCycles(preserveCycles), noneToNull(noneToNull), copies(cx), seen(NULL) {};
+
+  JSContext *cx;
+  int maxDepth;
+  bool preserveCycles;
+  bool noneToNull;
+  JS::RootedValueVector copies; // the copies made so far, only used when preserving cycles
+  PyObject *seen; // dict from the addresses of the objects being (or already) copied to their index in `copies`
+};
+
+static bool copyPyValue(JSDeepCopyState &state, PyObject *object, JS::MutableHandleValue rval, int depth);
+
+/**
+ * @brief Look up `object` among the objects already visited, and register it if it is new
+ *
+ * @return PyObject* - the key `object` is registered under, or NULL if an exception has been raised.
+ *    `rval` is set to the existing copy if `object` has already been visited
+ */
+static PyObject *rememberPyCopy(JSDeepCopyState &state, PyObject *object, JS::MutableHandleValue rval) {
+  PyObject *key = PyLong_FromVoidPtr(object);
+  if (!key) {
+    return NULL;
+  }
+
+  PyObject *index = PyDict_GetItemWithError(state.seen, key); // borrowed reference
+  if (index) {
+    Py_DECREF(key);
+    if (!state.preserveCycles) {
+      PyErr_SetString(PyExc_ValueError, "cannot copy a cyclic Python object");
+      return NULL;
+    }
+    rval.set(state.copies[PyLong_AsSsize_t(index)]);
+    return Py_None;
+  }
+  else if (PyErr_Occurred()) {
+    Py_DECREF(key);
+    return NULL;
+  }
+
+  rval.setUndefined();
+  return key;
+}
+
+/**
+ * @brief Record `copy` as the copy of the object registered under `key` by rememberPyCopy
+ */
+static bool registerPyCopy(JSDeepCopyState &state, PyObject *key, JS::HandleValue copy) {
+  PyObject *index = PyLong_FromSize_t(state.copies.length());
+  if (!index) {
+    return false;
+  }
+  int failed = PyDict_SetItem(state.seen, key, index);
+  Py_DECREF(index);
+  if (failed < 0) {
+    return false;
+  }
+  if (state.preserveCycles && !state.copies.append(copy)) {
+    PyErr_NoMemory();
+    return false;
+  }
+  return true;
+}
+
+/**
+ * @brief Remove the object registered under `key` once it has been copied, so that only its ancestors count as cycles
+ */
+static bool forgetPyCopy(JSDeepCopyState &state, PyObject *key) {
+  if (state.preserveCycles) {
+    return true;
+  }
+  return PyDict_DelItem(state.seen, key) == 0;
+}
+
+static bool copyPySequence(JSDeepCopyState &state, PyObject *sequence, JS::MutableHandleValue rval, int depth) {
+  JSContext *cx = state.cx;
+  PyObject *key = rememberPyCopy(state, sequence, rval);
+  if (!key) {
+    return false;
+  }
+  else if (key == Py_None) {
+    return true; // already copied
+  }
+
+  // allocate the dense elements of the array upfront
+  Py_ssize_t length = PySequence_Fast_GET_SIZE(sequence);
+  JS::RootedObject array(cx, JS::NewArrayObject(cx, length));
+  if (!array) {
+    Py_DECREF(key);
+    setSpiderMonkeyException(cx);
+    return false;
+  }
+  rval.setObject(*array);
+  if (!registerPyCopy(state, key, rval)) {
+    Py_DECREF(key);
+    return false;
+  }
+
+  JS::RootedValue element(cx);
+  for (Py_ssize_t index = 0; index < length; index++) {
+    if (!copyPyValue(state, PySequence_Fast_GET_ITEM(sequence, index), &element, depth + 1)) {
+      Py_DECREF(key);
+      return false;
+    }
+    if (!JS_DefineElement(cx, array, index, element, JSPROP_ENUMERATE)) {
+      Py_DECREF(key);
+      setSpiderMonkeyException(cx);
+      return false;
+    }
+  }
+
+  bool forgotten = forgetPyCopy(state, key);
+  Py_DECREF(key);
+  rval.setObject(*array);
+  return forgotten;
+}
+
+static bool copyPyDict(JSDeepCopyState &state, PyObject *dict, JS::MutableHandleValue rval, int depth) {
+  JSContext *cx = state.cx;
+  PyObject *key = rememberPyCopy(state, dict, rval);
+  if (!key) {
+    return false;
+  }
+  else if (key == Py_None) {
+    return true; // already copied
+  }
+
+  JS::RootedObject obj(cx, JS_NewPlainObject(cx));
+  if (!obj) {
+    Py_DECREF(key);
+    setSpiderMonkeyException(cx);
+    return false;
+  }
+  rval.setObject(*obj);
+  if (!registerPyCopy(state, key, rval)) {
+    Py_DECREF(key);
+    return false;
+  }
+
+  JS::RootedId id(cx);
+  JS::RootedValue propValue(cx);
+  Py_ssize_t pos = 0;
+  PyObject *dictKey, *dictValue;
+  while (PyDict_Next(dict, &pos, &dictKey, &dictValue)) {
+    if (!keyToId(dictKey, &id)) {
+      continue; // skip over keys that are not str or int, as PyDictProxyHandler does
+    }
+    if (!copyPyValue(state, dictValue, &propValue, depth + 1)) {
+      Py_DECREF(key);
+      return false;
+    }
+    if (!JS_DefinePropertyById(cx, obj, id, propValue, JSPROP_ENUMERATE)) {
+      Py_DECREF(key);
+      setSpiderMonkeyException(cx);
+      return false;
+    }
+  }
+
+  bool forgotten = forgetPyCopy(state, key);
+  Py_DECREF(key);
+  rval.setObject(*obj);
+  return forgotten;
+}
+
+static bool copyPyValue(JSDeepCopyState &state, PyObject *object, JS::MutableHandleValue rval, int depth) {
+  if (state.maxDepth < 0 || depth <= state.maxDepth) {
+    bool isDict = PyDict_CheckExact(object);
+    if (isDict || PyList_CheckExact(object) || PyTuple_CheckExact(object)) {
+      // each level of nesting recurses, so deeply nested graphs raise a RecursionError instead of overflowing the C stack
+      if (Py_EnterRecursiveCall(" while copying a python object to JS")) {
+        return false;
+      }
+      bool copied = isDict ? copyPyDict(state, object, rval, depth) : copyPySequence(state, object, rval, depth);
+      Py_LeaveRecursiveCall();
+      return copied;
+    }
+  }
+
+  if (object == Py_None && state.noneToNull) {
+    rval.setNull();
+    return true;
+  }
+
+  // primitives, JS-backed values, objects past the maximum depth, and everything else
+  rval.set(jsTypeFactory(state.cx, object));
+  return !PyErr_Occurred();
+}
+
+JS::Value jsDeepCopy(JSContext *cx, PyObject *object, int maxDepth, bool preserveCycles, bool noneToNull) {
+  JSDeepCopyState state(cx, maxDepth, preserveCycles, noneToNull);
+  JS::RootedValue rval(cx);
+
+  state.seen = PyDict_New();
+  if (!state.seen) {
+    return JS::UndefinedValue();
+  }
+
+  if (!copyPyValue(state, object, &rval, 0)) {
+    rval.setUndefined();
+  }
+  Py_DECREF(state.seen);
+  return rval;
+}
@@ -10,18 +10,39 @@
 #include "include/pyTypeFactory.hh"
 #include "include/jsTypeFactory.hh"
 #include "include/PyEventLoop.hh"
+#include "include/JobQueue.hh"
+#include "include/modules/pythonmonkey/pythonmonkey.hh"
 #include "include/setSpiderMonkeyException.hh"
 
 #include <jsapi.h>
 #include <js/Array.h>
 
+#include <cstdlib>
+
 using AsyncHandle = PyEventLoop::AsyncHandle;
 
+/**
+ * @brief Whether timers capture debug info for the WTFPythonMonkey tool, off by default as capturing the stack of every timer is expensive.
+ * Enabled by `pmjs --wtf`, `wtfpm.WTF`, or a non-empty `PMJS_WTF` environment variable
+ */
+static bool debugInfoEnabled = std::getenv("PMJS_WTF") && *std::getenv("PMJS_WTF");
+
 /**
  * See function declarations in python/pythonmonkey/builtin_modules/internal-binding.d.ts :
  *    `declare function internalBinding(namespace: "timers")`
  */
 
+/**
+ * @brief Retrieve the AsyncHandle by a `timeoutID` number from JS
+ * @return NULL if the number is not a valid `timeoutID`
+ */
+static AsyncHandle *handleFromId(double timeoutID) {
+  if (!(timeoutID >= 1 && timeoutID < 9007199254740992.0)) { // also rejects NaN
+    return nullptr;
+  }
+  return AsyncHandle::fromId((AsyncHandle::id_t)timeoutID);
+}
+
 static bool enqueueWithDelay(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
   JS::HandleValue jobArgVal = args.get(0);
@@ -37,16 +58,59 @@ static bool enqueueWithDelay(JSContext *cx, unsigned argc, JS::Value *vp) {
   if (!loop.initialized()) return false;
   PyEventLoop::AsyncHandle::id_t handleId = loop.enqueueWithDelay(job, delaySeconds, repeat);
   Py_DECREF(job);
+  if (!handleId) {
+    setPyException(cx);
+    return false;
+  }
 
-  // Set debug info for the WTFPythonMonkey tool
-  auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
-  handle->setDebugInfo(pyTypeFactory(cx, debugInfo));
+  // Set debug info for the WTFPythonMonkey tool, if captured
+  if (!debugInfo.isUndefined()) {
+    auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
+    handle->setDebugInfo(pyTypeFactory(cx, debugInfo));
+  }
 
   // Return the `timeoutID` to use in `clearTimeout`
   args.rval().setNumber(handleId);
   return true;
 }
 
+static bool enqueueImmediate(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  JS::HandleValue jobArgVal = args.get(0);
+  JS::HandleValue debugInfo = args.get(1);
+
+  // Convert to a Python function
+  JS::RootedValue jobArg(cx, jobArgVal);
+  PyObject *job = pyTypeFactory(cx, jobArg);
+  // Schedule job to the check phase of the running Python event-loop
+  PyEventLoop loop = PyEventLoop::getRunningLoop();
+  if (!loop.initialized()) return false;
+  PyEventLoop::AsyncHandle::id_t handleId = loop.enqueueImmediate(job);
+  Py_DECREF(job);
+  if (!handleId) {
+    setPyException(cx);
+    return false;
+  }
+
+  // Set debug info for the WTFPythonMonkey tool, if captured
+  if (!debugInfo.isUndefined()) {
+    auto handle = PyEventLoop::AsyncHandle::fromId(handleId);
+    handle->setDebugInfo(pyTypeFactory(cx, debugInfo));
+  }
+
+  // Return the `timeoutID` to use in `clearImmediate`
+  args.rval().setNumber(handleId);
+  return true;
+}
+
+static bool enqueueMicrotask(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  JS::RootedObject callback(cx, &args.get(0).toObject());
+
+  args.rval().setUndefined();
+  return JOB_QUEUE->enqueueMicrotask(cx, callback);
+}
+
 static bool cancelByTimeoutId(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
   double timeoutID = args.get(0).toNumber();
@@ -54,7 +118,7 @@ static bool cancelByTimeoutId(JSContext *cx, unsigned argc, JS::Value *vp) {
   args.rval().setUndefined();
 
   // Retrieve the AsyncHandle by `timeoutID`
-  AsyncHandle *handle = AsyncHandle::fromId((uint32_t)timeoutID);
+  AsyncHandle *handle = handleFromId(timeoutID);
   if (!handle) return true; // does nothing on invalid timeoutID
 
   // Cancel this job on the Python event-loop
@@ -64,12 +128,42 @@ static bool cancelByTimeoutId(JSContext *cx, unsigned argc, JS::Value *vp) {
   return true;
 }
 
+static bool releaseTimer(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  double timeoutID = args.get(0).toNumber();
+
+  args.rval().setUndefined();
+
+  // Retrieve the AsyncHandle by `timeoutID`
+  AsyncHandle *handle = handleFromId(timeoutID);
+  if (!handle) return true; // already freed
+
+  handle->release();
+  return true;
+}
+
+static bool timerRefresh(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  double timeoutID = args.get(0).toNumber();
+
+  // Retrieve the AsyncHandle by `timeoutID`
+  AsyncHandle *handle = handleFromId(timeoutID);
+  if (!handle) return false; // error no such timeoutID
+
+  if (!handle->refresh()) {
+    return false; // the Python RuntimeError for no event-loop running
+  }
+
+  args.rval().setUndefined();
+  return true;
+}
+
 static bool timerHasRef(JSContext *cx, unsigned argc, JS::Value *vp) {
   JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
   double timeoutID = args.get(0).toNumber();
 
   // Retrieve the AsyncHandle by `timeoutID`
-  AsyncHandle *handle = AsyncHandle::fromId((uint32_t)timeoutID);
+  AsyncHandle *handle = handleFromId(timeoutID);
   if (!handle) return false; // error no such timeoutID
 
   args.rval().setBoolean(handle->hasRef());
@@ -81,7 +175,7 @@ static bool timerAddRef(JSContext *cx, unsigned argc, JS::Value *vp) {
   double timeoutID = args.get(0).toNumber();
 
   // Retrieve the AsyncHandle by `timeoutID`
-  AsyncHandle *handle = AsyncHandle::fromId((uint32_t)timeoutID);
+  AsyncHandle *handle = handleFromId(timeoutID);
   if (!handle) return false; // error no such timeoutID
 
   handle->addRef();
@@ -95,7 +189,7 @@ static bool timerRemoveRef(JSContext *cx, unsigned argc, JS::Value *vp) {
   double timeoutID = args.get(0).toNumber();
 
   // Retrieve the AsyncHandle by `timeoutID`
-  AsyncHandle *handle = AsyncHandle::fromId((uint32_t)timeoutID);
+  AsyncHandle *handle = handleFromId(timeoutID);
   if (!handle) return false; // error no such timeoutID
 
   handle->removeRef();
@@ -109,11 +203,28 @@ static bool getDebugInfo(JSContext *cx, unsigned argc, JS::Value *vp) {
   double timeoutID = args.get(0).toNumber();
 
   // Retrieve the AsyncHandle by `timeoutID`
-  AsyncHandle *handle = AsyncHandle::fromId((uint32_t)timeoutID);
+  AsyncHandle *handle = handleFromId(timeoutID);
   if (!handle) return false; // error no such timeoutID
 
-  JS::Value debugInfo = jsTypeFactory(cx, handle->getDebugInfo());
-  args.rval().set(debugInfo);
+  PyObject *debugInfo = handle->getDebugInfo();
+  if (!debugInfo) { // not captured
+    args.rval().setUndefined();
+    return true;
+  }
+  args.rval().set(jsTypeFactory(cx, debugInfo));
+  return true;
+}
+
+static bool isDebugInfoEnabled(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  args.rval().setBoolean(debugInfoEnabled);
+  return true;
+}
+
+static bool setDebugInfoEnabled(JSContext *cx, unsigned argc, JS::Value *vp) {
+  JS::CallArgs args = JS::CallArgsFromVp(argc, vp);
+  debugInfoEnabled = JS::ToBoolean(args.get(0));
+  args.rval().setUndefined();
   return true;
 }
 
@@ -122,7 +233,8 @@ static bool getAllRefedTimersDebugInfo(JSContext *cx, unsigned argc, JS::Value *
 
   JS::RootedVector<JS::Value> results(cx);
   for (AsyncHandle &timer: AsyncHandle::getAllTimers()) {
-    if (!timer.hasRef()) continue; // we only need ref'ed timers
+    if (!timer.hasRef() || timer._finishedOrCancelled()) continue; // we only need ref'ed timers that are still pending
+    if (!timer.getDebugInfo()) continue; // created before debug info capture was enabled
 
     JS::Value debugInfo = jsTypeFactory(cx, timer.getDebugInfo());
     if (!results.append(debugInfo)) {
@@ -138,11 +250,17 @@ static bool getAllRefedTimersDebugInfo(JSContext *cx, unsigned argc, JS::Value *
 
 JSFunctionSpec InternalBinding::timers[] = {
   JS_FN("enqueueWithDelay", enqueueWithDelay, /* nargs */ 2, 0),
+  JS_FN("enqueueImmediate", enqueueImmediate, 1, 0),
+  JS_FN("enqueueMicrotask", enqueueMicrotask, 1, 0),
   JS_FN("cancelByTimeoutId", cancelByTimeoutId, 1, 0),
+  JS_FN("releaseTimer", releaseTimer, 1, 0),
+  JS_FN("timerRefresh", timerRefresh, 1, 0),
   JS_FN("timerHasRef", timerHasRef, 1, 0),
   JS_FN("timerAddRef", timerAddRef, 1, 0),
   JS_FN("timerRemoveRef", timerRemoveRef, 1, 0),
   JS_FN("getDebugInfo", getDebugInfo, 1, 0),
+  JS_FN("isDebugInfoEnabled", isDebugInfoEnabled, 0, 0),
+  JS_FN("setDebugInfoEnabled", setDebugInfoEnabled, 1, 0),
   JS_FN("getAllRefedTimersDebugInfo", getAllRefedTimersDebugInfo, 1, 0),
   JS_FS_END
 };
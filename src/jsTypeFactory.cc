@@ -17,9 +17,13 @@
 #include "include/JSArrayProxy.hh"
 #include "include/PyDictProxyHandler.hh"
 #include "include/JSStringProxy.hh"
+#include "include/JSMapProxy.hh"
+#include "include/JSSetProxy.hh"
+#include "include/JSSymbolProxy.hh"
 #include "include/PyListProxyHandler.hh"
 #include "include/PyObjectProxyHandler.hh"
 #include "include/PyIterableProxyHandler.hh"
+#include "include/PySetProxyHandler.hh"
 #include "include/pyTypeFactory.hh"
 #include "include/IntType.hh"
 #include "include/PromiseType.hh"
@@ -36,118 +40,238 @@
 
 #include <Python.h>
 #include <datetime.h>
-
-#include <unordered_map>
+#if PY_VERSION_HEX < 0x030b0000 // Python version is less than 3.11
+  #include <longintrepr.h> // for ob_digit, included by Python.h since 3.11
+#endif
 
 #define HIGH_SURROGATE_START 0xD800
 #define LOW_SURROGATE_START 0xDC00
 #define LOW_SURROGATE_END 0xDFFF
 #define BMP_END 0x10000
 
+#define JS_MAX_SAFE_INTEGER 9007199254740991LL // 2**53 - 1, the mantissa of a float64 is 53 bits (with 52 explicitly stored and the highest bit always being 1)
+
+#define INLINE_STRING_MAX_LENGTH 32 // strings up to this many UTF-16 code units are copied, which is cheaper than sharing the buffer
+
 static PyDictProxyHandler pyDictProxyHandler;
 static PyObjectProxyHandler pyObjectProxyHandler;
 static PyListProxyHandler pyListProxyHandler;
+static PySetProxyHandler pySetProxyHandler;
 static PyIterableProxyHandler pyIterableProxyHandler;
 
-std::unordered_map<char16_t *, PyObject *> charToPyObjectMap; // a map of char16_t buffers to their corresponding PyObjects, used when finalizing JSExternalStrings
-
+/**
+ * @brief Callbacks of a single JSExternalString sharing the buffer of a python string.
+ * Each external string gets its own instance, which owns the reference to the python string and frees itself once the string is finalized,
+ * so that no global bookkeeping of the buffers is needed
+ */
 struct PythonExternalString : public JSExternalStringCallbacks {
+public:
+  PythonExternalString(PyObject *object) : object(object) {};
+
   void finalize(char16_t *chars) const override {
     // We cannot call Py_DECREF here when shutting down as the thread state is gone.
     // Then, when shutting down, there is only on reference left, and we don't need
     // to free the object since the entire process memory is being released.
-    PyObject *object = charToPyObjectMap[chars];
     if (Py_REFCNT(object) > 1) {
       Py_DECREF(object);
     }
+    delete this;
   }
   size_t sizeOfBuffer(const char16_t *chars, mozilla::MallocSizeOf mallocSizeOf) const override {
     return 0;
   }
+
+private:
+  PyObject *object; // the python string owning the buffer
 };
 
-static constexpr PythonExternalString PythonExternalStringCallbacks;
+/**
+ * @brief Create a JSExternalString sharing the buffer of a python str, which it keeps alive until finalized
+ *
+ * @return JSString* - the new string, or nullptr if an exception has been raised
+ */
+static JSString *newPythonExternalString(JSContext *cx, PyObject *object, const char16_t *chars, size_t length) {
+  PythonExternalString *callbacks = new PythonExternalString(object);
+  Py_INCREF(object); // released by PythonExternalString::finalize
+  JSString *str = JS_NewExternalString(cx, chars, length, callbacks);
+  if (!str) { // the callbacks are only owned by the string once it is created
+    delete callbacks;
+    Py_DECREF(object);
+  }
+  return str;
+}
 
-size_t UCS4ToUTF16(const uint32_t *chars, size_t length, uint16_t **outStr) {
-  uint16_t *utf16String = (uint16_t *)malloc(sizeof(uint16_t) * length*2);
+size_t UCS4ToUTF16Length(const uint32_t *chars, size_t length) {
+  size_t utf16Length = length;
+  for (size_t i = 0; i < length; i++) {
+    if (chars[i] >= BMP_END) { // needs a surrogate pair
+      utf16Length += 1;
+    }
+  }
+  return utf16Length;
+}
+
+size_t UCS4ToUTF16(const uint32_t *chars, size_t length, uint16_t *outStr) {
   size_t utf16Length = 0;
 
   for (size_t i = 0; i < length; i++) {
-    if (chars[i] < HIGH_SURROGATE_START || (chars[i] > LOW_SURROGATE_END && chars[i] < BMP_END)) {
-      utf16String[utf16Length] = uint16_t(chars[i]);
+    if (chars[i] < BMP_END) { // including unpaired surrogates, which are kept as they are
+      outStr[utf16Length] = uint16_t(chars[i]);
       utf16Length += 1;
     }
     else {
       /* *INDENT-OFF* */
-      utf16String[utf16Length]      = uint16_t(((0b1111'1111'1100'0000'0000 & (chars[i] - BMP_END)) >> 10) + HIGH_SURROGATE_START);
-      utf16String[utf16Length + 1]  = uint16_t(((0b0000'0000'0011'1111'1111 & (chars[i] - BMP_END)) >> 00) +  LOW_SURROGATE_START);
+      outStr[utf16Length]      = uint16_t(((0b1111'1111'1100'0000'0000 & (chars[i] - BMP_END)) >> 10) + HIGH_SURROGATE_START);
+      outStr[utf16Length + 1]  = uint16_t(((0b0000'0000'0011'1111'1111 & (chars[i] - BMP_END)) >> 00) +  LOW_SURROGATE_START);
       utf16Length += 2;
       /* *INDENT-ON* */
     }
   }
-  *outStr = utf16String;
   return utf16Length;
 }
 
+/**
+ * @brief Make a JSString for a python str, picking the cheapest strategy for its size and kind:
+ *    short strings are copied into inline JSStrings, longer latin1 and UCS2 strings share the python buffer as external strings,
+ *    and longer UCS4 strings are transcoded in a single pass into a buffer owned by the JSString
+ *
+ * @return JSString* - the new string, or nullptr if an exception has been raised
+ */
+static JSString *unicodeToJsString(JSContext *cx, PyObject *object) {
+  size_t length = PyUnicode_GET_LENGTH(object);
+
+  switch (PyUnicode_KIND(object)) {
+  case (PyUnicode_4BYTE_KIND): {
+      const uint32_t *u32Chars = PyUnicode_4BYTE_DATA(object);
+      size_t u16Length = UCS4ToUTF16Length(u32Chars, length);
+      if (u16Length <= INLINE_STRING_MAX_LENGTH) {
+        char16_t u16Chars[INLINE_STRING_MAX_LENGTH];
+        UCS4ToUTF16(u32Chars, length, (uint16_t *)u16Chars);
+        return JS_NewUCStringCopyN(cx, u16Chars, u16Length);
+      }
+      JS::UniqueTwoByteChars u16Chars(js_pod_arena_malloc<char16_t>(js::StringBufferArena, u16Length));
+      if (!u16Chars) {
+        JS_ReportOutOfMemory(cx);
+        return nullptr;
+      }
+      UCS4ToUTF16(u32Chars, length, (uint16_t *)u16Chars.get());
+      return JS_NewUCString(cx, std::move(u16Chars), u16Length);
+    }
+  case (PyUnicode_2BYTE_KIND): {
+      if (length <= INLINE_STRING_MAX_LENGTH) {
+        return JS_NewUCStringCopyN(cx, (const char16_t *)PyUnicode_2BYTE_DATA(object), length);
+      }
+      return newPythonExternalString(cx, object, (const char16_t *)PyUnicode_2BYTE_DATA(object), length);
+    }
+  case (PyUnicode_1BYTE_KIND): {
+      if (length <= INLINE_STRING_MAX_LENGTH) {
+        return JS_NewStringCopyN(cx, (const char *)PyUnicode_1BYTE_DATA(object), length); // copies latin1 chars
+      }
+      JSString *str = newPythonExternalString(cx, object, (const char16_t *)PyUnicode_1BYTE_DATA(object), length);
+      if (!str) {
+        return nullptr;
+      }
+      /* TODO (Caleb Aikens): this is a hack to set the JSString::LATIN1_CHARS_BIT, because there isnt an API for latin1 JSExternalStrings.
+       * Ideally we submit a patch to Spidermonkey to make this part of their API with the following signature:
+       * JS_NewExternalString(JSContext *cx, const char *chars, size_t length, const JSExternalStringCallbacks *callbacks)
+       */
+      // FIXME: JSExternalString are all treated as two-byte strings when GCed
+      //    see https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/StringType-inl.h#l514
+      //        https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/StringType.h#l1808
+      *(std::atomic<unsigned long> *)str |= 512;
+      return str;
+    }
+  }
+  return nullptr;
+}
+
+/**
+ * @brief Convert a python int that is not a pythonmonkey.bigint to a JS Number, as an Int32 value whenever it fits so that SpiderMonkey can keep it unboxed
+ *
+ * @param object - The python int
+ * @param rval - The JS::Value to set
+ * @return false if the int cannot be represented exactly as a JS Number, with a python OverflowError set
+ */
+static bool longToJsNumber(PyObject *object, JS::MutableHandleValue rval) {
+  // compact ints of at most one digit are read directly from the digit storage, a python digit always fits in an int32_t
+  #if PY_VERSION_HEX >= 0x030c0000
+  if (PyUnstable_Long_IsCompact((PyLongObject *)object)) {
+    rval.setInt32((int32_t)PyUnstable_Long_CompactValue((PyLongObject *)object));
+    return true;
+  }
+  #else
+  Py_ssize_t size = Py_SIZE(object);
+  if (size >= -1 && size <= 1) {
+    rval.setInt32((int32_t)(size * (int32_t)((PyLongObject *)object)->ob_digit[0]));
+    return true;
+  }
+  #endif
+
+  int overflow;
+  long long num = PyLong_AsLongLongAndOverflow(object, &overflow);
+  if (overflow || num > JS_MAX_SAFE_INTEGER || num < -JS_MAX_SAFE_INTEGER) {
+    PyErr_SetString(PyExc_OverflowError, "Absolute value of the integer exceeds JS Number.MAX_SAFE_INTEGER. Use pythonmonkey.bigint instead.");
+    return false;
+  }
+  if (num >= INT32_MIN && num <= INT32_MAX) {
+    rval.setInt32((int32_t)num);
+  } else {
+    rval.setDouble((double)num);
+  }
+  return true;
+}
+
 JS::Value jsTypeFactory(JSContext *cx, PyObject *object) {
   if (!PyDateTimeAPI) { PyDateTime_IMPORT; } // for PyDateTime_Check
 
   JS::RootedValue returnType(cx);
+  PyTypeObject *type = Py_TYPE(object);
 
-  if (PyBool_Check(object)) {
-    returnType.setBoolean(PyLong_AsLong(object));
+  // exact type checks come first for the values most often crossing into JS, subclasses are handled further down
+  if (type == &PyLong_Type) {
+    longToJsNumber(object, &returnType);
+  }
+  else if (type == &PyFloat_Type) {
+    returnType.setNumber(PyFloat_AS_DOUBLE(object));
+  }
+  else if (object == Py_None) {
+    returnType.setUndefined();
+  }
+  else if (PyBool_Check(object)) {
+    returnType.setBoolean(object == Py_True);
+  }
+  else if (PyUnicode_Check(object)) {
+    if (type != &PyUnicode_Type && PyObject_TypeCheck(object, &JSStringProxyType)) {
+      returnType.setString(((JSStringProxy *)object)->jsString->toString());
+    } else {
+      JSString *str = unicodeToJsString(cx, object);
+      if (!str) {
+        setSpiderMonkeyException(cx);
+        return returnType;
+      }
+      returnType.setString(str);
+    }
+  }
+  else if (object == getPythonMonkeyNull()) {
+    returnType.setNull();
   }
   else if (PyLong_Check(object)) {
-    if (PyObject_IsInstance(object, getPythonMonkeyBigInt())) { // pm.bigint is a subclass of the builtin int type
+    if (PyObject_TypeCheck(object, (PyTypeObject *)getPythonMonkeyBigInt())) { // pm.bigint is a subclass of the builtin int type
       JS::BigInt *bigint = IntType::toJsBigInt(cx, object);
+      if (!bigint) {
+        if (!PyErr_Occurred()) {
+          setSpiderMonkeyException(cx);
+        }
+        return returnType;
+      }
       returnType.setBigInt(bigint);
-    } else if (_PyLong_NumBits(object) <= 53) { // num <= JS Number.MAX_SAFE_INTEGER, the mantissa of a float64 is 53 bits (with 52 explicitly stored and the highest bit always being 1)
-      int64_t num = PyLong_AsLongLong(object);
-      returnType.setNumber(num);
     } else {
-      PyErr_SetString(PyExc_OverflowError, "Absolute value of the integer exceeds JS Number.MAX_SAFE_INTEGER. Use pythonmonkey.bigint instead.");
+      longToJsNumber(object, &returnType);
     }
   }
   else if (PyFloat_Check(object)) {
     returnType.setNumber(PyFloat_AsDouble(object));
   }
-  else if (PyObject_TypeCheck(object, &JSStringProxyType)) {
-    returnType.setString(((JSStringProxy *)object)->jsString.toString());
-  }
-  else if (PyUnicode_Check(object)) {
-    switch (PyUnicode_KIND(object)) {
-    case (PyUnicode_4BYTE_KIND): {
-        uint32_t *u32Chars = PyUnicode_4BYTE_DATA(object);
-        uint16_t *u16Chars;
-        size_t u16Length = UCS4ToUTF16(u32Chars, PyUnicode_GET_LENGTH(object), &u16Chars);
-        JSString *str = JS_NewUCStringCopyN(cx, (char16_t *)u16Chars, u16Length);
-        free(u16Chars);
-        returnType.setString(str);
-        break;
-      }
-    case (PyUnicode_2BYTE_KIND): {
-        charToPyObjectMap[(char16_t *)PyUnicode_2BYTE_DATA(object)] = object;
-        JSString *str = JS_NewExternalString(cx, (char16_t *)PyUnicode_2BYTE_DATA(object), PyUnicode_GET_LENGTH(object), &PythonExternalStringCallbacks);
-        returnType.setString(str);
-        break;
-      }
-    case (PyUnicode_1BYTE_KIND): {
-        charToPyObjectMap[(char16_t *)PyUnicode_2BYTE_DATA(object)] = object;
-        JSString *str = JS_NewExternalString(cx, (char16_t *)PyUnicode_1BYTE_DATA(object), PyUnicode_GET_LENGTH(object), &PythonExternalStringCallbacks);
-        /* TODO (Caleb Aikens): this is a hack to set the JSString::LATIN1_CHARS_BIT, because there isnt an API for latin1 JSExternalStrings.
-         * Ideally we submit a patch to Spidermonkey to make this part of their API with the following signature:
-         * JS_NewExternalString(JSContext *cx, const char *chars, size_t length, const JSExternalStringCallbacks *callbacks)
-         */
-        // FIXME: JSExternalString are all treated as two-byte strings when GCed
-        //    see https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/StringType-inl.h#l514
-        //        https://hg.mozilla.org/releases/mozilla-esr102/file/tip/js/src/vm/StringType.h#l1808
-        *(std::atomic<unsigned long> *)str |= 512;
-        returnType.setString(str);
-        break;
-      }
-    }
-    Py_INCREF(object);
-  }
   else if (PyMethod_Check(object) || PyFunction_Check(object) || PyCFunction_Check(object)) {
     // can't determine number of arguments for PyCFunctions, so just assume potentially unbounded
     uint16_t nargs = 0;
@@ -185,6 +309,12 @@ JS::Value jsTypeFactory(JSContext *cx, PyObject *object) {
   }
   else if (PyDateTime_Check(object)) {
     JSObject *dateObj = DateType::toJsDate(cx, object);
+    if (!dateObj) {
+      if (!PyErr_Occurred()) {
+        setSpiderMonkeyException(cx);
+      }
+      return returnType;
+    }
     returnType.setObject(*dateObj);
   }
   else if (PyObject_CheckBuffer(object)) {
@@ -225,27 +355,48 @@ JS::Value jsTypeFactory(JSContext *cx, PyObject *object) {
   else if (PyObject_TypeCheck(object, &JSArrayProxyType)) {
     returnType.setObject(**((JSArrayProxy *)object)->jsArray);
   }
+  else if (PyObject_TypeCheck(object, &JSMapProxyType)) {
+    returnType.setObject(**((JSMapProxy *)object)->jsMap);
+  }
+  else if (PyObject_TypeCheck(object, &JSSetProxyType)) {
+    returnType.setObject(**((JSSetProxy *)object)->jsSet);
+  }
+  else if (PyObject_TypeCheck(object, &JSSymbolProxyType)) {
+    returnType.setSymbol(*((JSSymbolProxy *)object)->jsSymbol);
+  }
   else if (PyDict_Check(object) || PyList_Check(object)) {
     JS::RootedValue v(cx);
     JSObject *proxy;
     if (PyList_Check(object)) {
-      JS::RootedObject arrayPrototype(cx);
-      JS_GetClassPrototype(cx, JSProto_Array, &arrayPrototype); // so that instanceof will work, not that prototype methods will
-      proxy = js::NewProxyObject(cx, &pyListProxyHandler, v, arrayPrototype.get());
+      JS::RootedObject listPrototype(cx, PyListProxyHandler::getCachedPrototype(cx)); // carries the Array methods, and inherits from Array.prototype so that instanceof will work
+      if (!listPrototype) {
+        setSpiderMonkeyException(cx);
+        return returnType;
+      }
+      proxy = js::NewProxyObject(cx, &pyListProxyHandler, v, listPrototype.get());
     } else {
-      JS::RootedObject objectPrototype(cx);
-      JS_GetClassPrototype(cx, JSProto_Object, &objectPrototype); // so that instanceof will work, not that prototype methods will
-      proxy = js::NewProxyObject(cx, &pyDictProxyHandler, v, objectPrototype.get());
+      JS::RootedObject dictPrototype(cx, PyDictProxyHandler::getCachedPrototype(cx)); // carries the Object methods, and inherits from Object.prototype so that instanceof will work
+      if (!dictPrototype) {
+        setSpiderMonkeyException(cx);
+        return returnType;
+      }
+      proxy = js::NewProxyObject(cx, &pyDictProxyHandler, v, dictPrototype.get());
     }
     Py_INCREF(object);
     JS::SetReservedSlot(proxy, PyObjectSlot, JS::PrivateValue(object));
     returnType.setObject(*proxy);
   }
-  else if (object == Py_None) {
-    returnType.setUndefined();
-  }
-  else if (object == getPythonMonkeyNull()) {
-    returnType.setNull();
+  else if (PyAnySet_Check(object)) {
+    JS::RootedValue v(cx);
+    JS::RootedObject setPrototype(cx, PySetProxyHandler::getCachedPrototype(cx)); // carries the Set methods, and inherits from Set.prototype so that instanceof will work
+    if (!setPrototype) {
+      setSpiderMonkeyException(cx);
+      return returnType;
+    }
+    JSObject *proxy = js::NewProxyObject(cx, &pySetProxyHandler, v, setPrototype.get());
+    Py_INCREF(object);
+    JS::SetReservedSlot(proxy, PyObjectSlot, JS::PrivateValue(object));
+    returnType.setObject(*proxy);
   }
   else if (PythonAwaitable_Check(object)) {
     returnType.setObjectOrNull(PromiseType::toJsPromise(cx, object));
@@ -21,7 +21,13 @@
 #include "include/JSObjectItemsProxy.hh"
 #include "include/JSObjectProxy.hh"
 #include "include/JSStringProxy.hh"
+#include "include/JSMapProxy.hh"
+#include "include/JSSetProxy.hh"
+#include "include/JSMapIterProxy.hh"
+#include "include/JSSymbolProxy.hh"
 #include "include/pyTypeFactory.hh"
+#include "include/jsTypeFactory.hh"
+#include "include/deepCopy.hh"
 #include "include/PyEventLoop.hh"
 #include "include/internalBinding.hh"
 
@@ -34,19 +40,23 @@
 #include <js/Class.h>
 #include <js/Date.h>
 #include <js/Initialization.h>
+#include <js/JSON.h>
 #include <js/Object.h>
 #include <js/Proxy.h>
 #include <js/SourceText.h>
+#include <js/StructuredClone.h>
 #include <js/Symbol.h>
 
 #include <Python.h>
 #include <datetime.h>
 
+#include <string>
 #include <unordered_map>
 #include <vector>
 #include <cassert>
 
 JS::PersistentRootedObject jsFunctionRegistry;
+JobQueue *JOB_QUEUE;
 
 void finalizationRegistryGCCallback(JSContext *cx, JSGCStatus status, JS::GCReason reason, void *data) {
   if (status == JSGCStatus::JSGC_END) {
@@ -128,6 +138,7 @@ PyTypeObject JSObjectProxyType = {
 PyTypeObject JSStringProxyType = {
   .tp_name = PyUnicode_Type.tp_name,
   .tp_basicsize = sizeof(JSStringProxy),
+  .tp_dealloc = (destructor)JSStringProxyMethodDefinitions::JSStringProxy_dealloc,
   .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_UNICODE_SUBCLASS,
   .tp_doc = PyDoc_STR("Javascript String value"),
   .tp_base = &PyUnicode_Type
@@ -270,6 +281,66 @@ PyTypeObject JSObjectItemsProxyType = {
   .tp_base = &PyDictKeys_Type
 };
 
+PyTypeObject JSMapProxyType = {
+  .ob_base = PyVarObject_HEAD_INIT(NULL, 0)
+  .tp_name = "pythonmonkey.JSMapProxy",
+  .tp_basicsize = sizeof(JSMapProxy),
+  .tp_itemsize = 0,
+  .tp_dealloc = (destructor)JSMapProxyMethodDefinitions::JSMapProxy_dealloc,
+  .tp_repr = (reprfunc)JSMapProxyMethodDefinitions::JSMapProxy_repr,
+  .tp_as_sequence = &JSMapProxy_sequence_methods,
+  .tp_as_mapping = &JSMapProxy_mapping_methods,
+  .tp_getattro = PyObject_GenericGetAttr,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_doc = PyDoc_STR("Javascript Map proxy"),
+  .tp_richcompare = (richcmpfunc)JSMapProxyMethodDefinitions::JSMapProxy_richcompare,
+  .tp_iter = (getiterfunc)JSMapProxyMethodDefinitions::JSMapProxy_iter,
+  .tp_methods = JSMapProxy_methods
+};
+
+PyTypeObject JSSetProxyType = {
+  .ob_base = PyVarObject_HEAD_INIT(NULL, 0)
+  .tp_name = "pythonmonkey.JSSetProxy",
+  .tp_basicsize = sizeof(JSSetProxy),
+  .tp_itemsize = 0,
+  .tp_dealloc = (destructor)JSSetProxyMethodDefinitions::JSSetProxy_dealloc,
+  .tp_repr = (reprfunc)JSSetProxyMethodDefinitions::JSSetProxy_repr,
+  .tp_as_number = &JSSetProxy_number_methods,
+  .tp_as_sequence = &JSSetProxy_sequence_methods,
+  .tp_getattro = PyObject_GenericGetAttr,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_doc = PyDoc_STR("Javascript Set proxy"),
+  .tp_richcompare = (richcmpfunc)JSSetProxyMethodDefinitions::JSSetProxy_richcompare,
+  .tp_iter = (getiterfunc)JSSetProxyMethodDefinitions::JSSetProxy_iter,
+  .tp_methods = JSSetProxy_methods
+};
+
+PyTypeObject JSMapIterProxyType = {
+  .ob_base = PyVarObject_HEAD_INIT(NULL, 0)
+  .tp_name = "pythonmonkey.JSMapIterProxy",
+  .tp_basicsize = sizeof(JSMapIterProxy),
+  .tp_itemsize = 0,
+  .tp_dealloc = (destructor)JSMapIterProxyMethodDefinitions::JSMapIterProxy_dealloc,
+  .tp_getattro = PyObject_GenericGetAttr,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_doc = PyDoc_STR("Javascript Map and Set proxy iterator"),
+  .tp_iter = (getiterfunc)JSMapIterProxyMethodDefinitions::JSMapIterProxy_iter,
+  .tp_iternext = (iternextfunc)JSMapIterProxyMethodDefinitions::JSMapIterProxy_next
+};
+
+PyTypeObject JSSymbolProxyType = {
+  .ob_base = PyVarObject_HEAD_INIT(NULL, 0)
+  .tp_name = "pythonmonkey.JSSymbol",
+  .tp_basicsize = sizeof(JSSymbolProxy),
+  .tp_itemsize = 0,
+  .tp_dealloc = (destructor)JSSymbolProxyMethodDefinitions::JSSymbolProxy_dealloc,
+  .tp_repr = (reprfunc)JSSymbolProxyMethodDefinitions::JSSymbolProxy_repr,
+  .tp_getattro = PyObject_GenericGetAttr,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_doc = PyDoc_STR("Javascript Symbol proxy, the same JSSymbol is returned for the same JS Symbol"),
+  .tp_getset = JSSymbolProxy_getset
+};
+
 static void cleanup() {
   Py_XDECREF(PythonMonkey_Null);
   Py_XDECREF(PythonMonkey_BigInt);
@@ -419,7 +490,7 @@ static PyObject *eval(PyObject *self, PyObject *args) {
 
   // compile the code to execute
   JS::RootedScript script(GLOBAL_CX);
-  JS::Rooted<JS::Value> *rval = new JS::Rooted<JS::Value>(GLOBAL_CX);
+  JS::RootedValue rval(GLOBAL_CX);
   if (code) {
     JS::SourceText<mozilla::Utf8Unit> source;
     const char *codeChars = PyUnicode_AsUTF8(code);
@@ -440,27 +511,21 @@ static PyObject *eval(PyObject *self, PyObject *args) {
   }
 
   // execute the compiled code; last expr goes to rval
-  if (!JS_ExecuteScript(GLOBAL_CX, script, rval)) {
+  if (!JS_ExecuteScript(GLOBAL_CX, script, &rval)) {
     setSpiderMonkeyException(GLOBAL_CX);
     return NULL;
   }
 
-  // translate to the proper python type
-  PyObject *returnValue = pyTypeFactory(GLOBAL_CX, *rval);
+  // translate to the proper python type, either eagerly copying the whole result or lazily proxying it
+  bool copy = false;
+  if (evalOptions) {
+    getEvalOption(evalOptions, "copy", &copy);
+  }
+  PyObject *returnValue = copy ? pyDeepCopy(GLOBAL_CX, rval, -1, true) : pyTypeFactory(GLOBAL_CX, rval);
   if (PyErr_Occurred()) {
     return NULL;
   }
 
-  // TODO: Find a way to root strings for the lifetime of a proxying python string
-  js::ESClass cls = js::ESClass::Other;   // placeholder if `rval` is not a JSObject
-  if (rval->isObject()) {
-    JS::GetBuiltinClass(GLOBAL_CX, JS::RootedObject(GLOBAL_CX, &rval->toObject()), &cls);
-  }
-
-  if (!(rval->isString() || cls == js::ESClass::String)) {   // rval may be a string which must be kept alive.
-    delete rval;
-  }
-
   if (returnValue) {
     return returnValue;
   }
@@ -477,6 +542,9 @@ static PyObject *waitForEventLoop(PyObject *Py_UNUSED(self), PyObject *Py_UNUSED
   if (!loop.initialized()) return NULL;
   PyObject_SetAttrString(waiter, "_loop", loop._loop);
 
+  // The timers left on the closed event-loops of earlier `asyncio.run` calls would never let it return
+  PyEventLoop::TimerQueue::dropClosedLoops();
+
   return PyObject_CallMethod(waiter, "wait", NULL);
 }
 
@@ -495,11 +563,232 @@ static PyObject *isCompilableUnit(PyObject *self, PyObject *args) {
     Py_RETURN_FALSE;
 }
 
+static bool getCopyOptions(const char *functionName, PyObject *maxDepthObj, const char *cycles, int *maxDepth, bool *preserveCycles) {
+  *maxDepth = -1;
+  if (maxDepthObj != Py_None) {
+    *maxDepth = PyLong_AsLong(maxDepthObj);
+    if (*maxDepth == -1 && PyErr_Occurred()) {
+      return false;
+    }
+    if (*maxDepth < 0) {
+      PyErr_Format(PyExc_ValueError, "pythonmonkey.%s expects max_depth to be a non-negative int or None", functionName);
+      return false;
+    }
+  }
+
+  if (strcmp(cycles, "preserve") == 0) {
+    *preserveCycles = true;
+  } else if (strcmp(cycles, "error") == 0) {
+    *preserveCycles = false;
+  } else {
+    PyErr_Format(PyExc_ValueError, "pythonmonkey.%s expects cycles to be either 'preserve' or 'error'", functionName);
+    return false;
+  }
+  return true;
+}
+
+static PyObject *toPython(PyObject *self, PyObject *args, PyObject *kwargs) {
+  static const char *kwlist[] = {"value", "max_depth", "cycles", NULL};
+  PyObject *value;
+  PyObject *maxDepthObj = Py_None;
+  const char *cycles = "preserve";
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|Os:to_python", (char **)kwlist, &value, &maxDepthObj, &cycles)) {
+    return NULL;
+  }
+
+  int maxDepth;
+  bool preserveCycles;
+  if (!getCopyOptions("to_python", maxDepthObj, cycles, &maxDepth, &preserveCycles)) {
+    return NULL;
+  }
+
+  // only values backed by Javascript have anything to copy
+  if (!PyObject_TypeCheck(value, &JSObjectProxyType) &&
+      !PyObject_TypeCheck(value, &JSArrayProxyType) &&
+      !PyObject_TypeCheck(value, &JSStringProxyType)) {
+    Py_INCREF(value);
+    return value;
+  }
+
+  JS::RootedValue jsValue(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, value));
+  return pyDeepCopy(GLOBAL_CX, jsValue, maxDepth, preserveCycles);
+}
+
+static PyObject *toJs(PyObject *self, PyObject *args, PyObject *kwargs) {
+  static const char *kwlist[] = {"value", "max_depth", "cycles", NULL};
+  PyObject *value;
+  PyObject *maxDepthObj = Py_None;
+  const char *cycles = "preserve";
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|Os:to_js", (char **)kwlist, &value, &maxDepthObj, &cycles)) {
+    return NULL;
+  }
+
+  int maxDepth;
+  bool preserveCycles;
+  if (!getCopyOptions("to_js", maxDepthObj, cycles, &maxDepth, &preserveCycles)) {
+    return NULL;
+  }
+
+  // only python containers have anything to copy
+  if (!PyDict_CheckExact(value) && !PyList_CheckExact(value) && !PyTuple_CheckExact(value)) {
+    Py_INCREF(value);
+    return value;
+  }
+
+  JS::RootedValue jsValue(GLOBAL_CX, jsDeepCopy(GLOBAL_CX, value, maxDepth, preserveCycles, false));
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+  return pyTypeFactory(GLOBAL_CX, jsValue);
+}
+
+static PyObject *jsonParseToPython(PyObject *self, PyObject *args) {
+  PyObject *text;
+  if (!PyArg_ParseTuple(args, "O:json_parse_to_python", &text)) {
+    return NULL;
+  }
+
+  JS::RootedString jsonString(GLOBAL_CX);
+  if (PyUnicode_Check(text)) {
+    JS::RootedValue textValue(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, text));
+    if (!textValue.isString()) { // the conversion has failed
+      if (!PyErr_Occurred()) {
+        PyErr_SetString(PyExc_TypeError, "json_parse_to_python: could not convert the str to a JS string");
+      }
+      return NULL;
+    }
+    jsonString = textValue.toString();
+  } else {
+    Py_buffer view;
+    if (PyObject_GetBuffer(text, &view, PyBUF_SIMPLE) < 0) {
+      return NULL;
+    }
+    jsonString = JS_NewStringCopyUTF8N(GLOBAL_CX, JS::UTF8Chars((const char *)view.buf, view.len));
+    PyBuffer_Release(&view);
+  }
+  if (!jsonString) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+
+  // parse natively into plain JS values, then copy them out in a single pass without creating any proxies
+  JS::RootedValue parsed(GLOBAL_CX);
+  if (!JS_ParseJSON(GLOBAL_CX, jsonString, &parsed)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return pyDeepCopy(GLOBAL_CX, parsed, -1, true);
+}
+
+static bool appendJSONChunk(const char16_t *chars, uint32_t length, void *data) {
+  ((std::u16string *)data)->append(chars, length);
+  return true;
+}
+
+static PyObject *stringifyPython(PyObject *self, PyObject *args, PyObject *kwargs) {
+  static const char *kwlist[] = {"value", "indent", NULL};
+  PyObject *value;
+  PyObject *indent = Py_None;
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O:stringify_python", (char **)kwlist, &value, &indent)) {
+    return NULL;
+  }
+
+  // copy into plain JS values, so that JS_Stringify never goes through our proxy traps, with None as null as in `json.dumps`
+  JS::RootedValue jsValue(GLOBAL_CX, jsDeepCopy(GLOBAL_CX, value, -1, false, true));
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+  JS::RootedValue space(GLOBAL_CX);
+  if (indent != Py_None) {
+    space.set(jsTypeFactory(GLOBAL_CX, indent));
+    if (PyErr_Occurred()) {
+      return NULL;
+    }
+  }
+
+  std::u16string json;
+  if (!JS_Stringify(GLOBAL_CX, &jsValue, nullptr, space, appendJSONChunk, &json)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  if (json.empty()) { // value is not representable in JSON, like undefined or a function
+    Py_RETURN_NONE;
+  }
+
+  int byteorder = PY_LITTLE_ENDIAN ? -1 : 1;
+  return PyUnicode_DecodeUTF16((const char *)json.data(), json.length() * sizeof(char16_t), "surrogatepass", &byteorder);
+}
+
+static PyObject *serialize(PyObject *self, PyObject *args, PyObject *kwargs) {
+  static const char *kwlist[] = {"value", "transfer", NULL};
+  PyObject *value;
+  PyObject *transfer = Py_None;
+  if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O:serialize", (char **)kwlist, &value, &transfer)) {
+    return NULL;
+  }
+
+  JS::RootedValue jsValue(GLOBAL_CX, jsTypeFactory(GLOBAL_CX, value));
+  JS::RootedValue transferable(GLOBAL_CX);
+  if (transfer != Py_None) {
+    transferable.set(jsTypeFactory(GLOBAL_CX, transfer));
+  }
+  if (PyErr_Occurred()) {
+    return NULL;
+  }
+
+  // the bytes may be read back in another process, so the contents of transferred ArrayBuffers are moved into the clone buffer
+  JSAutoStructuredCloneBuffer buffer(JS::StructuredCloneScope::DifferentProcess, nullptr, nullptr);
+  if (!buffer.write(GLOBAL_CX, jsValue, transferable, JS::CloneDataPolicy(), nullptr, nullptr)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+
+  const JSStructuredCloneData &data = buffer.data();
+  PyObject *bytes = PyBytes_FromStringAndSize(NULL, data.Size());
+  if (!bytes) {
+    return NULL;
+  }
+  char *out = PyBytes_AS_STRING(bytes);
+  data.ForEachDataChunk([&out](const char *chunk, size_t size) {
+    memcpy(out, chunk, size);
+    out += size;
+    return true;
+  });
+  return bytes;
+}
+
+static PyObject *deserialize(PyObject *self, PyObject *args) {
+  Py_buffer view;
+  if (!PyArg_ParseTuple(args, "y*:deserialize", &view)) {
+    return NULL;
+  }
+
+  JSStructuredCloneData data(JS::StructuredCloneScope::DifferentProcess);
+  bool appended = data.AppendBytes((const char *)view.buf, view.len);
+  PyBuffer_Release(&view);
+  if (!appended) {
+    return PyErr_NoMemory();
+  }
+
+  JS::RootedValue jsValue(GLOBAL_CX);
+  if (!JS_ReadStructuredClone(GLOBAL_CX, data, JS_STRUCTURED_CLONE_VERSION, JS::StructuredCloneScope::DifferentProcess, &jsValue, JS::CloneDataPolicy(), nullptr, nullptr)) {
+    setSpiderMonkeyException(GLOBAL_CX);
+    return NULL;
+  }
+  return pyTypeFactory(GLOBAL_CX, jsValue);
+}
+
 PyMethodDef PythonMonkeyMethods[] = {
   {"eval", eval, METH_VARARGS, "Javascript evaluator in Python"},
   {"wait", waitForEventLoop, METH_NOARGS, "The event-loop shield. Blocks until all asynchronous jobs finish."},
   {"isCompilableUnit", isCompilableUnit, METH_VARARGS, "Hint if a string might be compilable Javascript"},
   {"collect", collect, METH_VARARGS, "Calls the Spidermonkey garbage collector"},
+  {"to_python", (PyCFunction)toPython, METH_VARARGS | METH_KEYWORDS, "Eagerly copies a Javascript value into native Python objects"},
+  {"to_js", (PyCFunction)toJs, METH_VARARGS | METH_KEYWORDS, "Eagerly copies a Python value into plain Javascript objects"},
+  {"json_parse_to_python", jsonParseToPython, METH_VARARGS, "Parses JSON text directly into native Python objects"},
+  {"stringify_python", (PyCFunction)stringifyPython, METH_VARARGS | METH_KEYWORDS, "Serializes a Python value to JSON text"},
+  {"serialize", (PyCFunction)serialize, METH_VARARGS | METH_KEYWORDS, "Serializes a Javascript value to bytes with the structured clone algorithm"},
+  {"deserialize", deserialize, METH_VARARGS, "Restores a Javascript value from bytes made by pythonmonkey.serialize"},
   {NULL, NULL, 0, NULL}
 };
 
@@ -605,6 +894,14 @@ PyMODINIT_FUNC PyInit_pythonmonkey(void)
     return NULL;
   if (PyType_Ready(&JSObjectItemsProxyType) < 0)
     return NULL;
+  if (PyType_Ready(&JSMapProxyType) < 0)
+    return NULL;
+  if (PyType_Ready(&JSSetProxyType) < 0)
+    return NULL;
+  if (PyType_Ready(&JSMapIterProxyType) < 0)
+    return NULL;
+  if (PyType_Ready(&JSSymbolProxyType) < 0)
+    return NULL;
 
   PyObject *pyModule = PyModule_Create(&pythonmonkey);
   if (pyModule == NULL)
@@ -694,6 +991,34 @@ PyMODINIT_FUNC PyInit_pythonmonkey(void)
     return NULL;
   }
 
+  Py_INCREF(&JSMapProxyType);
+  if (PyModule_AddObject(pyModule, "JSMapProxy", (PyObject *)&JSMapProxyType) < 0) {
+    Py_DECREF(&JSMapProxyType);
+    Py_DECREF(pyModule);
+    return NULL;
+  }
+
+  Py_INCREF(&JSSetProxyType);
+  if (PyModule_AddObject(pyModule, "JSSetProxy", (PyObject *)&JSSetProxyType) < 0) {
+    Py_DECREF(&JSSetProxyType);
+    Py_DECREF(pyModule);
+    return NULL;
+  }
+
+  Py_INCREF(&JSMapIterProxyType);
+  if (PyModule_AddObject(pyModule, "JSMapIterProxy", (PyObject *)&JSMapIterProxyType) < 0) {
+    Py_DECREF(&JSMapIterProxyType);
+    Py_DECREF(pyModule);
+    return NULL;
+  }
+
+  Py_INCREF(&JSSymbolProxyType);
+  if (PyModule_AddObject(pyModule, "JSSymbol", (PyObject *)&JSSymbolProxyType) < 0) {
+    Py_DECREF(&JSSymbolProxyType);
+    Py_DECREF(pyModule);
+    return NULL;
+  }
+
   if (PyModule_AddObject(pyModule, "SpiderMonkeyError", SpiderMonkeyError) < 0) {
     Py_DECREF(pyModule);
     return NULL;
@@ -701,6 +1026,15 @@ PyMODINIT_FUNC PyInit_pythonmonkey(void)
 
   // Initialize event-loop shield
   PyEventLoop::_locker = new PyEventLoop::Lock();
+  if (!PyEventLoop::init()) {
+    Py_DECREF(pyModule);
+    return NULL;
+  }
+
+  if (!JSMapProxyMethodDefinitions::init() || !JSSetProxyMethodDefinitions::init()) {
+    Py_DECREF(pyModule);
+    return NULL;
+  }
 
   PyObject *internalBindingPy = getInternalBindingPyFn(GLOBAL_CX);
   if (PyModule_AddObject(pyModule, "internalBinding", internalBindingPy) < 0) {
@@ -20,6 +20,7 @@
 #include "include/IntType.hh"
 #include "include/jsTypeFactory.hh"
 #include "include/ListType.hh"
+#include "include/MapType.hh"
 #include "include/NoneType.hh"
 #include "include/NullType.hh"
 #include "include/PromiseType.hh"
@@ -27,15 +28,58 @@
 #include "include/PyListProxyHandler.hh"
 #include "include/PyObjectProxyHandler.hh"
 #include "include/PyIterableProxyHandler.hh"
+#include "include/PySetProxyHandler.hh"
+#include "include/SetType.hh"
 #include "include/setSpiderMonkeyException.hh"
 #include "include/StrType.hh"
+#include "include/SymbolType.hh"
 #include "include/modules/pythonmonkey/pythonmonkey.hh"
 
 #include <jsapi.h>
 #include <jsfriendapi.h>
+#include <js/Array.h>
 #include <js/Object.h>
 #include <js/ValueArray.h>
 
+static const JSClass *plainObjectClass = nullptr;
+static const JSClass *arrayClass = nullptr;
+
+/**
+ * @brief Cache the JSClass of plain objects and arrays, which are not part of the public API, by creating one of each
+ *
+ * @return false if an exception has been raised
+ */
+static bool initBuiltinClasses(JSContext *cx) {
+  JSObject *plainObject = JS_NewPlainObject(cx);
+  if (!plainObject) {
+    return false;
+  }
+  plainObjectClass = JS::GetClass(plainObject);
+
+  JSObject *array = JS::NewArrayObject(cx, 0);
+  if (!array) {
+    return false;
+  }
+  arrayClass = JS::GetClass(array);
+  return true;
+}
+
+/**
+ * @brief Convert a JS function to python, unwrapping the python functions we wrapped ourselves
+ */
+static PyObject *functionToPyObject(JSContext *cx, JS::HandleValue rval) {
+  JSObject *obj = &rval.toObject();
+  if (JS_IsNativeFunction(obj, callPyFunc)) { // It's a wrapped python function by us
+    // Get the underlying python function from the 0th reserved slot
+    JS::Value pyFuncVal = js::GetFunctionNativeReserved(obj, 0);
+    PyObject *pyFunc = (PyObject *)(pyFuncVal.toPrivate());
+    Py_INCREF(pyFunc);
+    return pyFunc;
+  } else {
+    return FuncType::getPyObject(cx, rval);
+  }
+}
+
 PyObject *pyTypeFactory(JSContext *cx, JS::HandleValue rval) {
   if (rval.isUndefined()) {
     return NoneType::getPyObject();
@@ -53,19 +97,36 @@ PyObject *pyTypeFactory(JSContext *cx, JS::HandleValue rval) {
     return StrType::getPyObject(cx, rval.toString());
   }
   else if (rval.isSymbol()) {
-    printf("symbol type is not handled by PythonMonkey yet");
+    JS::RootedSymbol symbol(cx, rval.toSymbol());
+    return SymbolType::getPyObject(cx, symbol);
   }
   else if (rval.isBigInt()) {
     return IntType::getPyObject(cx, rval.toBigInt());
   }
   else if (rval.isObject()) {
-    JS::Rooted<JSObject *> obj(cx);
-    JS_ValueToObject(cx, rval, &obj);
+    JS::Rooted<JSObject *> obj(cx, &rval.toObject());
 
-    if (JS::GetClass(obj)->isProxyObject()) {
+    // The most common objects are resolved by comparing their class pointer
+    if (!plainObjectClass && !initBuiltinClasses(cx)) {
+      setSpiderMonkeyException(cx);
+      return NULL;
+    }
+    const JSClass *clasp = JS::GetClass(obj);
+    if (clasp == plainObjectClass) {
+      return DictType::getPyObject(cx, rval);
+    }
+    else if (clasp == arrayClass) {
+      return ListType::getPyObject(cx, obj);
+    }
+    else if (clasp == js::FunctionClassPtr || clasp == js::FunctionExtendedClassPtr) {
+      return functionToPyObject(cx, rval);
+    }
+
+    if (clasp->isProxyObject()) {
       if (js::GetProxyHandler(obj)->family() == &PyDictProxyHandler::family ||                // this is one of our proxies for python dicts
           js::GetProxyHandler(obj)->family() == &PyListProxyHandler::family ||                // this is one of our proxies for python lists
           js::GetProxyHandler(obj)->family() == &PyIterableProxyHandler::family ||            // this is one of our proxies for python iterables
+          js::GetProxyHandler(obj)->family() == &PySetProxyHandler::family ||                 // this is one of our proxies for python sets
           js::GetProxyHandler(obj)->family() == &PyObjectProxyHandler::family) {              // this is one of our proxies for python objects
 
         PyObject *pyObject = JS::GetMaybePtrFromReservedSlot<PyObject>(obj, PyObjectSlot);
@@ -95,19 +156,14 @@ PyObject *pyTypeFactory(JSContext *cx, JS::HandleValue rval) {
       return PromiseType::getPyObject(cx, obj);
     case js::ESClass::Error:
       return ExceptionType::getPyObject(cx, obj);
-    case js::ESClass::Function: {
-        if (JS_IsNativeFunction(obj, callPyFunc)) { // It's a wrapped python function by us
-          // Get the underlying python function from the 0th reserved slot
-          JS::Value pyFuncVal = js::GetFunctionNativeReserved(obj, 0);
-          PyObject *pyFunc = (PyObject *)(pyFuncVal.toPrivate());
-          Py_INCREF(pyFunc);
-          return pyFunc;
-        } else {
-          return FuncType::getPyObject(cx, rval);
-        }
-      }
+    case js::ESClass::Function:
+      return functionToPyObject(cx, rval);
     case js::ESClass::Array:
       return ListType::getPyObject(cx, obj);
+    case js::ESClass::Map:
+      return MapType::getPyObject(cx, obj);
+    case js::ESClass::Set:
+      return SetType::getPyObject(cx, obj);
     default:
       if (BufferType::isSupportedJsTypes(obj)) { // TypedArray or ArrayBuffer
         // TODO (Tom Tang): ArrayBuffers have cls == js::ESClass::ArrayBuffer
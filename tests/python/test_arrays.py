@@ -2676,3 +2676,37 @@ def test_iter_for_of():
   pm.eval("""(result, myit) => {let index = 0; for (const value of myit) {result[index++] = value}}""")(result, myit)
   assert result[0] == 1.0
   assert result[1] == 2.0
+
+# prototype
+
+
+def test_methods_are_shared_on_prototype():
+  items = [1, 2, 3]
+  other = [4, 5]
+  result = [None, None, None]
+  pm.eval("""(result, arr, other) => {
+    result[0] = Object.getPrototypeOf(arr) === Object.getPrototypeOf(other);
+    result[1] = Object.prototype.hasOwnProperty.call(arr, 'push');
+    result[2] = Object.getPrototypeOf(Object.getPrototypeOf(arr)) === Array.prototype;
+  }""")(result, items, other)
+  assert result == [True, False, True]
+
+
+def test_prototype_method_repeated_calls():
+  items = []
+  pm.eval("(arr) => { for (let i = 0; i < 100; i++) arr.push(i); }")(items)
+  assert items == [float(i) for i in range(100)]
+
+
+def test_prototype_methods_reject_other_this():
+  items = [1, 2]
+  result = pm.eval("""(arr) => {
+    const proto = Object.getPrototypeOf(arr);
+    const errors = [];
+    for (const call of [() => proto.push.call({}, 1), () => proto.push(1), () => proto.values.call([])]) {
+      try { call(); errors.push(null); } catch (e) { errors.push(e instanceof TypeError); }
+    }
+    return errors;
+  }""")(items)
+  assert result == [True, True, True]
+  assert items == [1, 2]
@@ -167,3 +167,38 @@ def test_eval_functions_bigint_crc32():
   assert crc_table_at(0) == 0
   assert crc_table_at(1) == 1996959894
   assert crc_table_at(255) == 755167117  # last item
+
+
+def test_bigints_exact_type_and_roundtrip():
+  identity = pm.eval("(n) => n")
+  for py_number in [0, 1, -1, 2**30, 2**31 - 1, -2**63, 2**63 - 1, 2**63, 2**64, -2**64, 2**90 + 7, -(2**300) + 1]:
+    js_number = pm.eval(f'{repr(py_number)}n')
+    assert type(js_number) is pm.bigint
+    assert js_number == py_number
+    assert hash(js_number) == hash(py_number)
+    back = identity(pm.bigint(py_number))
+    assert type(back) is pm.bigint
+    assert back == py_number
+    # the Python int passed in is not modified
+    assert identity(js_number) == py_number
+
+
+def test_bigints_zero_is_not_negative():
+  zero = pm.eval("-0n")
+  assert zero == 0
+  assert not zero < 0
+  assert str(zero) == '0'
+
+
+def test_ints_to_js_numbers():
+  is_number = pm.eval("(n) => typeof n === 'number'")
+  ident = pm.eval("(n) => n")
+
+  class MyInt(int):
+    pass
+  for py_number in [0, 1, -1, 2**30 - 1, -2**30, 2**31, -2**31 - 1, 2**52 + 1, 123456789012, MyInt(7), MyInt(2**40)]:
+    assert is_number(py_number)
+    assert ident(py_number) == int(py_number)
+  assert pm.eval("(n) => n === 5")(MyInt(5))
+  assert pm.eval("(a, b) => a === true && b === false")(True, False)
+  assert pm.eval("(x) => Object.is(x, -0)")(-0.0)
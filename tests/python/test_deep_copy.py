@@ -0,0 +1,190 @@
+import pytest
+import pythonmonkey as pm
+
+
+def test_to_python_plain_types():
+  obj = pm.eval("({ a: 1, b: 'two', c: [1, 'x', { d: null }], e: undefined })")
+  copy = pm.to_python(obj)
+  assert type(copy) is dict
+  assert type(copy['b']) is str
+  assert type(copy['c']) is list
+  assert type(copy['c'][2]) is dict
+  assert copy == {'a': 1.0, 'b': 'two', 'c': [1.0, 'x', {'d': pm.null}], 'e': None}
+
+
+def test_to_python_is_detached():
+  obj = pm.eval("({ a: [1, 2] })")
+  copy = pm.to_python(obj)
+  obj['a'].append(3)
+  assert copy['a'] == [1.0, 2.0]
+
+
+def test_to_python_max_depth():
+  obj = pm.eval("({ a: { b: { c: 1 } } })")
+  copy = pm.to_python(obj, max_depth=1)
+  assert type(copy) is dict
+  assert type(copy['a']) is dict
+  assert isinstance(copy['a']['b'], pm.JSObjectProxy)
+  assert copy['a']['b']['c'] == 1.0
+
+
+def test_to_python_preserves_cycles():
+  obj = pm.eval("(() => { const o = { shared: [1] }; o.self = o; o.again = o.shared; return o; })()")
+  copy = pm.to_python(obj)
+  assert copy['self'] is copy
+  assert copy['again'] is copy['shared']
+
+
+def test_to_python_cycles_error():
+  obj = pm.eval("(() => { const o = {}; o.self = o; return o; })()")
+  with pytest.raises(ValueError):
+    pm.to_python(obj, cycles='error')
+
+
+def test_to_python_shared_not_cyclic_with_cycles_error():
+  obj = pm.eval("(() => { const shared = [1]; return { a: shared, b: shared }; })()")
+  copy = pm.to_python(obj, cycles='error')
+  assert copy == {'a': [1.0], 'b': [1.0]}
+
+
+def test_to_python_deeply_nested():
+  nested = pm.eval("""(depth) => {
+    let array = [];
+    for (let i = 0; i < depth; i++) array = [array];
+    return array;
+  }""")(200000)
+  with pytest.raises(RecursionError):
+    pm.to_python(nested)
+  with pytest.raises(RecursionError):
+    pm.json_parse_to_python('[' * 200000 + ']' * 200000)
+
+
+def test_to_python_unpaired_surrogate_and_astral():
+  copy = pm.to_python(pm.eval("['\\uD83D\\uDE00', '\\uD800']"))
+  assert copy[0] == '\U0001F600'
+  assert copy[1] == '\ud800'
+
+
+def test_to_python_non_js_value_is_returned_unchanged():
+  obj = {'a': [1]}
+  assert pm.to_python(obj) is obj
+
+
+def test_eval_copy_option():
+  copy = pm.eval("({ a: [1, { b: 'c' }] })", {'copy': True})
+  assert type(copy) is dict
+  assert type(copy['a']) is list
+  assert copy == {'a': [1.0, {'b': 'c'}]}
+
+
+def test_to_js_plain_objects():
+  copy = pm.to_js({'a': [1, 'two', (3, 4)], 'b': {'c': None}})
+  assert isinstance(copy, pm.JSObjectProxy)
+  result = pm.eval("""(obj) => [
+    Object.getPrototypeOf(obj) === Object.prototype,
+    Array.isArray(obj.a) && Object.getPrototypeOf(obj.a) === Array.prototype,
+    Array.isArray(obj.a[2]),
+    JSON.stringify(obj),
+  ]""")(copy)
+  assert result == [True, True, True, '{"a":[1,"two",[3,4]],"b":{}}']
+
+
+def test_to_js_is_detached():
+  items = [1, 2]
+  copy = pm.to_js(items)
+  pm.eval("(arr) => arr.push(3)")(copy)
+  assert items == [1, 2]
+  assert copy == [1.0, 2.0, 3.0]
+
+
+def test_to_js_preserves_cycles():
+  obj = {'shared': [1]}
+  obj['self'] = obj
+  obj['again'] = obj['shared']
+  copy = pm.to_js(obj)
+  assert pm.eval("(obj) => obj.self === obj && obj.again === obj.shared")(copy)
+
+
+def test_to_js_cycles_error():
+  items = []
+  items.append(items)
+  with pytest.raises(ValueError):
+    pm.to_js(items, cycles='error')
+
+
+def test_to_js_deeply_nested():
+  nested = []
+  for _ in range(200000):
+    nested = [nested]
+  with pytest.raises(RecursionError):
+    pm.to_js(nested)
+
+
+def test_to_js_max_depth():
+  copy = pm.to_js({'a': {'b': {'c': 1}}}, max_depth=1)
+  prototypes = pm.eval("""(obj) => [
+    Object.getPrototypeOf(obj.a) === Object.prototype,
+    Object.getPrototypeOf(obj.a.b) === Object.prototype,
+  ]""")
+  assert prototypes(copy) == [True, False]
+
+
+def test_json_parse_to_python():
+  parsed = pm.json_parse_to_python(b'{"a": [1, "\\u00e9", {"b": null}], "c": true, "d": "\xf0\x9f\x98\x80"}')
+  assert type(parsed) is dict
+  assert type(parsed['a'][1]) is str
+  assert parsed == {'a': [1.0, 'é', {'b': pm.null}], 'c': True, 'd': '\U0001F600'}
+
+
+def test_json_parse_to_python_str():
+  assert pm.json_parse_to_python('[1, 2]') == [1.0, 2.0]
+
+
+def test_json_parse_to_python_syntax_error():
+  with pytest.raises(pm.SpiderMonkeyError):
+    pm.json_parse_to_python(b'{"a": ')
+
+
+def test_stringify_python():
+  assert pm.stringify_python({'a': [1, 'two', (3, 4.5)], 'b': True, 'c': None}) == '{"a":[1,"two",[3,4.5]],"b":true,"c":null}'
+
+
+def test_stringify_python_none():
+  assert pm.stringify_python(None) == 'null'
+  assert pm.stringify_python({'a': None}) == '{"a":null}'
+  assert pm.stringify_python([None, 1, None]) == '[null,1,null]'
+
+
+def test_stringify_python_indent():
+  assert pm.stringify_python({'a': [1]}, indent=2) == '{\n  "a": [\n    1\n  ]\n}'
+
+
+def test_stringify_python_unrepresentable():
+  assert pm.stringify_python(lambda: None) is None
+
+
+def test_stringify_python_cycle():
+  items = []
+  items.append(items)
+  with pytest.raises(ValueError):
+    pm.stringify_python(items)
+
+
+def test_serialize_roundtrip():
+  value = pm.eval("""(() => {
+    const o = { a: [1, 'two'], d: new Date(0), m: new Map([[1, 2]]) };
+    o.self = o;
+    return o;
+  })()""")
+  data = pm.serialize(value)
+  assert type(data) is bytes
+  restored = pm.deserialize(data)
+  assert pm.eval("""(o) => o.self === o && o.a[1] === 'two' && o.d.getTime() === 0 && o.m.get(1) === 2""")(restored)
+
+
+def test_serialize_transfer_detaches():
+  buffers = pm.eval("[new Uint8Array([1, 2, 3]).buffer]")
+  data = pm.serialize(buffers, transfer=buffers)
+  assert pm.eval("(buffers) => buffers[0].byteLength")(buffers) == 0
+  restored = pm.deserialize(data)
+  assert pm.eval("(buffers) => Array.from(new Uint8Array(buffers[0]))")(restored) == [1.0, 2.0, 3.0]
@@ -387,3 +387,29 @@ def test___class__attribute():
 def test___none__attribute():
   a = pm.eval("({'0': 1, '1': 2})")
   assert a[2] is None
+
+# prototype
+
+
+def test_dict_methods_are_shared_on_prototype():
+  result = [None, None, None]
+  pm.eval("""(result, a, b) => {
+    result[0] = Object.getPrototypeOf(a) === Object.getPrototypeOf(b);
+    result[1] = Object.prototype.hasOwnProperty.call(a, 'toString');
+    result[2] = a instanceof Object;
+  }""")(result, {'a': 1}, {'b': 2})
+  assert result == [True, False, True]
+
+
+def test_dict_key_shadows_prototype_method():
+  result = [None]
+  pm.eval("(result, obj) => { result[0] = obj.valueOf }")(result, {'valueOf': 42})
+  assert result[0] == 42.0
+
+
+def test_dict_prototype_methods_reject_other_this():
+  result = pm.eval("""(d) => {
+    try { Object.getPrototypeOf(d).valueOf.call({}); } catch (e) { return e instanceof TypeError; }
+    return false;
+  }""")({'a': 1})
+  assert result
@@ -57,6 +57,22 @@ def test_finished_timer_ref():
   assert asyncio.run(async_fn())
 
 
+
+def test_finished_timer_ref_unref():
+  async def async_fn():
+    # Re-refing then unrefing a finished timer must not take the count of another pending timer away
+    obj = {'val': 0, 'hasRef': None}
+    pm.eval("""(obj) => {
+            const timer = setTimeout(()=>{}, 10);
+            setTimeout(()=>{ timer.ref(); timer.unref(); timer.ref(); obj.hasRef = timer.hasRef() }, 50);
+            setTimeout(()=>{ obj.val = 1 }, 200);
+        }""")(obj)
+    await pm.wait()  # should still wait for the last timer
+    assert obj['val'] == 1
+    assert obj['hasRef']
+    return True
+  assert asyncio.run(async_fn())
+
 def test_set_clear_timeout():
   # throw RuntimeError outside a coroutine
   with pytest.raises(RuntimeError,
@@ -350,6 +366,250 @@ def test_promises():
                      match="PythonMonkey cannot find a running Python event-loop to make asynchronous calls."):
     pm.eval("new Promise(() => { })")
 
+
+def test_promise_jobs_run_in_one_batch():
+  async def async_fn():
+    order = []
+    pm.eval("""(order) => {
+      Promise.resolve().then(() => order.push('a')).then(() => order.push('b'));
+      (async () => { await null; await null; order.push('c'); })();
+    }""")(order)
+    asyncio.get_running_loop().call_soon(lambda: order.append('py'))
+    await asyncio.sleep(0.01)
+    # all the microtasks, including the ones enqueued by other microtasks, run before the next asyncio callback
+    assert order == ['a', 'b', 'c', 'py']
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_promise_jobs_many_awaits():
+  async def async_fn():
+    result = await pm.eval("""(async () => {
+      let total = 0;
+      for (let i = 0; i < 10000; i++) total += await i;
+      return total;
+    })()""")
+    assert result == 49995000.0
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_timers_run_in_deadline_order():
+  async def async_fn():
+    order = []
+    pm.eval("""(order) => {
+      setTimeout(() => order.push('c'), 60);
+      setTimeout(() => order.push('a'), 20);
+      const cancelled = setTimeout(() => order.push('x'), 20);
+      setTimeout(() => order.push('b'), 20);
+      setTimeout(() => order.push('first'), 0);
+      clearTimeout(cancelled);
+    }""")(order)
+    await pm.wait()
+    assert order == ['first', 'a', 'b', 'c']
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_many_cancelled_timers():
+  async def async_fn():
+    fired = await pm.eval("""new Promise((resolve) => {
+      const timers = [];
+      for (let i = 0; i < 10000; i++) timers.push(setTimeout(() => resolve('cancelled timer fired'), 50 + i % 100));
+      timers.forEach(clearTimeout);
+      setTimeout(() => resolve('fired'), 10);
+    })""")
+    assert fired == 'fired'
+    await pm.wait()  # the cancelled timers don't keep the event-loop busy
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_stale_timeout_id_after_recycling():
+  async def async_fn():
+    stale_id = await pm.eval("new Promise((resolve) => { const t = setTimeout(() => resolve(Number(t)), 0); })")
+    pm.collect()  # the `Timeout` object is gone, so its id can be recycled
+    fired = await pm.eval("""(staleId) => new Promise((resolve) => {
+      const timeouts = [];
+      for (let i = 0; i < 10; i++) timeouts.push(setTimeout(() => resolve('fired'), 10));
+      clearTimeout(staleId); // must not cancel a timer that reused the slot
+      if (timeouts.some((t) => !(Number(t) > 0 && Number.isInteger(Number(t))) || Number(t) === staleId))
+        resolve('invalid id');
+    })""")(stale_id)
+    assert fired == 'fired'
+    await pm.wait()
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_timer_debug_info_opt_in():
+  async def async_fn():
+    debug_info = pm.eval("""(require, enabled) => {
+      const timers = require('internal-binding')('timers');
+      const wasEnabled = timers.isDebugInfoEnabled();
+      try {
+        timers.setDebugInfoEnabled(enabled);
+        return timers.getDebugInfo(Number(setTimeout(() => {}, 0)));
+      } finally {
+        timers.setDebugInfoEnabled(wasEnabled);
+      }
+    }""")
+    require = pm.createRequire(__file__)
+    assert debug_info(require, False) is None
+    info = debug_info(require, True)
+    assert info['type'] == 'setTimeout'
+    assert info['delaySeconds'] == 0
+    await pm.wait()
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_setImmediate_batches():
+  async def async_fn():
+    order = []
+    pm.eval("""(order) => {
+      setImmediate(() => {
+        order.push('a');
+        setImmediate(() => order.push('nested'));
+      });
+      const cancelled = setImmediate(() => order.push('x'));
+      setImmediate((arg) => order.push(arg), 'b');
+      clearImmediate(cancelled);
+    }""")(order)
+    await pm.wait()
+    # immediates scheduled by an immediate run on the next event-loop iteration, after the current batch
+    assert order == ['a', 'b', 'nested']
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_queueMicrotask():
+  async def async_fn():
+    order = []
+    pm.eval("""(order) => {
+      setImmediate(() => order.push('immediate'));
+      Promise.resolve().then(() => order.push('promise'));
+      queueMicrotask(function () {
+        order.push(this === undefined && arguments.length === 0 ? 'microtask' : 'wrong call');
+        queueMicrotask(() => order.push('nested microtask'));
+      });
+      order.push('sync');
+    }""")(order)
+    await pm.wait()
+    assert order == ['sync', 'promise', 'microtask', 'nested microtask', 'immediate']
+    with pytest.raises(pm.SpiderMonkeyError, match="must be of type function"):
+      pm.eval("queueMicrotask(1)")
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_microtasks_between_callbacks():
+  async def async_fn():
+    order = []
+    pm.eval("""(order) => {
+      setImmediate(() => {
+        order.push('immediate 1');
+        Promise.resolve().then(() => order.push('promise 1'));
+      });
+      setImmediate(() => order.push('immediate 2'));
+      setTimeout(() => {
+        order.push('timeout 1');
+        queueMicrotask(() => order.push('microtask 1'));
+      }, 10);
+      setTimeout(() => order.push('timeout 2'), 10);
+    }""")(order)
+    await pm.wait()
+    # as in Node.js, microtasks run after each callback, not after the whole batch
+    assert order == ['immediate 1', 'promise 1', 'immediate 2', 'timeout 1', 'microtask 1', 'timeout 2']
+    return True
+  assert asyncio.run(async_fn())
+
+
+def test_timeout_refresh():
+  async def async_fn():
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    elapsed = await pm.eval("""new Promise((resolve) => {
+      const timeout = setTimeout(() => resolve('fired'), 100);
+      setTimeout(() => timeout.refresh(), 60); // restarts the 100ms from here
+    })""")
+    assert elapsed == 'fired'
+    assert loop.time() - start >= 0.15
+
+    # refreshing a timer that has already run reactivates it
+    count = await pm.eval("""new Promise((resolve) => {
+      let count = 0;
+      const timeout = setTimeout(() => {
+        count++;
+        if (count === 3) resolve(count);
+        else if (count === 1) timeout.refresh(); // from its own callback
+      }, 10);
+      setTimeout(() => timeout.refresh(), 50); // after it has run twice
+    })""")
+    assert count == 3.0
+
+    # cancelled timers stay cancelled
+    result = await pm.eval("""new Promise((resolve) => {
+      const timeout = setTimeout(() => resolve('cancelled timer fired'), 10);
+      clearTimeout(timeout);
+      timeout.refresh();
+      setTimeout(() => resolve('ok'), 50);
+    })""")
+    assert result == 'ok'
+    await pm.wait()
+    return True
+  assert asyncio.run(async_fn())
+
+
+
+def test_unrefed_timeout_refresh():
+  async def async_fn():
+    obj = {'fired': 0, 'hasRef': None}
+    timeout = pm.eval("""(obj) => {
+      const timeout = setTimeout(() => { obj.fired++ }, 10).unref();
+      setTimeout(() => { timeout.refresh(); obj.hasRef = timeout.hasRef() }, 50); // after it has run
+      return timeout;
+    }""")(obj)
+    await pm.wait()  # the refreshed timer stays unref'ed, so it doesn't hold up the event-loop shield
+    assert obj['fired'] == 1
+    assert obj['hasRef'] is False
+    pm.eval("clearTimeout")(timeout)
+    return True
+  assert asyncio.run(async_fn())
+
+def test_timeout_refresh_on_new_loop():
+  fired = []
+
+  async def first_loop():
+    timeout = pm.eval("(fired) => setTimeout(() => fired.append(true), 0)")(fired)
+    await pm.wait()
+    return timeout
+  timeout = asyncio.run(first_loop())
+  assert fired == [True]
+
+  async def second_loop():
+    # the timer moves to the running event-loop instead of its stopped one
+    pm.eval("(t) => t.refresh()")(timeout)
+    await asyncio.wait_for(pm.wait(), timeout=1)
+  asyncio.run(second_loop())
+  assert fired == [True, True]
+
+  with pytest.raises(RuntimeError,
+                     match="PythonMonkey cannot find a running Python event-loop to make asynchronous calls."):
+    pm.eval("(t) => t.refresh()")(timeout)
+
+
+
+def test_timers_of_closed_loop_dropped():
+  async def first_loop():
+    pm.eval("setTimeout(() => {}, 10000); setImmediate(() => {})")  # still pending as the event-loop closes
+  asyncio.run(first_loop())
+
+  async def second_loop():
+    # the timers left on the closed event-loop don't hold up the event-loop shield
+    await asyncio.wait_for(pm.wait(), timeout=1)
+  asyncio.run(second_loop())
+
 # off-thread promises
 
 
@@ -0,0 +1,217 @@
+import collections.abc
+import pytest
+import pythonmonkey as pm
+
+
+def test_js_map_becomes_map_proxy():
+  m = pm.eval("new Map([['a', 1], [2, 'b']])")
+  assert isinstance(m, pm.JSMapProxy)
+  assert isinstance(m, collections.abc.MutableMapping)
+  assert len(m) == 2
+  assert m['a'] == 1.0
+  assert m[2] == 'b'
+  assert 'a' in m
+  assert 'c' not in m
+
+
+def test_js_map_proxy_missing_key():
+  m = pm.eval("new Map([['a', undefined]])")
+  assert m['a'] is None
+  with pytest.raises(KeyError):
+    m['b']
+  assert m.get('b') is None
+  assert m.get('b', 3) == 3
+
+
+def test_js_map_proxy_writes_through():
+  m = pm.eval("new Map()")
+  m['a'] = 1
+  assert pm.eval("(m) => m.get('a')")(m) == 1.0
+  assert m.pop('a') == 1.0
+  assert m.pop('a', 'default') == 'default'
+  with pytest.raises(KeyError):
+    del m['a']
+  m.clear()
+  assert len(m) == 0
+
+
+def test_js_map_proxy_iteration_keeps_insertion_order():
+  m = pm.eval("new Map([['b', 1], ['a', 2]])")
+  assert list(m) == ['b', 'a']
+  assert list(m.keys()) == ['b', 'a']
+  assert list(m.values()) == [1.0, 2.0]
+  assert list(m.items()) == [('b', 1.0), ('a', 2.0)]
+  assert dict(m.items()) == {'b': 1.0, 'a': 2.0}
+
+
+def test_js_map_proxy_views():
+  m = pm.eval("new Map([['a', 1]])")
+  keys, values, items = m.keys(), m.values(), m.items()
+  assert len(keys) == len(values) == len(items) == 1
+  assert list(keys) == list(keys) == ['a']
+  assert 'a' in keys
+  assert ('a', 1.0) in items
+  assert keys & {'a', 'b'} == {'a'}
+  m['b'] = 2
+  assert list(keys) == ['a', 'b']
+  assert list(values) == [1.0, 2.0]
+  assert list(items) == [('a', 1.0), ('b', 2.0)]
+
+
+def test_js_map_proxy_mutable_mapping_methods():
+  m = pm.eval("new Map([['a', 1]])")
+  assert m.setdefault('a', 2) == 1.0
+  assert m.setdefault('b', 2) == 2
+  m.update({'c': 3}, d=4)
+  m.update([('e', 5)])
+  assert pm.eval("(m) => [...m.keys()].join()")(m) == 'a,b,c,d,e'
+  assert m.popitem() == ('a', 1.0)
+  assert len(m) == 4
+  m.clear()
+  with pytest.raises(KeyError):
+    m.popitem()
+  with pytest.raises(ValueError):
+    m.update([('a', 1, 2)])
+
+
+def test_js_map_proxy_equality():
+  m = pm.eval("new Map([['a', 1], ['b', 2]])")
+  assert m == {'b': 2.0, 'a': 1.0}
+  assert m != {'a': 1.0}
+  assert m == pm.eval("new Map([['b', 2], ['a', 1]])")
+  assert m == m
+  assert m != [('a', 1.0), ('b', 2.0)]
+
+
+def test_js_map_proxy_roundtrips_to_same_map():
+  m = pm.eval("new Map()")
+  assert pm.eval("(m) => m instanceof Map")(m)
+  same = pm.eval("(() => { const m = new Map(); return [m, (other) => other === m]; })()")
+  assert same[1](same[0])
+
+
+def test_js_set_becomes_set_proxy():
+  s = pm.eval("new Set(['a', 1])")
+  assert isinstance(s, pm.JSSetProxy)
+  assert isinstance(s, collections.abc.MutableSet)
+  assert len(s) == 2
+  assert 'a' in s
+  assert 1 in s
+  assert 'b' not in s
+  assert list(s) == ['a', 1.0]
+
+
+def test_js_set_proxy_writes_through():
+  s = pm.eval("new Set()")
+  s.add('a')
+  s.add('a')
+  assert pm.eval("(s) => s.size")(s) == 1
+  s.discard('b')
+  with pytest.raises(KeyError):
+    s.remove('b')
+  s.remove('a')
+  assert len(s) == 0
+  s.add(1)
+  s.clear()
+  assert len(s) == 0
+
+
+def test_js_set_proxy_operators():
+  s = pm.eval("new Set([1, 2])")
+  assert s | {3} == {1, 2, 3}
+  assert s & {2, 3} == {2}
+  assert s - {2} == {1}
+  assert s ^ {2, 3} == {1, 3}
+  assert {2, 3} - s == {3}
+  assert type(s | {3}) is set
+  assert s == {1, 2}
+  assert s != {1}
+  assert s <= {1, 2, 3}
+  assert s < {1, 2, 3}
+  assert not s > {1, 2}
+  assert s == pm.eval("new Set([2, 1])")
+  assert s != [1, 2]
+  assert s.isdisjoint([3, 4])
+  assert not s.isdisjoint([2])
+
+
+def test_js_set_proxy_in_place_operators():
+  s = pm.eval("new Set([1, 2])")
+  s |= [3]
+  assert pm.eval("(s) => [...s].join()")(s) == '1,2,3'
+  s &= {1, 3}
+  assert s == {1, 3}
+  s -= [1]
+  assert s == {3}
+  s ^= [3, 4, 4]
+  assert s == {4}
+  s ^= s
+  assert len(s) == 0
+  assert isinstance(s, pm.JSSetProxy)
+
+
+def test_js_set_proxy_pop():
+  s = pm.eval("new Set(['a', 'b'])")
+  assert s.pop() == 'a'
+  assert s.pop() == 'b'
+  with pytest.raises(KeyError):
+    s.pop()
+
+
+def test_python_set_in_js():
+  py_set = {1, 'a'}
+  result = pm.eval("""(s) => [
+    s instanceof Set,
+    s.size,
+    s.has(1),
+    s.has('a'),
+    s.has('b'),
+    Object.keys(s).length,
+  ]""")(py_set)
+  assert result == [True, 2.0, True, True, False, 0.0]
+
+
+def test_python_set_mutated_from_js():
+  py_set = {1}
+  pm.eval("(s) => { s.add(2).add(3); s.delete(1); }")(py_set)
+  assert py_set == {2, 3}
+  assert pm.eval("(s) => s.delete(42)")(py_set) is False
+  pm.eval("(s) => s.clear()")(py_set)
+  assert py_set == set()
+
+
+def test_python_set_iterated_from_js():
+  py_set = {'a', 'b'}
+  assert sorted(pm.eval("(s) => [...s]")(py_set)) == ['a', 'b']
+  assert sorted(pm.eval("(s) => Array.from(s.values())")(py_set)) == ['a', 'b']
+  for_each = pm.eval("""(s) => {
+    const seen = [];
+    s.forEach((v, k, set) => seen.push(v === k && set === s ? v : null));
+    return seen;
+  }""")
+  assert sorted(for_each(py_set)) == ['a', 'b']
+  assert sorted(pm.eval("(s) => Array.from(s.entries()).map(([k, v]) => k + v)")(py_set)) == ['aa', 'bb']
+
+
+def test_python_frozenset_is_read_only_in_js():
+  frozen = frozenset([1])
+  assert pm.eval("(s) => s.has(1)")(frozen)
+  with pytest.raises(pm.SpiderMonkeyError):
+    pm.eval("(s) => s.add(2)")(frozen)
+
+
+def test_python_set_prototype_methods_reject_other_this():
+  result = pm.eval("""(s) => {
+    const proto = Object.getPrototypeOf(s);
+    const errors = [];
+    for (const call of [() => proto.add.call(new Set(), 1), () => proto.has(1), () => proto[Symbol.iterator].call({})]) {
+      try { call(); errors.push(null); } catch (e) { errors.push(e instanceof TypeError); }
+    }
+    return errors;
+  }""")({1})
+  assert result == [True, True, True]
+
+
+def test_python_set_roundtrips_to_same_object():
+  py_set = {1}
+  assert pm.eval("(s) => s")(py_set) is py_set
@@ -148,3 +148,28 @@ def test_pyobjects_toLocaleString():
 
   o = MyClass()
   assert '[object Object]' == pm.eval("(obj) => { return obj.toLocaleString(); }")(o)
+
+
+def test_object_kinds_conversion():
+  values = pm.eval("""[
+    {a: 1},
+    Object.create(null),
+    new (class Foo { constructor() { this.x = 1; } })(),
+    [1, 2],
+    new (class MyArray extends Array {})(),
+    function f() {},
+    () => 1,
+    (function g() {}).bind(null),
+    new Map(),
+  ]""")
+  assert isinstance(values[0], pm.JSObjectProxy)
+  assert values[0]['a'] == 1.0
+  assert isinstance(values[1], pm.JSObjectProxy)
+  assert isinstance(values[2], pm.JSObjectProxy)
+  assert values[2]['x'] == 1.0
+  assert isinstance(values[3], pm.JSArrayProxy)
+  assert isinstance(values[4], pm.JSArrayProxy)
+  assert isinstance(values[5], pm.JSFunctionProxy)
+  assert values[6]() == 1.0
+  assert isinstance(values[7], pm.JSFunctionProxy)
+  assert isinstance(values[8], pm.JSMapProxy)
@@ -69,6 +69,30 @@ def test_eval_dates():
     assert py_date == js_date
 
 
+def test_eval_dates_before_epoch():
+  js_date = pm.eval('new Date(Date.UTC(1969, 11, 31, 23, 59, 59, 999))')
+  assert js_date == datetime(1969, 12, 31, 23, 59, 59, 999000, tzinfo=timezone.utc)
+  js_date = pm.eval('new Date("0001-01-01T00:00:00.000Z")')
+  assert js_date == datetime(1, 1, 1, tzinfo=timezone.utc)
+
+
+def test_eval_invalid_date():
+  with pytest.raises(ValueError):
+    pm.eval('new Date(NaN)')
+
+
+def test_aware_datetime_to_js_date():
+  to_iso = pm.eval('(date) => date.toISOString()')
+  assert to_iso(datetime(2024, 2, 29, 12, 34, 56, 789999, tzinfo=timezone.utc)) == '2024-02-29T12:34:56.789Z'
+  assert to_iso(datetime(2024, 1, 1, 1, 30, tzinfo=timezone(timedelta(hours=2)))) == '2023-12-31T23:30:00.000Z'
+  assert to_iso(datetime(1900, 3, 1, tzinfo=timezone(timedelta(hours=-5, minutes=-30)))) == '1900-03-01T05:30:00.000Z'
+
+
+def test_naive_datetime_to_js_date_is_local_time():
+  naive = datetime(2024, 6, 1, 12, 0, 0)
+  assert pm.eval('(date) => date.getTime()')(naive) == naive.timestamp() * 1000
+
+
 def test_eval_boxed_booleans():
   py_bool = True
   js_bool = pm.eval('new Boolean(true)')
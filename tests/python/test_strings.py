@@ -1,6 +1,7 @@
 import pythonmonkey as pm
 import gc
 import random
+import sys
 
 
 def test_eval_ascii_string_matches_evaluated_string():
@@ -265,3 +266,46 @@ def test_eval_boxed_ucs4_string_fuzztest():
 
       string1 = string2
     assert INITIAL_STRING == string1  # strings should still match after a bunch of iterations through JS
+
+
+def test_python_strings_around_inline_length_reach_js_intact():
+  for length in [0, 1, 31, 32, 33, 1000]:
+    for char in ['a', '©', 'Ջ', '🀄']:
+      py_string = char * length
+      js_length = pm.eval("(s) => s.length")(py_string)
+      assert js_length == len(py_string.encode('utf-16-le')) / 2
+      assert pm.eval("(s) => s")(py_string) == py_string
+
+
+def test_python_ucs4_string_with_unpaired_surrogate_reaches_js_intact():
+  py_string = "🀄\ud8fe" * 40
+  assert pm.eval("(s) => s.charCodeAt(2)")(py_string) == 0xd8fe
+  assert pm.eval("(s) => s.length")(py_string) == 120
+
+
+def test_eval_string_is_not_leaked():
+  js_string = pm.eval("'abc'.repeat(50)")
+  assert sys.getrefcount(js_string) == 2  # the local variable and the getrefcount argument
+
+
+def test_js_strings_stay_rooted_while_others_are_freed():
+  strings = [pm.eval(f"'string number {i} ' + 'x'.repeat(100)") for i in range(2000)]
+  del strings[::2]
+  gc.collect()
+  pm.collect()
+  for i, string in zip(range(1, 2000, 2), strings):
+    assert string == f'string number {i} ' + 'x' * 100
+
+
+def test_js_string_hash_and_dict_lookup_match_python_string():
+  key = 'a key ©' + 'x' * 100
+  js_string = pm.eval(f"{key!r}.slice(0)")
+  assert hash(js_string) == hash(key)
+  assert hash(js_string) == hash(key)  # cached value
+  assert {key: 1}[js_string] == 1
+  assert {js_string: 1}[key] == 1
+
+
+def test_js_string_utf8_encoding_is_stable():
+  js_string = pm.eval("'ucs2 ՄԸՋ ' + 'x'.repeat(100)")
+  assert js_string.encode('utf-8') == js_string.encode('utf-8') == ('ucs2 ՄԸՋ ' + 'x' * 100).encode('utf-8')
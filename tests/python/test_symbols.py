@@ -0,0 +1,64 @@
+import pythonmonkey as pm
+
+
+def test_eval_symbol():
+  sym = pm.eval("Symbol('foo')")
+  assert type(sym) is pm.JSSymbol
+  assert sym.description == 'foo'
+  assert repr(sym) == 'Symbol(foo)'
+
+
+def test_symbol_without_description():
+  sym = pm.eval("Symbol()")
+  assert sym.description is None
+  assert repr(sym) == 'Symbol()'
+
+
+def test_symbol_identity():
+  sym = pm.eval("Symbol('foo')")
+  assert pm.eval("(s) => s")(sym) is sym
+  assert pm.eval("Symbol.iterator") is pm.eval("Symbol.iterator")
+  assert pm.eval("Symbol.for('registered')") is pm.eval("Symbol.for('registered')")
+  assert pm.eval("Symbol('foo')") is not pm.eval("Symbol('foo')")
+
+
+def test_symbol_roundtrip():
+  sym = pm.eval("Symbol.for('roundtrip')")
+  assert pm.eval("(s) => s === Symbol.for('roundtrip') && typeof s === 'symbol'")(sym)
+
+
+def test_symbol_keyed_access_on_js_object():
+  obj = pm.eval("({ [Symbol.for('key')]: 42, 'Symbol(key)': 'str' })")
+  sym = pm.eval("Symbol.for('key')")
+  assert obj[sym] == 42.0
+  assert obj['Symbol(key)'] == 'str'
+  assert sym in obj
+  obj[sym] = 43
+  assert pm.eval("(o) => o[Symbol.for('key')]")(obj) == 43.0
+
+
+def test_symbol_keyed_iterator_on_js_object():
+  obj = pm.eval("({ *[Symbol.iterator]() { yield 1; yield 2; } })")
+  iterator = obj[pm.eval("Symbol.iterator")]()
+  assert iterator.next()['value'] == 1.0
+  assert iterator.next()['value'] == 2.0
+  assert iterator.next()['done']
+
+
+def test_symbol_keys_on_python_dict():
+  sym = pm.eval("Symbol('key')")
+  d = {sym: 'value', 'Symbol(key)': 'other'}
+  assert pm.eval("(s, d) => d[s]")(sym, d) == 'value'
+  pm.eval("(d) => { d[Symbol.for('set')] = 1 }")(d)
+  assert d[pm.eval("Symbol.for('set')")] == 1.0
+
+
+def test_symbol_keys_on_python_object():
+  class Holder:
+    pass
+  holder = Holder()
+  pm.eval("(o) => { o[Symbol.for('attr')] = 1 }")(holder)
+  assert list(vars(holder).values()) == [1.0]
+  assert pm.eval("(o) => o[Symbol.for('attr')]")(holder) == 1.0
+  assert pm.eval("(o) => delete o[Symbol.for('attr')]")(holder)
+  assert vars(holder) == {}